@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from IRA.benchmarks.compare import compare, format_comparison
+from IRA.benchmarks.generator import PlantSpec
+from IRA.benchmarks.suite import CASES, run_suite
+
+
+def _run(args: argparse.Namespace) -> int:
+    spec = PlantSpec(tanks=args.tanks, pipelines=args.pipelines, pumps=args.pumps, seed=args.seed)
+    workdir = None
+    db_path = args.db
+    if db_path is None:
+        workdir = tempfile.mkdtemp(prefix='ira-bench-')
+        db_path = os.path.join(workdir, 'bench.db')
+    elif os.path.exists(db_path):
+        print(f"Database {db_path} already exists, benchmarks need a fresh file", file=sys.stderr)
+        return 2
+
+    try:
+        cases = args.only.split(',') if args.only else None
+        results = run_suite(db_path, spec, args.repeats, cases, args.workers)
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    comparisons = compare(baseline, current, args.threshold)
+    print(format_comparison(comparisons))
+    return 1 if any(c.status == 'regression' for c in comparisons) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m IRA.benchmarks', description="IRA performance benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="generate a synthetic plant and time repositories and calculations")
+    run.add_argument('--tanks', type=int, default=10000)
+    run.add_argument('--pipelines', type=int, default=10000)
+    run.add_argument('--pumps', type=int, default=10000)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeats', type=int, default=5)
+    run.add_argument('--workers', type=int, default=None, help="processes for the hazard calculation")
+    run.add_argument('--only', help=f"comma-separated cases: {', '.join(CASES)}")
+    run.add_argument('--db', help="database file to create (default: temporary file)")
+    run.add_argument('--output', default='benchmark.json')
+    run.set_defaults(handler=_run)
+
+    cmp = commands.add_parser('compare', help="compare two result files, exit code 1 on regressions")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=0.1, help="allowed relative slowdown of the median")
+    cmp.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
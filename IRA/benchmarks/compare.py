@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Comparison:
+    """Сравнение медианного времени сценария с базовым замером"""
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    threshold: float
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+    @property
+    def status(self) -> str:
+        if self.baseline is None:
+            return 'new'
+        if self.current is None:
+            return 'missing'
+        ratio = self.ratio
+        if ratio is None:
+            return 'same'
+        if ratio > 1 + self.threshold:
+            return 'regression'
+        if ratio < 1 - self.threshold:
+            return 'improvement'
+        return 'same'
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[Comparison]:
+    """Сравнение двух файлов результатов по медианам; threshold - допустимое относительное отклонение"""
+    base_results = baseline.get('results', {})
+    current_results = current.get('results', {})
+    names = list(dict.fromkeys([*base_results, *current_results]))
+    return [Comparison(name,
+                       base_results.get(name, {}).get('median_s'),
+                       current_results.get(name, {}).get('median_s'),
+                       threshold)
+            for name in names]
+
+
+def format_comparison(comparisons: List[Comparison]) -> str:
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:.4f}" if value is not None else '-'
+
+    lines = [f"{'case':<20} {'baseline, s':>12} {'current, s':>12} {'ratio':>7}  status"]
+    for c in comparisons:
+        ratio = f"{c.ratio:.2f}" if c.ratio is not None else '-'
+        lines.append(f"{c.name:<20} {seconds(c.baseline):>12} {seconds(c.current):>12} {ratio:>7}  {c.status}")
+    return '\n'.join(lines)
@@ -0,0 +1,128 @@
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from IRA.domain.models.equipment import (
+    PIPELINE_DIAMETER_CATEGORIES, PUMP_TYPES, TANK_TYPES, Pipeline, Pump, Tank,
+)
+from IRA.domain.models.substance import Substance
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager, get_connection_manager
+from IRA.infrastructure.database.sqlite.equipment_repository import (
+    SQLitePipelineRepository, SQLitePumpRepository, SQLiteTankRepository,
+)
+from IRA.infrastructure.database.sqlite.spatial import EARTH_RADIUS_M
+from IRA.infrastructure.database.sqlite.substance_repository import SQLiteSubstanceRepository
+
+# Каталог типовых веществ (ЛВЖ/ГЖ), из которого выбираются вещества оборудования
+SUBSTANCE_CATALOGUE: Tuple[Substance, ...] = (
+    Substance(None, "Бензин АИ-92", 750.0, 0.095, 35.0, 372000.0, 1.1, 2100.0, 4, 43600.0, 4, 2,
+              -27.0, 255.0, 0.76, 8.0, None, None, 0),
+    Substance(None, "Дизельное топливо", 840.0, 0.172, 180.0, 250000.0, 1.1, 1900.0, 4, 42700.0, 4, 2,
+              40.0, 210.0, 0.61, 6.5, None, None, 0),
+    Substance(None, "Нефть", 870.0, 0.210, 60.0, 280000.0, 1.1, 2000.0, 4, 42500.0, 4, 2,
+              -20.0, 250.0, 1.1, 6.4, None, None, 0),
+    Substance(None, "Керосин", 800.0, 0.160, 150.0, 290000.0, 1.1, 2000.0, 4, 43000.0, 4, 2,
+              28.0, 220.0, 0.64, 7.0, None, None, 0),
+    Substance(None, "Метанол", 792.0, 0.032, 64.7, 1100000.0, 1.2, 2500.0, 3, 23800.0, 4, 2,
+              6.0, 440.0, 6.0, 34.7, None, None, 0),
+    Substance(None, "Толуол", 867.0, 0.092, 110.6, 363000.0, 1.1, 1700.0, 3, 40900.0, 4, 2,
+              4.0, 535.0, 1.1, 7.1, None, None, 0),
+)
+
+
+def random_point(rnd: random.Random, center: Tuple[float, float], radius_m: float) -> Tuple[float, float]:
+    """Случайная точка (lat, lon), равномерно распределенная в круге radius_m вокруг center"""
+    lat0, lon0 = center
+    distance = radius_m * math.sqrt(rnd.random())
+    angle = rnd.uniform(0.0, 2.0 * math.pi)
+    lat = lat0 + math.degrees(distance * math.cos(angle) / EARTH_RADIUS_M)
+    lon = lon0 + math.degrees(distance * math.sin(angle) / EARTH_RADIUS_M) / math.cos(math.radians(lat0))
+    return lat, lon
+
+
+@dataclass
+class PlantSpec:
+    """Параметры синтетического проекта"""
+    tanks: int = 1000
+    pipelines: int = 1000
+    pumps: int = 1000
+    seed: int = 0
+    center: Tuple[float, float] = (55.75, 37.62)
+    radius_m: float = 3000.0
+    units: int = 50  # число составляющих предприятия (component_enterprise)
+
+
+@dataclass
+class GeneratedPlant:
+    """Сведения о сгенерированном проекте"""
+    db_path: str
+    spec: PlantSpec
+    substance_ids: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+class PlantGenerator:
+    """Генератор воспроизводимых синтетических проектов: одинаковый seed дает одинаковую базу"""
+
+    def __init__(self, spec: Optional[PlantSpec] = None):
+        self.spec = spec or PlantSpec()
+        self.random = random.Random(self.spec.seed)
+
+    def coordinate(self) -> str:
+        """Координата оборудования в круге spec.radius_m вокруг центра площадки"""
+        lat, lon = random_point(self.random, self.spec.center, self.spec.radius_m)
+        return f"{lat:.6f}, {lon:.6f}"
+
+    def unit(self) -> str:
+        return f"Установка {self.random.randrange(self.spec.units) + 1}"
+
+    def tanks(self, count: int, substance_ids: List[int], start: int = 0) -> List[Tank]:
+        rnd = self.random
+        return [Tank(None, f"Резервуар-{start + i + 1}", rnd.choice(TANK_TYPES), rnd.choice((100, 400, 1000, 2000, 5000)),
+                     round(rnd.uniform(0.5, 0.95), 2), round(rnd.uniform(0.0, 0.3), 3),
+                     round(rnd.uniform(5.0, 40.0), 1), self.unit(), round(rnd.uniform(100.0, 5000.0), 1),
+                     rnd.choice(substance_ids), self.coordinate())
+                for i in range(count)]
+
+    def pipelines(self, count: int, substance_ids: List[int], start: int = 0) -> List[Pipeline]:
+        rnd = self.random
+        result = []
+        for i in range(count):
+            diameter = rnd.choice((50.0, 80.0, 100.0, 150.0, 200.0, 300.0))
+            category = PIPELINE_DIAMETER_CATEGORIES[0 if diameter < 75 else 1 if diameter <= 150 else 2]
+            result.append(Pipeline(None, f"Трубопровод-{start + i + 1}", category, round(rnd.uniform(10.0, 2000.0), 1),
+                                   diameter, round(rnd.uniform(0.5, 50.0), 2), round(rnd.uniform(60.0, 300.0)),
+                                   round(rnd.uniform(0.1, 6.0), 2), round(rnd.uniform(5.0, 60.0), 1),
+                                   self.unit(), rnd.choice(substance_ids), self.coordinate()))
+        return result
+
+    def pumps(self, count: int, substance_ids: List[int], start: int = 0) -> List[Pump]:
+        rnd = self.random
+        return [Pump(None, f"Насос-{start + i + 1}", rnd.choice(PUMP_TYPES), round(rnd.uniform(0.1, 2.0), 2),
+                     round(rnd.uniform(5.0, 100.0), 1), round(rnd.uniform(60.0, 300.0)),
+                     round(rnd.uniform(0.5, 4.0), 2), round(rnd.uniform(5.0, 60.0), 1), self.unit(),
+                     rnd.choice(substance_ids), self.coordinate())
+                for i in range(count)]
+
+    def generate(self, db_path: str, connection_manager: Optional[SQLiteConnectionManager] = None,
+                 chunk_size: int = 50000) -> GeneratedPlant:
+        """Запись проекта в БД: каталог веществ и оборудование порциями по chunk_size"""
+        connections = connection_manager or get_connection_manager(db_path)
+        spec = self.spec
+        plant = GeneratedPlant(db_path, spec)
+
+        substance_ids = SQLiteSubstanceRepository(db_path, connections).create_many(SUBSTANCE_CATALOGUE)
+        plant.substance_ids = [i for i in substance_ids if i is not None]
+
+        for name, count, factory, repository in (
+                ('Tank', spec.tanks, self.tanks, SQLiteTankRepository),
+                ('Pipeline', spec.pipelines, self.pipelines, SQLitePipelineRepository),
+                ('Pump', spec.pumps, self.pumps, SQLitePumpRepository)):
+            repo = repository(db_path, connections)
+            created = 0
+            for start in range(0, count, chunk_size):
+                objects = factory(min(chunk_size, count - start), plant.substance_ids, start)
+                created += sum(1 for i in repo.create_many(objects) if i is not None)
+            plant.counts[name] = created
+        return plant
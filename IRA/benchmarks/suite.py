@@ -0,0 +1,318 @@
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from IRA.benchmarks.generator import GeneratedPlant, PlantGenerator, PlantSpec, random_point
+from IRA.core.calculator import HazardCalculator
+from IRA.core.event_tree import EventTreeGenerator
+from IRA.core.frequency import FrequencyEngine
+from IRA.core.incremental import IncrementalRiskCalculator
+from IRA.core.risk_field import RiskField, TileCache
+from IRA.infrastructure.database.sqlite.change_log_repository import SQLiteChangeLogRepository
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager
+from IRA.infrastructure.database.sqlite.equipment_repository import (
+    SQLitePipelineRepository, SQLitePumpRepository, SQLiteTankRepository,
+)
+from IRA.infrastructure.database.sqlite.failure_rate_repository import SQLiteFailureRateRepository
+from IRA.infrastructure.database.sqlite.federation import ProjectFleet
+from IRA.infrastructure.database.sqlite.spatial import radius_bbox
+from IRA.infrastructure.database.sqlite.substance_repository import SQLiteSubstanceRepository
+
+RESULTS_FORMAT = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Замеры одного сценария: время каждого повтора, с"""
+    name: str
+    operations: int
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'operations': self.operations,
+            'repeats': len(self.times),
+            'median_s': self.median,
+            'min_s': self.best,
+            'ops_per_s': self.operations / self.median if self.median > 0 else None,
+            'times_s': self.times,
+        }
+
+
+class BenchmarkContext:
+    """Общее состояние сценариев: репозитории проекта и детерминированный генератор запросов"""
+
+    def __init__(self, plant: GeneratedPlant, connections: SQLiteConnectionManager, workers: Optional[int],
+                 runs: int = 1):
+        self.plant = plant
+        # Вызовов замеряемой функции на сценарий (с прогревом): столько порций данных готовит сценарий удаления
+        self.runs = runs
+        self.random = random.Random(plant.spec.seed + 1)
+        self.workers = workers
+        db_path = plant.db_path
+        self.substances = SQLiteSubstanceRepository(db_path, connections)
+        self.tanks = SQLiteTankRepository(db_path, connections)
+        self.pipelines = SQLitePipelineRepository(db_path, connections)
+        self.pumps = SQLitePumpRepository(db_path, connections)
+        self.rates = SQLiteFailureRateRepository(db_path, connections)
+        self.changes = SQLiteChangeLogRepository(db_path, connections)
+        self.tank_ids = [row[0] for row in connections.get_connection().execute("SELECT tank_id FROM Tank")]
+
+    def random_tank_ids(self, count: int) -> List[int]:
+        return [self.random.choice(self.tank_ids) for _ in range(count)]
+
+    def random_point(self) -> Tuple[float, float]:
+        return random_point(self.random, self.plant.spec.center, self.plant.spec.radius_m)
+
+
+# Сценарий: context -> (замеряемая функция, число операций за вызов)
+Case = Callable[[BenchmarkContext], Tuple[Callable[[], Any], int]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(func: Case) -> Case:
+        CASES[name] = func
+        return func
+    return register
+
+
+@case('crud_create')
+def _crud_create(ctx: BenchmarkContext):
+    template = ctx.tanks.get(ctx.tank_ids[0])
+
+    def run():
+        for _ in range(200):
+            template.tank_id = None
+            ctx.tanks.create(template)
+    return run, 200
+
+
+@case('crud_get')
+def _crud_get(ctx: BenchmarkContext):
+    ids = ctx.random_tank_ids(1000)
+    return lambda: [ctx.tanks.get(i) for i in ids], len(ids)
+
+
+@case('crud_update')
+def _crud_update(ctx: BenchmarkContext):
+    tanks = [ctx.tanks.get(i) for i in ctx.random_tank_ids(200)]
+
+    def run():
+        for tank in tanks:
+            tank.temperature += 0.1
+            ctx.tanks.update(tank)
+    return run, len(tanks)
+
+
+@case('crud_delete')
+def _crud_delete(ctx: BenchmarkContext):
+    # Удаляемые строки создаются заранее, по порции на каждый вызов
+    template = ctx.tanks.get(ctx.tank_ids[0])
+    template.tank_id = None
+    created = [i for i in ctx.tanks.create_many([template] * (200 * ctx.runs)) if i is not None]
+    per_run = len(created) // ctx.runs
+
+    def run():
+        for _ in range(per_run):
+            ctx.tanks.delete(created.pop())
+    return run, per_run
+
+
+@case('bulk_update')
+def _bulk_update(ctx: BenchmarkContext):
+    tanks = ctx.tanks.get_all(limit=10000)
+    return lambda: ctx.tanks.update_many(tanks), len(tanks)
+
+
+@case('search_component')
+def _search_component(ctx: BenchmarkContext):
+    units = [f"Установка {ctx.random.randrange(ctx.plant.spec.units) + 1}" for _ in range(20)]
+    return lambda: [ctx.tanks.search(component_enterprise=unit) for unit in units], len(units)
+
+
+@case('search_text')
+def _search_text(ctx: BenchmarkContext):
+    names = [f"Резервуар-{ctx.random.randrange(max(1, len(ctx.tank_ids))) + 1}" for _ in range(50)]
+    return lambda: [ctx.tanks.search_text(name, limit=20) for name in names], len(names)
+
+
+@case('paginate_keyset')
+def _paginate_keyset(ctx: BenchmarkContext):
+    return lambda: sum(1 for _ in ctx.tanks.iter_all(chunk_size=1000)), len(ctx.tank_ids)
+
+
+@case('paginate_offset')
+def _paginate_offset(ctx: BenchmarkContext):
+    pages = min(20, len(ctx.tank_ids) // 1000 + 1)
+    return lambda: [ctx.tanks.get_all(limit=1000, offset=page * 1000) for page in range(pages)], pages * 1000
+
+
+@case('spatial_radius')
+def _spatial_radius(ctx: BenchmarkContext):
+    points = [ctx.random_point() for _ in range(100)]
+    return lambda: [ctx.tanks.within_radius(lat, lon, 200.0) for lat, lon in points], len(points)
+
+
+@case('spatial_bbox')
+def _spatial_bbox(ctx: BenchmarkContext):
+    boxes = [radius_bbox(*ctx.random_point(), 250.0) for _ in range(100)]
+    return lambda: [ctx.tanks.within_bbox(*box) for box in boxes], len(boxes)
+
+
+@case('load_columns')
+def _load_columns(ctx: BenchmarkContext):
+    return lambda: ctx.tanks.load_columns(ctx.substances), len(ctx.tank_ids)
+
+
+@case('get_details')
+def _get_details(ctx: BenchmarkContext):
+    return lambda: ctx.tanks.get_details(), len(ctx.tank_ids)
+
+
+@case('site_frequency')
+def _site_frequency(ctx: BenchmarkContext):
+    engine = FrequencyEngine(ctx.rates.get_all())
+    batches = [repo.load_columns() for repo in (ctx.tanks, ctx.pipelines, ctx.pumps)]
+    return lambda: engine.calculate_many(batches), sum(len(b) for b in batches)
+
+
+@case('site_hazard')
+def _site_hazard(ctx: BenchmarkContext):
+    batch = ctx.tanks.load_columns(ctx.substances)
+    scenarios = FrequencyEngine(ctx.rates.get_all()).calculate(batch)
+    calculator = HazardCalculator(max_workers=ctx.workers)
+    return lambda: calculator.calculate(batch, scenarios), len(scenarios)
+
+
+@case('event_trees')
+def _event_trees(ctx: BenchmarkContext):
+    batches = [repo.load_columns(ctx.substances) for repo in (ctx.tanks, ctx.pipelines, ctx.pumps)]
+    scenarios = FrequencyEngine(ctx.rates.get_all()).calculate_many(batches)
+    generator = EventTreeGenerator()
+    return lambda: generator.expand(batches, scenarios), len(scenarios)
+
+
+@case('incremental_update')
+def _incremental_update(ctx: BenchmarkContext):
+    risk = IncrementalRiskCalculator([ctx.tanks, ctx.pipelines, ctx.pumps], ctx.substances, ctx.rates, ctx.changes,
+                                     HazardCalculator(max_workers=ctx.workers))
+    risk.calculate()
+    tanks = [ctx.tanks.get(i) for i in ctx.random_tank_ids(20)]
+
+    def run():
+        for tank in tanks:
+            tank.temperature += 0.1
+            ctx.tanks.update(tank)
+            risk.refresh()
+    return run, len(tanks)
+
+
+@case('risk_tiles')
+def _risk_tiles(ctx: BenchmarkContext):
+    risk = IncrementalRiskCalculator([ctx.tanks, ctx.pipelines, ctx.pumps], ctx.substances, ctx.rates, ctx.changes,
+                                     HazardCalculator(max_workers=ctx.workers))
+    risk.calculate()
+    field = RiskField.from_calculator(risk, max_workers=ctx.workers)
+    bbox = radius_bbox(*ctx.plant.spec.center, ctx.plant.spec.radius_m)
+    tiles = field.tiles_in_bbox(*bbox, zoom=2)
+
+    def run():
+        # Каждый повтор - с пустым кэшем: замеряется расчет плиток
+        field.cache.clear()
+        field.tiles(2, tiles)
+    return run, len(tiles)
+
+
+@case('fleet_scan')
+def _fleet_scan(ctx: BenchmarkContext):
+    # Один файл проекта под несколькими путями: замеряется параллельный обход и слияние результатов
+    fleet = ProjectFleet([ctx.plant.db_path] * 4, max_workers=ctx.workers)
+    near = (*ctx.plant.spec.center, ctx.plant.spec.radius_m / 2)
+
+    def run():
+        return sum(1 for _ in fleet.equipment('Tank', substance_classes=(1, 2, 3), near=near))
+    return run, run()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Описание окружения для сопоставимости результатов"""
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+WARMUP_RUNS = 1
+
+
+def measure(func: Callable[[], Any], repeats: int, warmup: int = WARMUP_RUNS) -> List[float]:
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_suite(db_path: str, spec: PlantSpec, repeats: int = 5, cases: Optional[Sequence[str]] = None,
+              workers: Optional[int] = None, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Генерация проекта в db_path и замер сценариев; результат - словарь для JSON"""
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+
+    connections = SQLiteConnectionManager(db_path)
+    results: Dict[str, BenchmarkResult] = {}
+    try:
+        start = time.perf_counter()
+        plant = PlantGenerator(spec).generate(db_path, connections)
+        results['bulk_load'] = BenchmarkResult('bulk_load', sum(plant.counts.values()),
+                                               [time.perf_counter() - start])
+        log(f"bulk_load: {results['bulk_load'].median:.3f} s ({plant.counts})")
+
+        context = BenchmarkContext(plant, connections, workers, WARMUP_RUNS + repeats)
+        for name in cases or CASES:
+            func, operations = CASES[name](context)
+            results[name] = BenchmarkResult(name, operations, measure(func, repeats))
+            log(f"{name}: {results[name].median:.4f} s ({operations} ops)")
+    finally:
+        connections.close()
+    return {
+        'format': RESULTS_FORMAT,
+        'environment': environment(),
+        'spec': asdict(spec),
+        'results': {name: result.to_dict() for name, result in results.items()},
+    }
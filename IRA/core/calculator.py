@@ -0,0 +1,267 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from IRA.domain.models.columns import ColumnBatch, ScenarioTable
+from IRA.domain.models.failure_rate import FULL_RUPTURE
+
+GAS_CONSTANT = 8.314  # Дж/(моль·К)
+ATMOSPHERIC_PRESSURE = 101.325  # кПа
+TNT_HEAT_OF_EXPLOSION = 4520.0  # кДж/кг
+SADOVSKY_PRESSURE = 101.0  # кПа, P0 в формуле М.А. Садовского
+
+# Колонки пакета оборудования и веществ, необходимые для расчета
+EQUIPMENT_COLUMNS = ('volume', 'degree_filling', 'spill_square', 'temperature')
+SUBSTANCE_COLUMNS = ('density_liquid', 'molecular_weight', 'boiling_temperature_liquid',
+                     'heat_evaporation_liquid', 'heat_capacity_liquid', 'heat_of_combustion')
+
+
+@dataclass(frozen=True)
+class HazardParameters:
+    """Параметры расчета зон поражения"""
+    partial_release_fraction: float = 0.1  # доля содержимого при частичном разрушении
+    spill_area_per_m3: float = 20.0  # м² на м³ при свободном проливе (слой 0,05 м)
+    evaporation_time: float = 3600.0  # с, длительность испарения
+    radiative_fraction: float = 0.35  # доля излучения в теплоте сгорания
+    heat_flux_thresholds: Tuple[float, ...] = (10.5, 7.0, 4.2, 1.4)  # кВт/м²
+    tnt_participation: float = 0.1  # доля облака, участвующая во взрыве
+    overpressure_thresholds: Tuple[float, ...] = (100.0, 53.0, 28.0, 12.0, 5.0, 3.0)  # кПа
+
+
+@dataclass
+class HazardResults:
+    """Результаты расчета, выровненные по строкам таблицы сценариев.
+
+    fire_radius и explosion_radius - матрицы [сценарий, порог] по порогам
+    heat_flux_thresholds и overpressure_thresholds параметров расчета.
+    """
+    scenarios: ScenarioTable
+    spill_mass: np.ndarray  # кг
+    spill_area: np.ndarray  # м²
+    evaporation_rate: np.ndarray  # кг/с
+    evaporated_mass: np.ndarray  # кг
+    burning_rate: np.ndarray  # кг/(м²·с)
+    fire_radius: np.ndarray  # м
+    tnt_mass: np.ndarray  # кг
+    explosion_radius: np.ndarray  # м
+
+    def __len__(self) -> int:
+        return len(self.scenarios)
+
+    def select(self, rows: Union[np.ndarray, slice]) -> 'HazardResults':
+        """Подвыборка результатов по маске, индексам или срезу сценариев"""
+        arrays = {name: getattr(self, name)[rows] for name in _RESULT_ARRAYS}
+        return HazardResults(scenarios=self.scenarios.select(rows), **arrays)
+
+    def assign(self, rows: np.ndarray, other: 'HazardResults') -> None:
+        """Запись результатов other (и частот их сценариев) в строки rows на месте"""
+        for name in _RESULT_ARRAYS:
+            getattr(self, name)[rows] = getattr(other, name)
+        self.scenarios.frequency[rows] = other.scenarios.frequency
+
+    @staticmethod
+    def concat(parts: Sequence['HazardResults']) -> 'HazardResults':
+        """Объединение результатов, рассчитанных порциями"""
+        if not parts:
+            raise ValueError("Nothing to concatenate")
+        arrays = {name: np.concatenate([getattr(part, name) for part in parts])
+                  for name in _RESULT_ARRAYS}
+        return HazardResults(scenarios=ScenarioTable.concat([part.scenarios for part in parts]), **arrays)
+
+
+_RESULT_ARRAYS = ('spill_mass', 'spill_area', 'evaporation_rate', 'evaporated_mass', 'burning_rate',
+                  'fire_radius', 'tnt_mass', 'explosion_radius')
+
+
+def sadovsky_scaled_distances(overpressures: Sequence[float]) -> np.ndarray:
+    """Приведенные расстояния r / m^(1/3) для заданных избыточных давлений, кПа.
+
+    Формула Садовского dP/P0 = 0.8/x + 3/x² + 5/x³ монотонна по x, поэтому
+    кубическое уравнение решается один раз на порог, а не для каждого сценария.
+    """
+    result = []
+    for overpressure in overpressures:
+        roots = np.roots([overpressure / SADOVSKY_PRESSURE, -0.8, -3.0, -5.0])
+        result.append(max(root.real for root in roots if abs(root.imag) < 1e-9 and root.real > 0))
+    return np.array(result, dtype=np.float64)
+
+
+def vapour_pressure(temperature: np.ndarray, boiling_temperature: np.ndarray,
+                    heat_evaporation: np.ndarray, molecular_weight: np.ndarray) -> np.ndarray:
+    """Давление насыщенного пара по Клапейрону-Клаузиусу, кПа (не выше атмосферного).
+
+    Температуры в °C, теплота испарения в Дж/кг, молярная масса в кг/моль.
+    """
+    t = temperature + 273.15
+    tb = boiling_temperature + 273.15
+    exponent = heat_evaporation * molecular_weight / GAS_CONSTANT * (1.0 / tb - 1.0 / t)
+    pressure = ATMOSPHERIC_PRESSURE * np.exp(exponent)
+    return np.minimum(pressure, ATMOSPHERIC_PRESSURE)
+
+
+def hazard_kernel(inputs: Dict[str, np.ndarray], params: HazardParameters) -> Dict[str, np.ndarray]:
+    """Векторный расчет пролива, испарения, пожара пролива и взрыва для массива сценариев"""
+    full = inputs['type_id'] == FULL_RUPTURE
+    release = np.where(full, 1.0, params.partial_release_fraction)
+    liquid_volume = inputs['volume'] * inputs['degree_filling'] * release
+    density = inputs['density_liquid']
+    spill_mass = liquid_volume * density
+
+    # Свободный пролив ограничен площадью обвалования
+    spill_area = np.fmin(liquid_volume * params.spill_area_per_m3, inputs['spill_square'])
+
+    temperature = inputs['temperature']
+    molecular_weight = inputs['molecular_weight']
+    heat_evaporation = inputs['heat_evaporation_liquid']
+    pressure = vapour_pressure(temperature, inputs['boiling_temperature_liquid'], heat_evaporation,
+                               molecular_weight)
+    # W = 1e-6 · sqrt(M, г/моль) · Pн (кПа), кг/(м²·с)
+    evaporation_rate = 1e-6 * np.sqrt(molecular_weight * 1000.0) * pressure * spill_area
+    evaporated_mass = np.fmin(evaporation_rate * params.evaporation_time, spill_mass)
+
+    # Скорость выгорания по Бёрджессу, кг/(м²·с); теплота сгорания в кДж/кг
+    heat_of_combustion = inputs['heat_of_combustion'] * 1000.0
+    sensible_heat = inputs['heat_capacity_liquid'] * np.maximum(
+        inputs['boiling_temperature_liquid'] - temperature, 0.0)
+    burning_rate = 1e-3 * heat_of_combustion / (heat_evaporation + sensible_heat)
+
+    # Точечный источник: q = η·Q / (4π r²)
+    radiated = params.radiative_fraction * burning_rate * spill_area * heat_of_combustion
+    thresholds = np.asarray(params.heat_flux_thresholds, dtype=np.float64) * 1000.0
+    fire_radius = np.sqrt(radiated[:, np.newaxis] / (4.0 * np.pi * thresholds))
+
+    tnt_mass = (params.tnt_participation * evaporated_mass * inputs['heat_of_combustion']
+                / TNT_HEAT_OF_EXPLOSION)
+    scaled = sadovsky_scaled_distances(params.overpressure_thresholds)
+    explosion_radius = np.cbrt(tnt_mass)[:, np.newaxis] * scaled
+
+    return {
+        'spill_mass': spill_mass,
+        'spill_area': spill_area,
+        'evaporation_rate': evaporation_rate,
+        'evaporated_mass': evaporated_mass,
+        'burning_rate': burning_rate,
+        'fire_radius': fire_radius,
+        'tnt_mass': tnt_mass,
+        'explosion_radius': explosion_radius,
+    }
+
+
+def _split_inputs(inputs: Dict[str, np.ndarray], chunk_size: int) -> Iterator[Dict[str, np.ndarray]]:
+    size = len(inputs['type_id'])
+    for start in range(0, size, chunk_size):
+        yield {name: column[start:start + chunk_size] for name, column in inputs.items()}
+
+
+class HazardCalculator:
+    """Пакетный расчет последствий сценариев разгерметизации.
+
+    Каждая пара оборудование x сценарий считается NumPy-ядром hazard_kernel;
+    большие расчеты делятся на порции и выполняются пулом процессов,
+    результаты порций возвращаются в исходном порядке сценариев.
+    Пул создается при первом параллельном расчете и переиспользуется
+    до close(); в работе не больше двух порций на процесс.
+    """
+
+    def __init__(self, params: Optional[HazardParameters] = None, max_workers: Optional[int] = None,
+                 chunk_size: int = 50000):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.params = params or HazardParameters()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self) -> None:
+        """Остановка пула процессов"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'HazardCalculator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def prepare_inputs(self, batch: ColumnBatch,
+                       scenarios: ScenarioTable) -> Tuple[ScenarioTable, Dict[str, np.ndarray]]:
+        """Входные массивы ядра для сценариев оборудования пакета (с присоединенными веществами).
+
+        Пакет должен быть упорядочен по ключу без повторов, а сценарии таблицы - ссылаться
+        только на его оборудование, иначе ValueError (MonteCarloSimulation опирается на ту же проверку).
+        """
+        if batch.substance is None:
+            raise ValueError("Equipment batch must be loaded with substances")
+
+        # Поиск строк оборудования searchsorted требует уникальных ключей по возрастанию
+        if not np.all(np.diff(batch.ids) > 0):
+            raise ValueError(f"{batch.table} batch ids must be unique and sorted")
+
+        scenarios = scenarios.for_table(batch.table)
+        positions = np.searchsorted(batch.ids, scenarios.equipment_ids)
+        positions[positions >= len(batch.ids)] = 0
+        if len(batch.ids):
+            known = batch.ids[positions] == scenarios.equipment_ids
+        else:
+            known = np.zeros(len(positions), dtype=bool)
+        if not known.all():
+            raise ValueError(f"Scenarios refer to equipment missing from the {batch.table} batch")
+
+        inputs = {'type_id': scenarios.type_ids}
+        for name in EQUIPMENT_COLUMNS:
+            inputs[name] = batch.get(name)[positions]
+        for name in SUBSTANCE_COLUMNS:
+            inputs[name] = batch.substance.get(name)[positions]
+        return scenarios, inputs
+
+    def _results(self, scenarios: ScenarioTable, start: int, arrays: Dict[str, np.ndarray]) -> HazardResults:
+        return HazardResults(scenarios=scenarios.select(slice(start, start + len(arrays['spill_mass']))),
+                             **arrays)
+
+    def iter_calculate(self, batch: ColumnBatch, scenarios: ScenarioTable) -> Iterator[HazardResults]:
+        """Расчет порциями по chunk_size сценариев; порции выдаются по мере готовности, по порядку"""
+        scenarios, inputs = self.prepare_inputs(batch, scenarios)
+        chunks = _split_inputs(inputs, self.chunk_size)
+        kernel = partial(hazard_kernel, params=self.params)
+
+        if not len(scenarios):
+            yield self._results(scenarios, 0, kernel(inputs))
+            return
+
+        if self.max_workers == 1 or len(scenarios) <= self.chunk_size:
+            for i, chunk in enumerate(chunks):
+                yield self._results(scenarios, i * self.chunk_size, kernel(chunk))
+            return
+
+        # Окно из 2 * max_workers порций: следующая порция отправляется, когда выдана самая ранняя
+        executor = self.executor
+        pending = deque()
+        start = 0
+        try:
+            for chunk in chunks:
+                if len(pending) == 2 * self.max_workers:
+                    yield self._results(scenarios, start, pending.popleft().result())
+                    start += self.chunk_size
+                pending.append(executor.submit(kernel, chunk))
+            while pending:
+                yield self._results(scenarios, start, pending.popleft().result())
+                start += self.chunk_size
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def calculate(self, batch: ColumnBatch, scenarios: ScenarioTable) -> HazardResults:
+        """Расчет всех сценариев оборудования пакета"""
+        return HazardResults.concat(list(self.iter_calculate(batch, scenarios)))
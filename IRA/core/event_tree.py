@@ -0,0 +1,170 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from IRA.domain.models.columns import ColumnBatch, EventTable, ScenarioTable
+from IRA.domain.models.failure_rate import FULL_RUPTURE
+
+# Исходы деревьев событий (коды - индексы в OUTCOMES)
+POOL_FIRE, JET_FIRE, FLASH_FIRE, EXPLOSION, TOXIC_RELEASE, NO_EFFECT = range(6)
+OUTCOMES = ('pool_fire', 'jet_fire', 'flash_fire', 'explosion', 'toxic_release', 'no_effect')
+
+# Свойства вещества, от которых зависят ветви дерева
+TREE_SUBSTANCE_COLUMNS = ('boiling_temperature_liquid', 'flash_point', 'heat_of_combustion', 'class_substance',
+                          'threshold_toxic_dose', 'lethal_toxic_dose', 'sub_type')
+
+# Ветви дерева: (код исхода, условная вероятность)
+Branches = Tuple[Tuple[int, float], ...]
+
+
+@dataclass(frozen=True)
+class EventTreeParameters:
+    """Параметры деревьев событий"""
+    ambient_temperature: float = 20.0  # °C: ниже Tкип - газовая фаза, ниже Tвсп - образование облака
+    immediate_ignition_full: float = 0.2  # мгновенное воспламенение при полном разрушении
+    immediate_ignition_partial: float = 0.05  # мгновенное воспламенение при частичном разрушении
+    delayed_ignition: float = 0.1  # отсроченное воспламенение облака без мгновенного
+    explosion_fraction: float = 0.4  # доля взрывов среди отсроченных воспламенений облака
+    toxic_class: int = 2  # классы опасности не выше этого дают токсическое поражение и без данных о токсодозах
+    # Множители вероятности воспламенения для типов оборудования: (таблица, тип, множитель)
+    ignition_factors: Tuple[Tuple[str, str, float], ...] = (
+        ('Tank', 'С двойной оболочкой', 0.5),
+        ('Tank', 'Полной герметизации', 0.1),
+    )
+
+
+def build_tree(params: EventTreeParameters, substance: Dict[str, float], table: str, type_label: str,
+               release_type: int) -> Branches:
+    """Ветви дерева событий для вещества, типа оборудования и вида разгерметизации.
+
+    Мгновенное воспламенение дает факельное горение газа или пожар пролива жидкости;
+    отсроченное - пожар-вспышку или взрыв облака, если вещество образует облако
+    (газ или Tвсп ниже температуры окружающей среды), иначе пожар пролива; без
+    воспламенения - токсическое поражение для токсичных веществ. Ветви с нулевой
+    вероятностью отбрасываются, одинаковые исходы объединяются.
+    """
+    def known(name: str) -> bool:
+        value = substance.get(name)
+        return value is not None and not math.isnan(value)
+
+    flammable = known('heat_of_combustion') and substance['heat_of_combustion'] > 0
+    gas = known('boiling_temperature_liquid') and substance['boiling_temperature_liquid'] <= params.ambient_temperature
+    cloud = gas or (known('flash_point') and substance['flash_point'] < params.ambient_temperature)
+    toxic = known('threshold_toxic_dose') or known('lethal_toxic_dose') or (
+        known('class_substance') and 1 <= substance['class_substance'] <= params.toxic_class)
+
+    immediate = delayed = 0.0
+    if flammable:
+        immediate = params.immediate_ignition_full if release_type == FULL_RUPTURE \
+            else params.immediate_ignition_partial
+        factor = next((f for t, label, f in params.ignition_factors if t == table and label == type_label), 1.0)
+        immediate = min(1.0, immediate * factor)
+        delayed = (1.0 - immediate) * params.delayed_ignition
+
+    probabilities = [0.0] * len(OUTCOMES)
+    probabilities[JET_FIRE if gas else POOL_FIRE] += immediate
+    if cloud:
+        probabilities[FLASH_FIRE] += delayed * (1.0 - params.explosion_fraction)
+        probabilities[EXPLOSION] += delayed * params.explosion_fraction
+    else:
+        probabilities[POOL_FIRE] += delayed
+    probabilities[TOXIC_RELEASE if toxic else NO_EFFECT] += 1.0 - immediate - delayed
+    return tuple((outcome, p) for outcome, p in enumerate(probabilities) if p > 0)
+
+
+class EventTreeGenerator:
+    """Развертывание сценариев разгерметизации в исходы деревьев событий.
+
+    Дерево строится один раз для сигнатуры (таблица, тип оборудования, вид
+    разгерметизации, свойства вещества) и запоминается; сценарии пакета
+    группируются по сигнатурам векторно, и таблица исходов собирается
+    копированием ветвей запомненных деревьев (np.repeat и выборки по индексам).
+    """
+
+    def __init__(self, params: Optional[EventTreeParameters] = None):
+        self.params = params or EventTreeParameters()
+        self._trees: Dict[Tuple, Branches] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def tree(self, substance: Dict[str, float], table: str, type_label: str, release_type: int) -> Branches:
+        """Запомненное дерево событий для сигнатуры"""
+        key = (table, type_label, release_type) + tuple(
+            None if substance.get(name) is None or math.isnan(substance[name]) else substance[name]
+            for name in TREE_SUBSTANCE_COLUMNS)
+        branches = self._trees.get(key)
+        if branches is None:
+            self.misses += 1
+            branches = self._trees[key] = build_tree(self.params, substance, table, type_label, release_type)
+        else:
+            self.hits += 1
+        return branches
+
+    def clear(self) -> None:
+        self._trees.clear()
+
+    def _signature_branches(self, batch: ColumnBatch, scenarios: ScenarioTable) -> Tuple[np.ndarray, List[Branches]]:
+        """Номер сигнатуры каждого сценария таблицы и деревья сигнатур"""
+        if batch.substance is None:
+            raise ValueError("Equipment batch must be loaded with substances")
+        positions = np.searchsorted(batch.ids, scenarios.equipment_ids)
+        positions[positions >= len(batch)] = 0
+        known = batch.ids[positions] == scenarios.equipment_ids if len(batch) else np.zeros(len(positions), bool)
+        if not known.all():
+            raise ValueError(f"Scenarios refer to equipment missing from the {batch.table} batch")
+
+        n_types = len(batch.type_labels) + 1
+        type_codes = batch.type_codes[positions].astype(np.int64) if batch.type_codes is not None \
+            else np.full(len(positions), -1, dtype=np.int64)
+        # Сигнатура одним целым: строка оборудования с веществом, код типа и вид разгерметизации
+        sub_ids = batch['sub_id'][positions]
+        keys = ((sub_ids + 1) * n_types + type_codes + 1) * 256 + scenarios.type_ids
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        labels = batch.type_labels + ('',)
+        trees = []
+        for row in first:
+            equipment = positions[row]
+            substance = {name: float(batch.substance.get(name)[equipment]) for name in TREE_SUBSTANCE_COLUMNS}
+            trees.append(self.tree(substance, batch.table, labels[type_codes[row]], int(scenarios.type_ids[row])))
+        return inverse.ravel(), trees
+
+    def expand(self, batches: Iterable[ColumnBatch], scenarios: ScenarioTable) -> EventTable:
+        """Исходы всех сценариев; пакеты оборудования таблиц сценариев - с присоединенными веществами"""
+        batches = {batch.table: batch for batch in batches}
+        signatures = np.empty(len(scenarios), dtype=np.int64)
+        trees: List[Branches] = []
+        for code, table in enumerate(scenarios.table_labels):
+            rows = np.flatnonzero(scenarios.table_codes == code)
+            if not len(rows):
+                continue
+            if table not in batches:
+                raise ValueError(f"No equipment batch for {table}")
+            inverse, table_trees = self._signature_branches(batches[table], scenarios.select(rows))
+            signatures[rows] = inverse + len(trees)
+            trees.extend(table_trees)
+
+        # Ветви всех сигнатур подряд: ветви сигнатуры s начинаются с offsets[s]
+        counts = np.array([len(branches) for branches in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        branch_outcomes = np.array([o for branches in trees for o, _ in branches], dtype=np.int8)
+        branch_probability = np.array([p for branches in trees for _, p in branches], dtype=np.float64)
+
+        per_scenario = counts[signatures] if len(trees) else np.zeros(len(scenarios), dtype=np.int64)
+        scenario_rows = np.repeat(np.arange(len(scenarios)), per_scenario)
+        starts = np.cumsum(per_scenario) - per_scenario
+        branch = np.repeat(offsets[signatures] - starts, per_scenario) + np.arange(len(scenario_rows)) \
+            if len(trees) else np.empty(0, dtype=np.int64)
+
+        outcomes = scenarios.select(scenario_rows)
+        probability = branch_probability[branch]
+        outcomes.frequency = outcomes.frequency * probability
+        return EventTable(
+            scenarios=outcomes,
+            scenario_rows=scenario_rows,
+            outcome_codes=branch_outcomes[branch],
+            outcome_labels=OUTCOMES,
+            probability=probability,
+        )
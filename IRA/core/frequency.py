@@ -0,0 +1,64 @@
+from typing import Dict, Iterable
+
+import numpy as np
+
+from IRA.domain.models.columns import ColumnBatch, ScenarioTable
+from IRA.domain.models.failure_rate import FailureRates
+
+
+class FrequencyEngine:
+    """Векторный расчет частот сценариев разгерметизации оборудования.
+
+    Справочники частот загружаются один раз и хранятся матрицами
+    [код типа оборудования, вид разгерметизации]; частоты всего пакета
+    оборудования получаются одной выборкой из матрицы по type_codes.
+    """
+
+    def __init__(self, rates: Dict[str, FailureRates]):
+        self.rates = dict(rates)
+        # Дополнительная строка NaN для кода -1 (тип вне справочника)
+        self._lookup = {
+            table: np.vstack([r.rates, np.full((1, len(r.type_ids)), np.nan)])
+            for table, r in self.rates.items()
+        }
+
+    def _row_codes(self, batch: ColumnBatch, rates: FailureRates) -> np.ndarray:
+        """Коды типов пакета, приведенные к строкам матрицы справочника"""
+        if batch.type_codes is None:
+            return np.full(len(batch), -1, dtype=np.int64)
+        if batch.type_labels == rates.type_labels:
+            return batch.type_codes
+        remap = np.array([rates.type_labels.index(label) if label in rates.type_labels else -1
+                          for label in batch.type_labels] + [-1], dtype=np.int64)
+        return remap[batch.type_codes]
+
+    def frequencies(self, batch: ColumnBatch) -> np.ndarray:
+        """Матрица частот [оборудование, вид разгерметизации] для пакета, 1/год"""
+        rates = self.rates.get(batch.table)
+        if rates is None:
+            raise ValueError(f"No failure rates for {batch.table}")
+
+        result = self._lookup[batch.table][self._row_codes(batch, rates)]
+        if rates.length_column:
+            result *= batch.get(rates.length_column)[:, np.newaxis]
+        return result
+
+    def calculate(self, batch: ColumnBatch) -> ScenarioTable:
+        """Сценарии полного и частичного разрушения для всего пакета оборудования"""
+        rates = self.rates.get(batch.table)
+        if rates is None:
+            raise ValueError(f"No failure rates for {batch.table}")
+
+        frequency = self.frequencies(batch)
+        n_types = len(rates.type_ids)
+        return ScenarioTable(
+            table_codes=np.zeros(frequency.size, dtype=np.int16),
+            table_labels=(batch.table,),
+            equipment_ids=np.repeat(batch.ids, n_types),
+            type_ids=np.tile(np.array(rates.type_ids, dtype=np.int8), len(batch)),
+            frequency=frequency.ravel(),
+        )
+
+    def calculate_many(self, batches: Iterable[ColumnBatch]) -> ScenarioTable:
+        """Сценарии для нескольких таблиц оборудования одной таблицей"""
+        return ScenarioTable.concat([self.calculate(batch) for batch in batches])
@@ -0,0 +1,200 @@
+from dataclasses import replace
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from IRA.core.calculator import HazardCalculator, HazardResults
+from IRA.core.frequency import FrequencyEngine
+from IRA.domain.models.columns import ColumnBatch
+from IRA.domain.repositories.change_log_repository import ChangeLogRepository
+from IRA.domain.repositories.equipment_repository import EquipmentRepository
+from IRA.domain.repositories.failure_rate_repository import FailureRateRepository
+from IRA.domain.repositories.substance_repository import SubstanceRepository
+
+
+def _positions(ids: np.ndarray, keys: np.ndarray) -> Optional[np.ndarray]:
+    """Позиции keys в упорядоченном массиве ids или None, если какого-либо ключа нет"""
+    rows = np.searchsorted(ids, keys)
+    if len(rows) and (rows.max() >= len(ids) or not np.array_equal(ids[rows], keys)):
+        return None
+    return rows
+
+
+def _scenario_keys(results: HazardResults) -> np.ndarray:
+    """Ключ сценария, упорядоченный как (оборудование, вид разгерметизации)"""
+    scenarios = results.scenarios
+    return scenarios.equipment_ids.astype(np.int64) * 256 + scenarios.type_ids
+
+
+def _assign_batch(batch: ColumnBatch, rows: np.ndarray, source: ColumnBatch) -> None:
+    for name, column in batch.columns.items():
+        column[rows] = source.columns[name]
+    if batch.type_codes is not None:
+        batch.type_codes[rows] = source.type_codes
+    if batch.substance is not None:
+        _assign_batch(batch.substance, rows, source.substance)
+        batch.substance.ids[rows] = source.substance.ids
+
+
+class IncrementalRiskCalculator:
+    """Расчет последствий по проекту с инкрементальным пересчетом по журналу изменений.
+
+    calculate() считает все оборудование и запоминает ревизию журнала, refresh()
+    читает изменения после нее и пересчитывает только сценарии затронутого
+    оборудования: добавленного, измененного и использующего измененные вещества
+    (по sub_id); результаты удаленного оборудования отбрасываются. Если состав
+    оборудования не изменился, массивы results и batches обновляются на месте.
+    Последствия от частот не зависят, поэтому изменение справочника частот
+    обновляет только частоты сценариев своей таблицы.
+
+    После каждого расчета ревизия отмечается в журнале под именем consumer,
+    и журнал очищается до ревизии самого отстающего потребителя. Калькуляторы,
+    одновременно работающие с одной БД, должны иметь разные имена;
+    consumer=None отключает отметку (журнал тогда очищает вызывающий код).
+    """
+
+    def __init__(self, equipment: Sequence[EquipmentRepository], substances: SubstanceRepository,
+                 rates: FailureRateRepository, changes: ChangeLogRepository,
+                 calculator: Optional[HazardCalculator] = None, consumer: Optional[str] = 'incremental_risk'):
+        self.equipment = list(equipment)
+        self.substances = substances
+        self.rates = rates
+        self.changes = changes
+        # Свой калькулятор (и его пул процессов) закрывается в close(), переданный - владельцем
+        self._owns_calculator = calculator is None
+        self.calculator = calculator or HazardCalculator()
+        self.consumer = consumer
+        self.revision: Optional[int] = None
+        # Таблица оборудования -> выборка с веществами и результаты, упорядоченные по ключу
+        self.batches: Dict[str, ColumnBatch] = {}
+        self.results: Dict[str, HazardResults] = {}
+        self._repositories: Dict[str, EquipmentRepository] = {}
+        self._substances: Optional[ColumnBatch] = None
+        self._engine: Optional[FrequencyEngine] = None
+
+    def close(self) -> None:
+        if self._owns_calculator:
+            self.calculator.close()
+
+    def __enter__(self) -> 'IncrementalRiskCalculator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _acknowledge(self, revision: int) -> None:
+        self.revision = revision
+        if self.consumer is not None:
+            self.changes.acknowledge(self.consumer, revision)
+
+    def _calculate(self, batch: ColumnBatch) -> HazardResults:
+        return self.calculator.calculate(batch, self._engine.calculate(batch))
+
+    def calculate(self) -> Dict[str, HazardResults]:
+        """Полный расчет всех таблиц оборудования"""
+        # Ревизия читается до данных: изменения во время загрузки будут применены повторно
+        revision = self.changes.revision()
+        self._engine = FrequencyEngine(self.rates.get_all())
+        self._substances = self.substances.load_columns()
+        self.batches.clear()
+        self.results.clear()
+        for repository in self.equipment:
+            batch = repository.load_columns()
+            batch.substance = self._substances.take(batch['sub_id'])
+            self._repositories[batch.table] = repository
+            self.batches[batch.table] = batch
+            self.results[batch.table] = self._calculate(batch)
+        self._acknowledge(revision)
+        return self.results
+
+    def refresh(self) -> Dict[str, int]:
+        """Пересчет по изменениям после последнего расчета.
+
+        Возвращает число пересчитанных единиц оборудования по таблицам
+        (без расчета выполняется полный расчет).
+        """
+        if self.revision is None:
+            self.calculate()
+            return {table: len(batch) for table, batch in self.batches.items()}
+
+        changes = self.changes.changes_since(self.revision)
+        if not changes:
+            return {}
+
+        if changes.failure_rates:
+            rates = dict(self._engine.rates)
+            for table in changes.failure_rates:
+                table_rates = self.rates.get_rates(table)
+                if table_rates is not None:
+                    rates[table] = table_rates
+            self._engine = FrequencyEngine(rates)
+        if changes.substances:
+            self._substances = self.substances.load_columns()
+
+        recalculated = {}
+        changed_substances = np.fromiter(changes.substances, dtype=np.int64, count=len(changes.substances))
+        for table, batch in self.batches.items():
+            affected = np.fromiter(changes.equipment.get(table, ()), dtype=np.int64)
+            if len(changed_substances):
+                uses_changed = np.isin(batch['sub_id'], changed_substances)
+                affected = np.union1d(affected, batch.ids[uses_changed])
+            if len(affected):
+                self._merge(table, np.unique(affected))
+                recalculated[table] = len(affected)
+            if table in changes.failure_rates and not self._update_frequencies(table):
+                self._merge(table, self.batches[table].ids)
+                recalculated[table] = len(self.batches[table])
+
+        self._acknowledge(changes.revision)
+        return recalculated
+
+    def _merge(self, table: str, affected: np.ndarray) -> None:
+        """Замена выборки и результатов затронутого оборудования пересчитанными"""
+        delta = self._repositories[table].load_columns(equipment_ids=affected.tolist())
+        delta.substance = self._substances.take(delta['sub_id'])
+        if len(delta) == len(affected) and self._assign(table, delta):
+            return
+
+        batch = self.batches[table]
+        self.batches[table] = ColumnBatch.concat([batch.select(~np.isin(batch.ids, affected)), delta])
+
+        results = self.results[table]
+        kept = results.select(~np.isin(results.scenarios.equipment_ids, affected))
+        results = HazardResults.concat([kept, self._calculate(delta)])
+        scenarios = results.scenarios
+        self.results[table] = results.select(np.lexsort((scenarios.type_ids, scenarios.equipment_ids)))
+
+    def _assign(self, table: str, delta: ColumnBatch) -> bool:
+        """Запись пересчитанных строк на место прежних, если состав оборудования и сценариев не изменился.
+
+        Изменение полей объектов не требует копирования массивов всей таблицы.
+        """
+        batch = self.batches[table]
+        rows = _positions(batch.ids, delta.ids)
+        if rows is None:
+            return False
+        results = self.results[table]
+        update = self._calculate(delta)
+        scenario_rows = _positions(_scenario_keys(results), _scenario_keys(update))
+        # Число видов разгерметизации на единицу оборудования тоже должно совпасть
+        if scenario_rows is None or len(update) * len(batch) != len(results) * len(delta):
+            return False
+
+        _assign_batch(batch, rows, delta)
+        results.assign(scenario_rows, update)
+        return True
+
+    def _update_frequencies(self, table: str) -> bool:
+        """Новые частоты сценариев таблицы; False, если изменился состав видов разгерметизации"""
+        # Строки результатов совпадают со сценариями выборки: оборудование по ключу x виды разгерметизации
+        results = self.results[table]
+        frequency = self._engine.frequencies(self.batches[table]).ravel()
+        if len(frequency) != len(results):
+            return False
+        self.results[table] = replace(results, scenarios=replace(results.scenarios, frequency=frequency))
+        return True
+
+    def site_results(self, tables: Optional[Iterable[str]] = None) -> HazardResults:
+        """Результаты нескольких (по умолчанию всех) таблиц оборудования одной таблицей"""
+        tables = self.results if tables is None else tables
+        return HazardResults.concat([self.results[table] for table in tables])
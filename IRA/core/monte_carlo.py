@@ -0,0 +1,313 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from IRA.core.calculator import EQUIPMENT_COLUMNS, SUBSTANCE_COLUMNS, HazardCalculator, HazardParameters, hazard_kernel
+from IRA.domain.models.columns import ColumnBatch, ScenarioTable
+
+PERCENTILES = (5.0, 50.0, 95.0)
+
+# Показатели оборудования в каждой реализации:
+# frequency - суммарная частота сценариев, 1/год; fire_radius, explosion_radius - наибольшие
+# по сценариям радиусы зон на выбранных порогах, м; risk - ожидаемая площадь зоны
+# поражения в год: сумма frequency · π·r² по сценариям, м²/год
+METRICS = ('frequency', 'fire_radius', 'explosion_radius', 'risk')
+
+# Параметры, для которых можно задать распределение: входы ядра расчета и частота сценария
+UNCERTAIN_PARAMETERS = EQUIPMENT_COLUMNS + SUBSTANCE_COLUMNS + ('frequency',)
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Распределение неопределенного параметра относительно номинального значения оборудования.
+
+    relative=True - значение умножается на случайный множитель, иначе к нему
+    прибавляется случайное смещение; результат ограничивается [low, high].
+    """
+    kind: str
+    a: float
+    b: float = 0.0
+    relative: bool = True
+    low: float = -math.inf
+    high: float = math.inf
+
+    @staticmethod
+    def normal(sd: float, relative: bool = True, low: float = -math.inf, high: float = math.inf) -> 'Distribution':
+        """Нормальное: множитель N(1, sd) или смещение N(0, sd)"""
+        return Distribution('normal', sd, relative=relative, low=low, high=high)
+
+    @staticmethod
+    def uniform(a: float, b: float, relative: bool = True, low: float = -math.inf,
+                high: float = math.inf) -> 'Distribution':
+        """Равномерное: множитель или смещение из [a, b]"""
+        return Distribution('uniform', a, b, relative, low, high)
+
+    @staticmethod
+    def triangular(a: float, b: float, relative: bool = True, low: float = -math.inf,
+                   high: float = math.inf) -> 'Distribution':
+        """Треугольное на [a, b] с модой в номинальном значении (множитель 1 или смещение 0)"""
+        return Distribution('triangular', a, b, relative, low, high)
+
+    @staticmethod
+    def lognormal(error_factor: float, low: float = -math.inf, high: float = math.inf) -> 'Distribution':
+        """Логнормальный множитель с медианой 1 и фактором ошибки EF = x95 / x50 (для частот отказов)"""
+        return Distribution('lognormal', error_factor, low=low, high=high)
+
+    def draw(self, rng: np.random.Generator, shape: Tuple[int, ...]) -> np.ndarray:
+        """Случайные множители (смещения)"""
+        center = 1.0 if self.relative else 0.0
+        if self.kind == 'normal':
+            return rng.normal(center, self.a, shape)
+        if self.kind == 'uniform':
+            return rng.uniform(self.a, self.b, shape)
+        if self.kind == 'triangular':
+            return rng.triangular(self.a, center, self.b, shape)
+        if self.kind == 'lognormal':
+            return rng.lognormal(0.0, math.log(self.a) / 1.645, shape)
+        raise ValueError(f"Unknown distribution: {self.kind}")
+
+    def apply(self, nominal: np.ndarray, draws: np.ndarray) -> np.ndarray:
+        values = nominal * draws if self.relative else nominal + draws
+        return np.clip(values, self.low, self.high)
+
+
+@dataclass
+class UncertaintyResult:
+    """Перцентили показателей METRICS по оборудованию и выборка риска по группам.
+
+    bands[metric] - матрица [оборудование, перцентиль]; group_samples[g, s] -
+    суммарный risk оборудования группы group_labels[g] в реализации s.
+    """
+    table: str
+    equipment_ids: np.ndarray
+    percentiles: Tuple[float, ...]
+    samples: int
+    bands: Dict[str, np.ndarray]
+    group_labels: Tuple[str, ...]
+    group_samples: np.ndarray
+
+    def group_bands(self) -> Dict[str, np.ndarray]:
+        """Перцентили суммарного риска по группам (составляющим предприятия)"""
+        return group_bands([self])
+
+
+def group_bands(results: Sequence[UncertaintyResult]) -> Dict[str, np.ndarray]:
+    """Перцентили риска групп по нескольким таблицам оборудования.
+
+    Реализации с одинаковым номером суммируются, поэтому у результатов должно быть одно число реализаций.
+    """
+    if len({r.samples for r in results}) > 1:
+        raise ValueError("Results have different numbers of samples")
+    totals: Dict[str, np.ndarray] = {}
+    for result in results:
+        for label, samples in zip(result.group_labels, result.group_samples):
+            totals[label] = totals[label] + samples if label in totals else samples.copy()
+    percentiles = results[0].percentiles if results else PERCENTILES
+    return {label: np.percentile(samples, percentiles) for label, samples in sorted(totals.items())}
+
+
+# Описание массива в разделяемой памяти: (имя блока, форма, тип)
+_ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+
+class _SharedArrays:
+    """Массивы в multiprocessing.shared_memory: процессы подключаются к ним по имени без копирования"""
+
+    def __init__(self):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.specs: Dict[str, _ArraySpec] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+
+    def create(self, name: str, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._blocks.append(block)
+        self.arrays[name] = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        self.arrays[name][...] = array
+        self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        # Представления numpy удерживают буфер и освобождаются до закрытия блоков
+        self.arrays.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+
+def _attach(specs: Mapping[str, _ArraySpec]) -> Tuple[Dict[str, np.ndarray], List[shared_memory.SharedMemory]]:
+    blocks = []
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+@dataclass(frozen=True)
+class _Task:
+    """Задание процесса: диапазон блоков оборудования и описание разделяемых массивов"""
+    slot: int
+    blocks: range
+    specs: Dict[str, _ArraySpec]
+    distributions: Dict[str, Distribution]
+    params: HazardParameters
+    samples: int
+    percentiles: Tuple[float, ...]
+    equipment_per_block: int
+    block_size: int
+    fire_level: int
+    explosion_level: int
+    seed: int
+
+
+def _simulate(task: _Task) -> None:
+    arrays, blocks = _attach(task.specs)
+    try:
+        for block in task.blocks:
+            _simulate_block(task, arrays, block)
+    finally:
+        arrays.clear()
+        for shm in blocks:
+            shm.close()
+
+
+def _simulate_block(task: _Task, arrays: Dict[str, np.ndarray], block: int) -> None:
+    equipment_rows = arrays['equipment_rows']
+    n_equipment = len(arrays['bands'])
+    first = block * task.equipment_per_block
+    last = min(first + task.equipment_per_block, n_equipment)
+    start, stop = np.searchsorted(equipment_rows, [first, last])
+    local = equipment_rows[start:stop] - first
+    # Номер реализации не зависит от числа процессов: генератор задается номером блока
+    rng = np.random.default_rng(np.random.SeedSequence(task.seed, spawn_key=(block,)))
+    draws = {name: dist.draw(rng, (task.samples, last - first)) for name, dist in task.distributions.items()}
+
+    metrics = {name: np.zeros((task.samples, last - first)) for name in METRICS}
+    present, starts = np.unique(local, return_index=True)
+    step = max(1, task.block_size // max(stop - start, 1))
+    for s0 in range(0, task.samples, step):
+        s1 = min(s0 + step, task.samples)
+        values = {}
+        for name in ('type_id', 'frequency', *EQUIPMENT_COLUMNS, *SUBSTANCE_COLUMNS):
+            nominal = arrays[name][start:stop]
+            if name in draws:
+                values[name] = task.distributions[name].apply(nominal, draws[name][s0:s1][:, local])
+            else:
+                values[name] = np.broadcast_to(nominal, (s1 - s0, stop - start))
+
+        flat = {name: np.ravel(value) for name, value in values.items() if name != 'frequency'}
+        result = hazard_kernel(flat, task.params)
+        shape = (s1 - s0, stop - start)
+        fire = result['fire_radius'][:, task.fire_level].reshape(shape)
+        explosion = result['explosion_radius'][:, task.explosion_level].reshape(shape)
+        frequency = np.nan_to_num(values['frequency'])
+        area = np.pi * np.nan_to_num(np.fmax(fire, explosion)) ** 2
+
+        if len(present):
+            rows = slice(s0, s1)
+            metrics['frequency'][rows, present] = np.add.reduceat(frequency, starts, axis=1)
+            metrics['fire_radius'][rows, present] = np.nan_to_num(np.fmax.reduceat(fire, starts, axis=1))
+            metrics['explosion_radius'][rows, present] = np.nan_to_num(np.fmax.reduceat(explosion, starts, axis=1))
+            metrics['risk'][rows, present] = np.add.reduceat(frequency * area, starts, axis=1)
+
+    bands = arrays['bands']
+    for i, name in enumerate(METRICS):
+        bands[first:last, i, :] = np.percentile(metrics[name], task.percentiles, axis=0).T
+    groups = arrays.get('group_samples')
+    if groups is not None:
+        np.add.at(groups[task.slot], arrays['group_codes'][first:last], metrics['risk'].T)
+
+
+class MonteCarloSimulation:
+    """Распространение неопределенности входных данных методом Монте-Карло.
+
+    Для каждой единицы оборудования разыгрываются значения параметров с
+    распределениями distributions, сценарии считаются ядром hazard_kernel
+    векторными блоками. Оборудование делится на блоки по equipment_per_block
+    так, чтобы матрицы [реализация, оборудование] и один вызов ядра занимали
+    не больше block_size элементов; блоки распределяются по процессам, которые
+    читают входные массивы и пишут результаты через multiprocessing.shared_memory.
+    """
+
+    def __init__(self, distributions: Mapping[str, Distribution], samples: int = 1000,
+                 params: Optional[HazardParameters] = None, percentiles: Sequence[float] = PERCENTILES,
+                 fire_level: int = 0, explosion_level: int = 0, block_size: int = 200000,
+                 max_workers: Optional[int] = None, seed: int = 0):
+        unknown = set(distributions) - set(UNCERTAIN_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parameters {', '.join(sorted(unknown))} are not used by the hazard model; "
+                             f"supported: {', '.join(UNCERTAIN_PARAMETERS)}")
+        if samples < 1 or block_size < 1:
+            raise ValueError("samples and block_size must be positive")
+
+        self.distributions = dict(distributions)
+        self.samples = samples
+        self.params = params or HazardParameters()
+        self.percentiles = tuple(percentiles)
+        self.fire_level = fire_level
+        self.explosion_level = explosion_level
+        self.block_size = block_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = seed
+
+    def run(self, batch: ColumnBatch, scenarios: ScenarioTable,
+            groups: Optional[Sequence[str]] = None) -> UncertaintyResult:
+        """Расчет перцентилей для оборудования пакета (с веществами).
+
+        groups - метки групп (например component_enterprise), выровненные по строкам пакета.
+        """
+        if groups is not None and len(groups) != len(batch):
+            raise ValueError("groups must be aligned with the equipment batch")
+
+        scenarios, inputs = HazardCalculator(self.params).prepare_inputs(batch, scenarios)
+        equipment_rows = np.searchsorted(batch.ids, scenarios.equipment_ids)
+        order = np.argsort(equipment_rows, kind='stable')
+
+        group_labels: Tuple[str, ...] = ()
+        equipment_per_block = max(1, self.block_size // self.samples)
+        n_blocks = -(-len(batch) // equipment_per_block)
+        n_tasks = max(1, min(self.max_workers, n_blocks))
+
+        shared = _SharedArrays()
+        try:
+            shared.create('equipment_rows', equipment_rows[order])
+            shared.create('frequency', scenarios.frequency[order])
+            for name, column in inputs.items():
+                shared.create(name, column[order])
+            shared.create('bands', np.full((len(batch), len(METRICS), len(self.percentiles)), np.nan))
+            if groups is not None:
+                labels, codes = np.unique(np.asarray(groups, dtype=str), return_inverse=True)
+                group_labels = tuple(labels.tolist())
+                shared.create('group_codes', codes.astype(np.int64))
+                shared.create('group_samples', np.zeros((n_tasks, len(labels), self.samples)))
+
+            per_task = -(-n_blocks // n_tasks)
+            tasks = [_Task(slot, range(slot * per_task, min((slot + 1) * per_task, n_blocks)), shared.specs,
+                           self.distributions, self.params, self.samples, self.percentiles, equipment_per_block,
+                           self.block_size, self.fire_level, self.explosion_level, self.seed)
+                     for slot in range(n_tasks)]
+            if n_tasks == 1:
+                _simulate(tasks[0])
+            else:
+                with ProcessPoolExecutor(max_workers=n_tasks) as executor:
+                    list(executor.map(_simulate, tasks))
+
+            return UncertaintyResult(
+                table=batch.table,
+                equipment_ids=batch.ids.copy(),
+                percentiles=self.percentiles,
+                samples=self.samples,
+                bands={name: shared.arrays['bands'][:, i, :].copy() for i, name in enumerate(METRICS)},
+                group_labels=group_labels,
+                group_samples=(shared.arrays['group_samples'].sum(axis=0) if groups is not None
+                               else np.empty((0, self.samples))),
+            )
+        finally:
+            shared.close()
@@ -0,0 +1,372 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from IRA.core.calculator import HazardResults
+from IRA.domain.models.columns import ColumnBatch
+
+EARTH_RADIUS_M = 6371008.8
+
+# Ключ плитки в кэше: (пространство имен, ревизия, масштаб, tx, ty)
+TileKey = Tuple[str, int, int, int, int]
+
+
+@dataclass(frozen=True)
+class RiskFieldParameters:
+    """Параметры расчета поля индивидуального риска.
+
+    Вероятность гибели в зоне поражения задается ступенчато по порогам
+    HazardParameters: fire_lethality - по heat_flux_thresholds, explosion_lethality -
+    по overpressure_thresholds (от сильного воздействия к слабому).
+    """
+    fire_lethality: Tuple[float, ...] = (1.0, 0.5, 0.15, 0.0)
+    explosion_lethality: Tuple[float, ...] = (1.0, 0.9, 0.5, 0.1, 0.0, 0.0)
+    fire_probability: float = 0.9  # условная вероятность пожара пролива
+    explosion_probability: float = 0.1  # условная вероятность взрыва облака
+
+
+@dataclass
+class _Sources:
+    """Источники риска - сценарии с координатами, упорядоченные по x.
+
+    radii2 - квадраты радиусов зон [сценарий, зона], weights - приращение частоты
+    гибели при попадании в зону, 1/год; cutoff - наибольший радиус с ненулевым весом.
+    """
+    keys: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    radii2: np.ndarray
+    weights: np.ndarray
+    cutoff: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def records(self) -> np.ndarray:
+        return np.column_stack([self.keys, self.x, self.y, self.radii2, self.weights])
+
+
+def _zone_weights(lethality: Tuple[float, ...]) -> np.ndarray:
+    """Приращения вероятности гибели по вложенным зонам: сумма по зонам, содержащим точку, дает ее ступень"""
+    levels = np.append(np.asarray(lethality, dtype=np.float64), 0.0)
+    return levels[:-1] - levels[1:]
+
+
+def _tile_risk(x: np.ndarray, y: np.ndarray, radii2: np.ndarray, weights: np.ndarray, cutoff: np.ndarray,
+               min_x: float, max_y: float, cell: float, size: int, chunk_size: int) -> np.ndarray:
+    """Сумма вкладов сценариев в ячейки плитки [строка с севера на юг, столбец с запада на восток].
+
+    Каждый сценарий считается только в квадратном окне ячеек вокруг себя, покрывающем
+    его наибольшую зону; сценарии группируются по размеру окна, и вклады группы
+    вычисляются одним массивом [сценарий, строка окна, столбец окна].
+    """
+    risk = np.zeros(size * size)
+    half = np.ceil(cutoff / cell).astype(np.int64)
+    # Половина окна округляется вверх с шагом в четверть ближайшей снизу степени двойки, чтобы групп было немного
+    step = np.maximum(np.left_shift(1, np.floor(np.log2(np.maximum(half, 1))).astype(np.int64)) // 4, 1)
+    bucket = -(-half // step) * step
+    for width in np.unique(bucket):
+        members = np.flatnonzero(bucket == width)
+        offsets = np.arange(-width, width + 1)
+        chunk = max(1, chunk_size // (len(offsets) ** 2))
+        for start in range(0, len(members), chunk):
+            rows = members[start:start + chunk]
+            cols = np.floor((x[rows] - min_x) / cell).astype(np.int64)[:, None] + offsets
+            lines = np.floor((max_y - y[rows]) / cell).astype(np.int64)[:, None] + offsets
+            dx2 = (min_x + (cols + 0.5) * cell - x[rows, None]) ** 2
+            dy2 = (max_y - (lines + 0.5) * cell - y[rows, None]) ** 2
+            d2 = dy2[:, :, None] + dx2[:, None, :]
+            value = np.zeros(d2.shape)
+            for zone in np.flatnonzero(weights[rows].any(axis=0)):
+                value += np.where(d2 <= radii2[rows, zone, None, None], weights[rows, zone, None, None], 0.0)
+            inside = ((lines >= 0) & (lines < size))[:, :, None] & ((cols >= 0) & (cols < size))[:, None, :]
+            inside &= value > 0
+            cells = (lines[:, :, None] * size + cols[:, None, :])[inside]
+            risk += np.bincount(cells, value[inside], minlength=size * size)
+    return risk.reshape(size, size)
+
+
+class TileCache:
+    """LRU-кэш плиток поля риска в памяти с необязательным каталогом на диске.
+
+    Вытесненные из памяти плитки остаются в каталоге (<directory>/<пространство имен>/
+    <ревизия>_<масштаб>_<tx>_<ty>.npy) и читаются при следующем обращении.
+    """
+
+    def __init__(self, maxsize: int = 512, directory: Optional[str] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.directory = directory
+        self._tiles: 'OrderedDict[TileKey, np.ndarray]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, key: TileKey) -> str:
+        namespace, *numbers = key
+        return os.path.join(self.directory, namespace, '_'.join(map(str, numbers)) + '.npy')
+
+    def _remember(self, key: TileKey, tile: np.ndarray) -> None:
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.maxsize:
+            self._tiles.popitem(last=False)
+
+    def get(self, key: TileKey) -> Optional[np.ndarray]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                return tile
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            tile = np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+        tile.flags.writeable = False
+        with self._lock:
+            self._remember(key, tile)
+        return tile
+
+    def put(self, key: TileKey, tile: np.ndarray) -> None:
+        tile.flags.writeable = False
+        with self._lock:
+            self._remember(key, tile)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                np.save(file, tile)
+            os.replace(tmp_path, path)
+
+    def _disk_keys(self, namespace: str) -> List[TileKey]:
+        if self.directory is None or not os.path.isdir(os.path.join(self.directory, namespace)):
+            return []
+        keys = []
+        for name in os.listdir(os.path.join(self.directory, namespace)):
+            stem, ext = os.path.splitext(name)
+            try:
+                revision, zoom, tx, ty = map(int, stem.split('_'))
+            except ValueError:
+                continue
+            if ext == '.npy':
+                keys.append((namespace, revision, zoom, tx, ty))
+        return keys
+
+    def remap(self, namespace: str, mapping: Callable[[TileKey], Optional[TileKey]]) -> int:
+        """Перенос плиток пространства имен на новые ключи; mapping возвращает None для удаляемых.
+
+        Возвращает число удаленных плиток.
+        """
+        removed = 0
+        with self._lock:
+            keys = set(key for key in self._tiles if key[0] == namespace) | set(self._disk_keys(namespace))
+            for key in keys:
+                new_key = mapping(key)
+                if new_key == key:
+                    continue
+                tile = self._tiles.pop(key, None)
+                if new_key is not None and tile is not None:
+                    self._tiles[new_key] = tile
+                if self.directory is not None and os.path.exists(self._path(key)):
+                    if new_key is None:
+                        os.remove(self._path(key))
+                    else:
+                        os.replace(self._path(key), self._path(new_key))
+                removed += new_key is None
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+class RiskField:
+    """Поле индивидуального риска площадки, рассчитываемое плитками для карты.
+
+    Площадка проецируется на локальную плоскость (м) вокруг origin; плитка
+    масштаба zoom - квадрат tile_size x tile_size ячеек размером cell_size·2^zoom м.
+    Риск ячейки - сумма по сценариям частоты, умноженной на вероятность гибели
+    в зоне поражения, содержащей центр ячейки, 1/год. В плитку попадают только
+    сценарии, наибольшая зона которых достигает ее границ (отбор по отсортированной
+    координате x и расстоянию до прямоугольника плитки); недостающие плитки
+    считаются параллельно. Готовые плитки хранятся в TileCache с ключом по ревизии
+    проекта, а update() переносит на новую ревизию плитки, которых изменения не коснулись.
+    """
+
+    def __init__(self, batches: Dict[str, ColumnBatch], results: Dict[str, HazardResults], revision: int,
+                 params: Optional[RiskFieldParameters] = None, cell_size: float = 5.0, tile_size: int = 256,
+                 cache: Optional[TileCache] = None, max_workers: Optional[int] = None,
+                 origin: Optional[Tuple[float, float]] = None, chunk_size: int = 1 << 20):
+        if cell_size <= 0 or tile_size < 1:
+            raise ValueError("cell_size and tile_size must be positive")
+        self.params = params or RiskFieldParameters()
+        self.cell_size = cell_size
+        self.tile_size = tile_size
+        self.cache = cache if cache is not None else TileCache()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Число элементов массива расстояний [сценарий, окно] в одном проходе
+        self.chunk_size = chunk_size
+        self.revision = revision
+        self.origin = origin
+        self._sources = self._collect(batches, results)
+        fingerprint = repr((self.params, self.cell_size, self.tile_size, self.origin)).encode()
+        self.namespace = hashlib.sha1(fingerprint).hexdigest()[:16]
+
+    @classmethod
+    def from_calculator(cls, calculator, **kwargs) -> 'RiskField':
+        """Поле риска по результатам IncrementalRiskCalculator (после calculate())"""
+        return cls(calculator.batches, calculator.results, calculator.revision, **kwargs)
+
+    def to_local(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Координаты на локальной плоскости, м (x - на восток, y - на север)"""
+        lat0, lon0 = self.origin
+        scale = math.radians(1.0) * EARTH_RADIUS_M
+        return (np.asarray(lon) - lon0) * scale * math.cos(math.radians(lat0)), (np.asarray(lat) - lat0) * scale
+
+    def _collect(self, batches: Dict[str, ColumnBatch], results: Dict[str, HazardResults]) -> _Sources:
+        fire_weights = _zone_weights(self.params.fire_lethality) * self.params.fire_probability
+        explosion_weights = _zone_weights(self.params.explosion_lethality) * self.params.explosion_probability
+        parts = []
+        for code, (table, table_results) in enumerate(sorted(results.items())):
+            batch = batches[table]
+            if table_results.fire_radius.shape[1] != len(fire_weights) or \
+                    table_results.explosion_radius.shape[1] != len(explosion_weights):
+                raise ValueError("Lethality levels must match the hazard thresholds")
+            scenarios = table_results.scenarios
+            rows = np.searchsorted(batch.ids, scenarios.equipment_ids)
+            frequency = np.nan_to_num(scenarios.frequency)
+            parts.append((
+                np.column_stack([np.full(len(rows), code), scenarios.equipment_ids, scenarios.type_ids]),
+                batch['lat'][rows], batch['lon'][rows],
+                np.nan_to_num(np.hstack([table_results.fire_radius, table_results.explosion_radius])),
+                frequency[:, None] * np.concatenate([fire_weights, explosion_weights])[None, :],
+            ))
+        if parts:
+            keys, lat, lon, radii, weights = (np.concatenate(arrays) for arrays in zip(*parts))
+        else:
+            keys, lat, lon, radii, weights = np.empty((0, 3)), np.empty(0), np.empty(0), np.empty((0, 0)), \
+                np.empty((0, 0))
+
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        if self.origin is None:
+            # Начало координат фиксируется при первом построении: сетка плиток не зависит от правок
+            self.origin = (round(float(lat[located].mean()), 4), round(float(lon[located].mean()), 4)) \
+                if located.any() else (0.0, 0.0)
+        x, y = self.to_local(lat, lon)
+        radii = np.where(weights > 0, radii, 0.0)
+        keep = located & (radii > 0).any(axis=1)
+        order = np.argsort(x[keep], kind='stable')
+        radii = radii[keep][order]
+        return _Sources(keys[keep][order], x[keep][order], y[keep][order], radii ** 2,
+                        weights[keep][order], radii.max(axis=1, initial=0.0))
+
+    def update(self, batches: Dict[str, ColumnBatch], results: Dict[str, HazardResults], revision: int) -> int:
+        """Переход к новой ревизии проекта; возвращает число сброшенных плиток.
+
+        Сравниваются сценарии до и после: плитки, которых не достигают зоны
+        добавленных, удаленных и измененных сценариев, переносятся в кэше на новую ревизию.
+        """
+        old, new = self._sources, self._collect(batches, results)
+        if old.radii2.shape[1:] == new.radii2.shape[1:]:
+            # Строка, встречающаяся один раз в объединении, есть только в одной из ревизий
+            records, counts = np.unique(np.vstack([old.records(), new.records()]), axis=0, return_counts=True)
+            changed = records[counts == 1]
+            zones = old.radii2.shape[1]
+            dirty_x, dirty_y = changed[:, 3], changed[:, 4]
+            dirty_cutoff = np.sqrt(changed[:, 5:5 + zones].max(axis=1, initial=0.0))
+        else:
+            dirty_x = None
+
+        old_revision = self.revision
+
+        def promote(key: TileKey) -> Optional[TileKey]:
+            if key[1] != old_revision:
+                return key
+            if dirty_x is None:
+                return None
+            min_x, min_y, max_x, max_y = self.tile_bounds(key[2], key[3], key[4])
+            dx = np.maximum(np.maximum(min_x - dirty_x, dirty_x - max_x), 0.0)
+            dy = np.maximum(np.maximum(min_y - dirty_y, dirty_y - max_y), 0.0)
+            if (dx ** 2 + dy ** 2 <= dirty_cutoff ** 2).any():
+                return None
+            return (key[0], revision, key[2], key[3], key[4])
+
+        self._sources = new
+        self.revision = revision
+        return self.cache.remap(self.namespace, promote)
+
+    def update_from(self, calculator) -> int:
+        """update() по результатам IncrementalRiskCalculator после refresh()"""
+        return self.update(calculator.batches, calculator.results, calculator.revision)
+
+    def tile_bounds(self, zoom: int, tx: int, ty: int) -> Tuple[float, float, float, float]:
+        """Границы плитки на локальной плоскости (min_x, min_y, max_x, max_y), м"""
+        span = self.cell_size * 2 ** zoom * self.tile_size
+        return tx * span, ty * span, (tx + 1) * span, (ty + 1) * span
+
+    def tiles_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                      zoom: int) -> List[Tuple[int, int]]:
+        """Плитки (tx, ty), покрывающие прямоугольник карты"""
+        (min_x, max_x), (min_y, max_y) = self.to_local(np.array([min_lat, max_lat]), np.array([min_lon, max_lon]))
+        span = self.cell_size * 2 ** zoom * self.tile_size
+        return [(tx, ty)
+                for ty in range(math.floor(min_y / span), math.floor(max_y / span) + 1)
+                for tx in range(math.floor(min_x / span), math.floor(max_x / span) + 1)]
+
+    def _compute(self, sources: _Sources, zoom: int, tx: int, ty: int) -> np.ndarray:
+        min_x, min_y, max_x, max_y = self.tile_bounds(zoom, tx, ty)
+        reach = sources.cutoff.max(initial=0.0)
+        start, stop = np.searchsorted(sources.x, [min_x - reach, max_x + reach])
+        x, y, cutoff = sources.x[start:stop], sources.y[start:stop], sources.cutoff[start:stop]
+        dx = np.maximum(np.maximum(min_x - x, x - max_x), 0.0)
+        dy = np.maximum(np.maximum(min_y - y, y - max_y), 0.0)
+        rows = start + np.flatnonzero(dx ** 2 + dy ** 2 <= cutoff ** 2)
+
+        return _tile_risk(sources.x[rows], sources.y[rows], sources.radii2[rows], sources.weights[rows],
+                          sources.cutoff[rows], min_x, max_y, self.cell_size * 2 ** zoom, self.tile_size,
+                          self.chunk_size)
+
+    def tile(self, zoom: int, tx: int, ty: int) -> np.ndarray:
+        """Плитка риска [строка с севера на юг, столбец с запада на восток], 1/год; только для чтения"""
+        return self.tiles(zoom, [(tx, ty)])[(tx, ty)]
+
+    def tiles(self, zoom: int, coordinates: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], np.ndarray]:
+        """Плитки масштаба zoom: из кэша, а недостающие - параллельным расчетом"""
+        sources, revision = self._sources, self.revision
+        tiles, missing = {}, []
+        for tx, ty in dict.fromkeys(coordinates):
+            tile = self.cache.get((self.namespace, revision, zoom, tx, ty))
+            if tile is None:
+                missing.append((tx, ty))
+            else:
+                tiles[(tx, ty)] = tile
+
+        # Ядро - операции NumPy над крупными массивами (без GIL), поэтому источники не копируются в процессы
+        if self.max_workers == 1 or len(missing) <= 1:
+            computed = [self._compute(sources, zoom, tx, ty) for tx, ty in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                computed = list(executor.map(lambda key: self._compute(sources, zoom, *key), missing))
+        for key, tile in zip(missing, computed):
+            # Плитка, рассчитанная по устаревшим источникам, в кэш не попадает
+            if self._sources is sources:
+                self.cache.put((self.namespace, revision, zoom) + key, tile)
+            tiles[key] = tile
+        return tiles
+
+    def render(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+               zoom: int) -> Dict[Tuple[int, int], np.ndarray]:
+        """Плитки, покрывающие видимую область карты"""
+        return self.tiles(zoom, self.tiles_in_bbox(min_lat, min_lon, max_lat, max_lon, zoom))
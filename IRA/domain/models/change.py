@@ -0,0 +1,20 @@
+from dataclasses import dataclass, field
+from typing import Dict, Set
+
+
+@dataclass
+class ChangeSet:
+    """Изменения данных проекта после некоторой ревизии журнала изменений.
+
+    revision - номер последнего учтенного изменения; equipment - ключи
+    добавленного, измененного или удаленного оборудования по таблицам;
+    substances - ID веществ; failure_rates - таблицы оборудования,
+    справочники частот которых изменились.
+    """
+    revision: int
+    equipment: Dict[str, Set[int]] = field(default_factory=dict)
+    substances: Set[int] = field(default_factory=set)
+    failure_rates: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.equipment or self.substances or self.failure_rates)
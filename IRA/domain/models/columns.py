@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Значение целочисленной колонки, для которой в БД нет данных (NULL или нет строки)
+MISSING_INT = -1
+
+
+@dataclass
+class ColumnBatch:
+    """Столбцовое представление таблицы (struct-of-arrays) для векторных расчетов.
+
+    ids и columns выровнены по строкам и отсортированы по ключу. Вещественные
+    колонки - float64 (NULL -> NaN), целочисленные - int64 (NULL -> MISSING_INT).
+    Тип оборудования хранится кодами type_codes - индексами в type_labels
+    (-1 для значений вне справочника). substance - свойства веществ,
+    выровненные по строкам этой выборки по sub_id.
+    """
+    table: str
+    ids: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    type_codes: Optional[np.ndarray] = None
+    type_labels: Tuple[str, ...] = ()
+    substance: Optional['ColumnBatch'] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def get(self, name: str, default: float = np.nan) -> np.ndarray:
+        """Колонка по имени; для отсутствующей в таблице колонки - массив default"""
+        column = self.columns.get(name)
+        if column is None:
+            return np.full(len(self.ids), default, dtype=np.float64)
+        return column
+
+    def select(self, rows: Union[np.ndarray, slice]) -> 'ColumnBatch':
+        """Подвыборка строк по маске, индексам или срезу"""
+        return ColumnBatch(
+            table=self.table,
+            ids=self.ids[rows],
+            columns={name: column[rows] for name, column in self.columns.items()},
+            type_codes=None if self.type_codes is None else self.type_codes[rows],
+            type_labels=self.type_labels,
+            substance=None if self.substance is None else self.substance.select(rows),
+        )
+
+    def take(self, ids: np.ndarray) -> 'ColumnBatch':
+        """Строки с указанными ключами в порядке ids; для отсутствующих ключей - NaN/MISSING_INT"""
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions >= len(self.ids)] = 0
+        found = (self.ids[positions] == ids) if len(self.ids) else np.zeros(len(ids), dtype=bool)
+
+        def gather(column: np.ndarray) -> np.ndarray:
+            if not len(column):
+                fill = np.nan if column.dtype.kind == 'f' else MISSING_INT
+                return np.full(len(ids), fill, dtype=column.dtype)
+            result = column[positions]
+            result[~found] = np.nan if column.dtype.kind == 'f' else MISSING_INT
+            return result
+
+        return ColumnBatch(
+            table=self.table,
+            ids=np.where(found, ids, MISSING_INT),
+            columns={name: gather(column) for name, column in self.columns.items()},
+            type_codes=None if self.type_codes is None else gather(self.type_codes),
+            type_labels=self.type_labels,
+        )
+
+    @staticmethod
+    def _stack(batches: Sequence['ColumnBatch']) -> 'ColumnBatch':
+        """Строки выборок подряд, без упорядочивания (substance выровнены по строкам, а не по своему ключу)"""
+        first = batches[0]
+        substance = None
+        if all(b.substance is not None for b in batches):
+            substance = ColumnBatch._stack([b.substance for b in batches])
+        return ColumnBatch(
+            table=first.table,
+            ids=np.concatenate([b.ids for b in batches]),
+            columns={name: np.concatenate([b.columns[name] for b in batches]) for name in first.columns},
+            type_codes=None if first.type_codes is None else np.concatenate([b.type_codes for b in batches]),
+            type_labels=first.type_labels,
+            substance=substance,
+        )
+
+    @staticmethod
+    def concat(batches: Sequence['ColumnBatch']) -> 'ColumnBatch':
+        """Объединение выборок одной таблицы; строки упорядочиваются по ключу, повтор ключа - ошибка"""
+        if not batches:
+            raise ValueError("Nothing to concatenate")
+        first = batches[0]
+        if any(b.table != first.table or b.type_labels != first.type_labels for b in batches):
+            raise ValueError("Batches of different tables cannot be concatenated")
+
+        batch = ColumnBatch._stack(batches)
+        order = np.argsort(batch.ids, kind='stable')
+        ids = batch.ids[order]
+        if np.any(ids[1:] == ids[:-1]):
+            raise ValueError(f"Duplicate {first.table} ids in concatenated batches")
+        if np.all(order[1:] > order[:-1]):
+            return batch
+        return batch.select(order)
+
+    def type_label_array(self) -> np.ndarray:
+        """Типы оборудования строками (для отчетов; расчеты используют type_codes)"""
+        labels = np.array(self.type_labels + ('',), dtype=object)
+        return labels[self.type_codes]
+
+
+@dataclass
+class ScenarioTable:
+    """Столбцовая таблица сценариев: строка - оборудование и вид разгерметизации.
+
+    Оборудование разных таблиц различается кодами table_codes - индексами в table_labels.
+    frequency - частота сценария, 1/год (NaN, если в справочнике нет значения).
+    """
+    table_codes: np.ndarray
+    table_labels: Tuple[str, ...]
+    equipment_ids: np.ndarray
+    type_ids: np.ndarray
+    frequency: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.equipment_ids)
+
+    def select(self, rows: Union[np.ndarray, slice]) -> 'ScenarioTable':
+        """Подвыборка сценариев по маске, индексам или срезу"""
+        return ScenarioTable(
+            table_codes=self.table_codes[rows],
+            table_labels=self.table_labels,
+            equipment_ids=self.equipment_ids[rows],
+            type_ids=self.type_ids[rows],
+            frequency=self.frequency[rows],
+        )
+
+    def for_table(self, table: str) -> 'ScenarioTable':
+        """Сценарии оборудования одной таблицы"""
+        if table not in self.table_labels:
+            return self.select(np.zeros(len(self), dtype=bool))
+        return self.select(self.table_codes == self.table_labels.index(table))
+
+    @staticmethod
+    def concat(tables: Sequence['ScenarioTable']) -> 'ScenarioTable':
+        """Объединение таблиц сценариев с общим справочником table_labels"""
+        if not tables:
+            return ScenarioTable(np.empty(0, dtype=np.int16), (), np.empty(0, dtype=np.int64),
+                                 np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64))
+
+        labels = tuple(dict.fromkeys(label for t in tables for label in t.table_labels))
+        codes = []
+        for t in tables:
+            remap = np.array([labels.index(label) for label in t.table_labels] or [0], dtype=np.int16)
+            codes.append(remap[t.table_codes])
+        return ScenarioTable(
+            table_codes=np.concatenate(codes),
+            table_labels=labels,
+            equipment_ids=np.concatenate([t.equipment_ids for t in tables]),
+            type_ids=np.concatenate([t.type_ids for t in tables]),
+            frequency=np.concatenate([t.frequency for t in tables]),
+        )
+
+
+@dataclass
+class EventTable:
+    """Столбцовая таблица исходов деревьев событий: строка - сценарий и один из его исходов.
+
+    scenario_rows - строки исходной таблицы сценариев (и выровненных с ней результатов
+    расчета), outcome_codes - индексы в outcome_labels, probability - условная
+    вероятность исхода при сценарии; scenarios.frequency - частота исхода, 1/год.
+    """
+    scenarios: ScenarioTable
+    scenario_rows: np.ndarray
+    outcome_codes: np.ndarray
+    outcome_labels: Tuple[str, ...]
+    probability: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.scenario_rows)
+
+    def select(self, rows: Union[np.ndarray, slice]) -> 'EventTable':
+        """Подвыборка исходов по маске, индексам или срезу"""
+        return EventTable(
+            scenarios=self.scenarios.select(rows),
+            scenario_rows=self.scenario_rows[rows],
+            outcome_codes=self.outcome_codes[rows],
+            outcome_labels=self.outcome_labels,
+            probability=self.probability[rows],
+        )
+
+    def for_outcome(self, outcome: str) -> 'EventTable':
+        """Исходы одного вида"""
+        if outcome not in self.outcome_labels:
+            return self.select(np.zeros(len(self), dtype=bool))
+        return self.select(self.outcome_codes == self.outcome_labels.index(outcome))
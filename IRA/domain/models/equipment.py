@@ -1,34 +1,255 @@
-from dataclasses import dataclass
-from typing import Optional
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
+import numpy as np
 
-@dataclass
+from .columns import ColumnBatch
+from .substance import Substance
+
+# Допустимые типы оборудования (совпадают с ключами таблиц *_failure_rate)
+TANK_TYPES = ('Одностенный', 'С внешней защитной оболочкой', 'С двойной оболочкой', 'Полной герметизации')
+PIPELINE_DIAMETER_CATEGORIES = ('Менее 75 мм', 'От 75 до 150 мм', 'Более 150 мм')
+PUMP_TYPES = ('Центробежные герметичные', 'Центробежные с уплотнениями', 'Поршневые')
+COMPRESSOR_TYPES = ('Поршневой', 'Центробежный')
+DEVICE_TYPES = ('Сосуды хранения под давлением', 'Технологические аппараты', 'Химические реакторы')
+TRUCK_TANK_PRESSURE_TYPES = ('Под избыточным давлением', 'При атмосферном давлении')
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    """None (NULL в БД) -> NaN: как и в validate_batch(), незаданное значение не нарушает проверки диапазона"""
+    return math.nan if value is None else value
+
+
+def _unknown_type(batch: ColumnBatch) -> np.ndarray:
+    """Тип оборудования вне справочника (код -1)"""
+    return batch.type_codes < 0
+
+
+def _outside_filling(batch: ColumnBatch) -> np.ndarray:
+    filling = batch['degree_filling']
+    return (filling < 0) | (filling > 1)
+
+
+def _negative_flow(batch: ColumnBatch) -> np.ndarray:
+    return (batch['volume'] < 0) | (batch['flow'] < 0) | (batch['time_out'] < 0)
+
+
+@dataclass(slots=True)
 class Tank:
     """Модель Резервуара"""
     tank_id: Optional[int]
     tank_name: str
     tank_type: str  # - Одностенный, С внешней защитной оболочкой, С двойной оболочкой и т.д.
-    volume: float
-    degree_filling: float
-    pressure: float
-    temperature: float
+    volume: Optional[float]
+    degree_filling: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
+    component_enterprise: str
+    spill_square: Optional[float]
+    sub_id: int
+    coordinate: str
+
+    def validate(self) -> bool:
+        """Валидация данных резервуара"""
+        if self.tank_type not in TANK_TYPES:
+            return False
+        if _nan_if_none(self.volume) <= 0.1 or _nan_if_none(self.volume) > 50000:
+            return False
+        if _nan_if_none(self.degree_filling) < 0 or _nan_if_none(self.degree_filling) > 1:
+            return False
+        if _nan_if_none(self.temperature) <= -273:
+            return False
+        if _nan_if_none(self.spill_square) < 1:
+            return False
+        return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        volume = batch['volume']
+        return (_unknown_type(batch) | (volume <= 0.1) | (volume > 50000) | _outside_filling(batch)
+                | (batch['temperature'] <= -273) | (batch['spill_square'] < 1))
+
+
+@dataclass(slots=True)
+class Pipeline:
+    """Модель Трубопровода"""
+    pipeline_id: Optional[int]
+    pipeline_name: str
+    diameter_category: str  # - Менее 75 мм, От 75 до 150 мм, Более 150 мм
+    length_meters: Optional[float]
+    diameter_pipeline: Optional[float]
+    flow: Optional[float]
+    time_out: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
+    component_enterprise: str
+    sub_id: int
+    coordinate: str
+
+    def validate(self) -> bool:
+        """Валидация данных трубопровода"""
+        if self.diameter_category not in PIPELINE_DIAMETER_CATEGORIES:
+            return False
+        if _nan_if_none(self.length_meters) <= 0:
+            return False
+        if _nan_if_none(self.diameter_pipeline) <= 0:
+            return False
+        if _nan_if_none(self.flow) < 0 or _nan_if_none(self.time_out) < 0:
+            return False
+        if _nan_if_none(self.temperature) <= -273:
+            return False
+        return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        return (_unknown_type(batch) | (batch['length_meters'] <= 0) | (batch['diameter_pipeline'] <= 0)
+                | (batch['flow'] < 0) | (batch['time_out'] < 0) | (batch['temperature'] <= -273))
+
+
+@dataclass(slots=True)
+class Pump:
+    """Модель Насоса"""
+    pump_id: Optional[int]
+    pump_name: str
+    pump_type: str  # - Центробежные герметичные, Центробежные с уплотнениями, Поршневые
+    volume: Optional[float]
+    flow: Optional[float]
+    time_out: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
+    component_enterprise: str
+    sub_id: int
+    coordinate: str
+
+    def validate(self) -> bool:
+        """Валидация данных насоса"""
+        if self.pump_type not in PUMP_TYPES:
+            return False
+        if _nan_if_none(self.volume) < 0 or _nan_if_none(self.flow) < 0 or _nan_if_none(self.time_out) < 0:
+            return False
+        if _nan_if_none(self.temperature) <= -273:
+            return False
+        return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        return _unknown_type(batch) | _negative_flow(batch) | (batch['temperature'] <= -273)
+
+
+@dataclass(slots=True)
+class Compressor:
+    """Модель Компрессора"""
+    comp_id: Optional[int]
+    comp_name: str
+    comp_type: str  # - Поршневой, Центробежный
+    volume: Optional[float]
+    flow: Optional[float]
+    time_out: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
+    component_enterprise: str
+    sub_id: int
+    coordinate: str
+
+    def validate(self) -> bool:
+        """Валидация данных компрессора"""
+        if self.comp_type not in COMPRESSOR_TYPES:
+            return False
+        if _nan_if_none(self.volume) < 0 or _nan_if_none(self.flow) < 0 or _nan_if_none(self.time_out) < 0:
+            return False
+        if _nan_if_none(self.temperature) <= -273:
+            return False
+        return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        return _unknown_type(batch) | _negative_flow(batch) | (batch['temperature'] <= -273)
+
+
+@dataclass(slots=True)
+class TechnologicalDevice:
+    """Модель Технологического устройства"""
+    device_id: Optional[int]
+    device_name: str
+    device_type: str  # - Сосуды хранения под давлением, Технологические аппараты, Химические реакторы
+    volume: Optional[float]
+    degree_filling: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
+    component_enterprise: str
+    spill_square: Optional[float]
+    sub_id: int
+    coordinate: str
+
+    def validate(self) -> bool:
+        """Валидация данных технологического устройства"""
+        if self.device_type not in DEVICE_TYPES:
+            return False
+        if _nan_if_none(self.volume) <= 0:
+            return False
+        if _nan_if_none(self.degree_filling) < 0 or _nan_if_none(self.degree_filling) > 1:
+            return False
+        if _nan_if_none(self.temperature) <= -273:
+            return False
+        if _nan_if_none(self.spill_square) < 1:
+            return False
+        return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        return (_unknown_type(batch) | (batch['volume'] <= 0) | _outside_filling(batch)
+                | (batch['temperature'] <= -273) | (batch['spill_square'] < 1))
+
+
+@dataclass(slots=True)
+class TruckTank:
+    """Модель Автоцистерны"""
+    truck_tank_id: Optional[int]
+    truck_tank_name: str
+    pressure_type: str  # - Под избыточным давлением, При атмосферном давлении
+    volume: Optional[float]
+    degree_filling: Optional[float]
+    pressure: Optional[float]
+    temperature: Optional[float]
     component_enterprise: str
-    spill_square: float
+    spill_square: Optional[float]
     sub_id: int
     coordinate: str
 
     def validate(self) -> bool:
-        """Валидация данных вещества"""
-        if self.tank_type not in (
-        'Одностенный', 'С внешней защитной оболочкой', 'С двойной оболочкой', 'Полной герметизации'):
+        """Валидация данных автоцистерны"""
+        if self.pressure_type not in TRUCK_TANK_PRESSURE_TYPES:
             return False
-        if not self.volume > 0.1 and self.volume <= 50000:
+        if _nan_if_none(self.volume) <= 0:
             return False
-        if not self.degree_filling >= 0 and self.degree_filling <= 1:
+        if _nan_if_none(self.degree_filling) < 0 or _nan_if_none(self.degree_filling) > 1:
             return False
-        if self.temperature <= -273:
+        if _nan_if_none(self.temperature) <= -273:
             return False
-        if self.spill_square < 1:
+        if _nan_if_none(self.spill_square) < 1:
             return False
         return True
 
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        return (_unknown_type(batch) | (batch['volume'] <= 0) | _outside_filling(batch)
+                | (batch['temperature'] <= -273) | (batch['spill_square'] < 1))
+
+
+@dataclass(slots=True)
+class EquipmentDetails:
+    """Оборудование вместе с его веществом и частотами разгерметизации.
+
+    failure_rates: вид разгерметизации (type_id) -> частота, 1/год
+    (для трубопроводов - на метр длины)
+    """
+    equipment: Any
+    substance: Optional[Substance]
+    failure_rates: Dict[int, float] = field(default_factory=dict)
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Виды разгерметизации (таблица Depressurization_type)
+FULL_RUPTURE = 1
+PARTIAL_RUPTURE = 2
+
+
+@dataclass
+class FailureRates:
+    """Справочник частот разгерметизации одного вида оборудования.
+
+    rates[code, j] - частота для типа оборудования type_labels[code] и вида
+    разгерметизации type_ids[j], NaN - если в справочнике нет значения.
+    Для length_column частота задана на метр и умножается на эту колонку.
+    """
+    table: str
+    type_labels: Tuple[str, ...]
+    type_ids: Tuple[int, ...]
+    rates: np.ndarray
+    length_column: Optional[str] = None
+
+    def rate(self, type_label: str, type_id: int) -> float:
+        """Частота для одного типа оборудования и вида разгерметизации"""
+        if type_label not in self.type_labels or type_id not in self.type_ids:
+            return float('nan')
+        return float(self.rates[self.type_labels.index(type_label), self.type_ids.index(type_id)])
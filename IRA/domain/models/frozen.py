@@ -0,0 +1,48 @@
+from dataclasses import fields, make_dataclass
+from operator import attrgetter
+from typing import Any, Dict
+
+from .equipment import Compressor, Pipeline, Pump, Tank, TechnologicalDevice, TruckTank
+from .substance import Substance
+
+
+def frozen_model(model: type) -> type:
+    """Неизменяемый вариант модели: те же поля, validate() и validate_batch(), slots, frozen и hash.
+
+    Экземпляры можно безопасно разделять между кэшами и потоками и использовать как ключи словарей.
+    """
+    namespace = {
+        '__doc__': f"{model.__doc__} (неизменяемый вариант)",
+        'validate': model.validate,
+        'validate_batch': staticmethod(model.validate_batch),
+        'thaw': lambda self: model(*attrgetter(*(f.name for f in fields(model)))(self)),
+    }
+    variant = make_dataclass(f"Frozen{model.__name__}", [(f.name, f.type) for f in fields(model)],
+                             namespace=namespace, frozen=True, slots=True)
+    variant.__module__ = __name__
+    return variant
+
+
+FrozenTank = frozen_model(Tank)
+FrozenPipeline = frozen_model(Pipeline)
+FrozenPump = frozen_model(Pump)
+FrozenCompressor = frozen_model(Compressor)
+FrozenTechnologicalDevice = frozen_model(TechnologicalDevice)
+FrozenTruckTank = frozen_model(TruckTank)
+FrozenSubstance = frozen_model(Substance)
+
+FROZEN_MODELS: Dict[type, type] = {
+    Tank: FrozenTank,
+    Pipeline: FrozenPipeline,
+    Pump: FrozenPump,
+    Compressor: FrozenCompressor,
+    TechnologicalDevice: FrozenTechnologicalDevice,
+    TruckTank: FrozenTruckTank,
+    Substance: FrozenSubstance,
+}
+
+
+def freeze(obj: Any) -> Any:
+    """Неизменяемая копия объекта модели (обратное преобразование - obj.thaw())"""
+    variant = FROZEN_MODELS[type(obj)]
+    return variant(*attrgetter(*(f.name for f in fields(variant)))(obj))
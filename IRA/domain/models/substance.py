@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 from typing import Optional
 
+import numpy as np
 
-@dataclass
+from .columns import ColumnBatch
+
+
+@dataclass(slots=True)
 class Substance:
     """Модель вещества"""
     id: Optional[int]
@@ -40,3 +44,12 @@ class Substance:
         if self.flash_point >= self.auto_ignition_temp:
             return False
         return True
+
+    @staticmethod
+    def validate_batch(batch: ColumnBatch) -> np.ndarray:
+        """Векторный аналог validate() по столбцам выборки: маска строк, не прошедших проверку"""
+        class_substance, sub_type = batch['class_substance'], batch['sub_type']
+        return (~((class_substance >= 1) & (class_substance <= 4)) | ~np.isin(batch['sigma'], (4, 7))
+                | ~np.isin(batch['energy_level'], (1, 2)) | ~((sub_type >= 0) & (sub_type <= 7))
+                | (batch['lower_concentration_limit'] >= batch['upper_concentration_limit'])
+                | (batch['flash_point'] >= batch['auto_ignition_temp']))
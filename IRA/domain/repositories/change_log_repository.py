@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+
+from ..models.change import ChangeSet
+
+
+class ChangeLogRepository(ABC):
+    """Интерфейс журнала изменений оборудования, веществ и справочников частот"""
+
+    @abstractmethod
+    def revision(self) -> int:
+        """Номер последнего изменения (0 для пустого журнала)"""
+        pass
+
+    @abstractmethod
+    def changes_since(self, revision: int) -> ChangeSet:
+        """Изменения после ревизии revision, сгруппированные по таблицам"""
+        pass
+
+    @abstractmethod
+    def prune(self, revision: int) -> int:
+        """Удаление записей журнала до ревизии revision включительно; возвращает их число.
+
+        revision не должна превышать ревизию самого отстающего потребителя журнала
+        """
+        pass
+
+    @abstractmethod
+    def acknowledge(self, consumer: str, revision: int) -> int:
+        """Отметка ревизии, до которой потребитель consumer обработал журнал.
+
+        Журнал очищается до ревизии самого отстающего из зарегистрированных
+        потребителей; возвращает число удаленных записей
+        """
+        pass
+
+    @abstractmethod
+    def release(self, consumer: str) -> None:
+        """Снятие потребителя: его ревизия больше не удерживает записи журнала"""
+        pass
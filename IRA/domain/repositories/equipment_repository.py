@@ -1,9 +1,116 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from ..models.equipment import Tank
+from typing import Generic, Iterable, Iterator, List, Optional, TypeVar
+from ..models.columns import ColumnBatch
+from ..models.equipment import Compressor, EquipmentDetails, Pipeline, Pump, Tank, TechnologicalDevice, TruckTank
+from .substance_repository import SubstanceRepository
 
+T = TypeVar('T')
 
-class TankRepository(ABC):
+
+class EquipmentRepository(ABC, Generic[T]):
+    """Интерфейс репозитория для работы с оборудованием"""
+
+    @abstractmethod
+    def create(self, equipment: T) -> Optional[int]:
+        """Создание нового оборудования"""
+        pass
+
+    @abstractmethod
+    def create_many(self, equipment: Iterable[T]) -> List[Optional[int]]:
+        """Пакетное создание оборудования в одной транзакции.
+
+        Возвращает ID в порядке входных объектов, None - для не прошедших валидацию
+        """
+        pass
+
+    @abstractmethod
+    def get(self, equipment_id: int) -> Optional[T]:
+        """Получение оборудования по ID"""
+        pass
+
+    @abstractmethod
+    def get_all(self, limit: int = 100, offset: int = 0) -> List[T]:
+        """Получение списка оборудования с пагинацией"""
+        pass
+
+    @abstractmethod
+    def iter_all(self, chunk_size: int = 500) -> Iterator[T]:
+        """Потоковый обход всего оборудования порциями по chunk_size"""
+        pass
+
+    @abstractmethod
+    def update(self, equipment: T) -> bool:
+        """Обновление данных оборудования"""
+        pass
+
+    @abstractmethod
+    def update_many(self, equipment: Iterable[T]) -> List[bool]:
+        """Пакетное обновление оборудования в одной транзакции"""
+        pass
+
+    @abstractmethod
+    def upsert_many(self, equipment: Iterable[T]) -> List[Optional[int]]:
+        """Пакетная вставка или обновление оборудования по ID"""
+        pass
+
+    @abstractmethod
+    def delete(self, equipment_id: int) -> bool:
+        """Удаление оборудования"""
+        pass
+
+    @abstractmethod
+    def search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[T]:
+        """Поиск оборудования по названию и составляющей предприятия"""
+        pass
+
+    @abstractmethod
+    def iter_search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                    chunk_size: int = 500) -> Iterator[T]:
+        """Потоковый поиск оборудования по параметрам"""
+        pass
+
+    @abstractmethod
+    def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[T]:
+        """Полнотекстовый поиск оборудования по названию и составляющей предприятия"""
+        pass
+
+    @abstractmethod
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[T]:
+        """Оборудование в прямоугольнике координат"""
+        pass
+
+    @abstractmethod
+    def within_radius(self, lat: float, lon: float, meters: float) -> List[T]:
+        """Оборудование в радиусе meters от точки, по возрастанию расстояния"""
+        pass
+
+    @abstractmethod
+    def load_columns(self, substances: Optional[SubstanceRepository] = None, chunk_size: int = 10000,
+                     equipment_ids: Optional[Iterable[int]] = None) -> ColumnBatch:
+        """Столбцовая выборка оборудования (без создания объектов модели): всего или по ID.
+
+        Если передан репозиторий веществ, свойства веществ присоединяются по sub_id
+        """
+        pass
+
+    @abstractmethod
+    def get_details(self, equipment_ids: Optional[Iterable[int]] = None, substance_schema: str = 'main',
+                    share_substances: bool = True) -> List[EquipmentDetails]:
+        """Оборудование с веществами и частотами разгерметизации одним запросом (все или по ID).
+
+        substance_schema - схема таблицы веществ (подключенная через ATTACH база),
+        share_substances - один объект Substance на вещество для всех строк
+        """
+        pass
+
+    @abstractmethod
+    def iter_details(self, chunk_size: int = 500, substance_schema: str = 'main',
+                     share_substances: bool = True) -> Iterator[EquipmentDetails]:
+        """Потоковый обход оборудования с веществами и частотами разгерметизации"""
+        pass
+
+
+class TankRepository(EquipmentRepository[Tank]):
     """Интерфейс репозитория для работы с Резервуаром"""
 
     @abstractmethod
@@ -11,6 +118,14 @@ class TankRepository(ABC):
         """Создание нового Резервуара"""
         pass
 
+    @abstractmethod
+    def create_many(self, tanks: Iterable[Tank]) -> List[Optional[int]]:
+        """Пакетное создание Резервуаров в одной транзакции.
+
+        Возвращает ID в порядке входных объектов, None - для не прошедших валидацию
+        """
+        pass
+
     @abstractmethod
     def get(self, tank_id: int) -> Optional[Tank]:
         """Получение Резервуара по ID"""
@@ -21,17 +136,73 @@ class TankRepository(ABC):
         """Получение списка веществ с пагинацией"""
         pass
 
+    @abstractmethod
+    def iter_all(self, chunk_size: int = 500) -> Iterator[Tank]:
+        """Потоковый обход всех Резервуаров порциями по chunk_size"""
+        pass
+
     @abstractmethod
     def update(self, tank: Tank) -> bool:
         """Обновление данных вещества"""
         pass
 
+    @abstractmethod
+    def update_many(self, tanks: Iterable[Tank]) -> List[bool]:
+        """Пакетное обновление Резервуаров в одной транзакции"""
+        pass
+
+    @abstractmethod
+    def upsert_many(self, tanks: Iterable[Tank]) -> List[Optional[int]]:
+        """Пакетная вставка или обновление Резервуаров по tank_id"""
+        pass
+
     @abstractmethod
     def delete(self, tank_id: int) -> bool:
         """Удаление Резервуара"""
         pass
 
     @abstractmethod
-    def search(self, tank_name: Optional[str] = None, sub_id: Optional[int] = None) -> List[Tank]:
+    def search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[Tank]:
         """Поиск Резервуара по параметрам"""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def iter_search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                    chunk_size: int = 500) -> Iterator[Tank]:
+        """Потоковый поиск Резервуаров по параметрам"""
+        pass
+
+    @abstractmethod
+    def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Tank]:
+        """Полнотекстовый поиск Резервуаров по названию и составляющей предприятия без учета регистра (с ранжированием)"""
+        pass
+
+    @abstractmethod
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Tank]:
+        """Резервуары в прямоугольнике координат"""
+        pass
+
+    @abstractmethod
+    def within_radius(self, lat: float, lon: float, meters: float) -> List[Tank]:
+        """Резервуары в радиусе meters от точки, по возрастанию расстояния"""
+        pass
+
+
+class PipelineRepository(EquipmentRepository[Pipeline]):
+    """Интерфейс репозитория для работы с Трубопроводом"""
+
+
+class PumpRepository(EquipmentRepository[Pump]):
+    """Интерфейс репозитория для работы с Насосом"""
+
+
+class CompressorRepository(EquipmentRepository[Compressor]):
+    """Интерфейс репозитория для работы с Компрессором"""
+
+
+class TechnologicalDeviceRepository(EquipmentRepository[TechnologicalDevice]):
+    """Интерфейс репозитория для работы с Технологическим устройством"""
+
+
+class TruckTankRepository(EquipmentRepository[TruckTank]):
+    """Интерфейс репозитория для работы с Автоцистерной"""
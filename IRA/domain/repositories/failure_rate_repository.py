@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from ..models.failure_rate import FailureRates
+
+
+class FailureRateRepository(ABC):
+    """Интерфейс справочника частот разгерметизации оборудования"""
+
+    @abstractmethod
+    def get_rates(self, table: str) -> Optional[FailureRates]:
+        """Справочник частот для таблицы оборудования (Tank, Pipeline, ...)"""
+        pass
+
+    @abstractmethod
+    def get_all(self) -> Dict[str, FailureRates]:
+        """Справочники частот всех видов оборудования, ключ - таблица оборудования"""
+        pass
+
+    @abstractmethod
+    def get_depressurization_types(self) -> Dict[int, str]:
+        """Виды разгерметизации: type_id -> наименование"""
+        pass
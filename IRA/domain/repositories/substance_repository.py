@@ -1,6 +1,7 @@
 # src/domain/repositories/substance_repository.py
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+from ..models.columns import ColumnBatch
 from ..models.substance import Substance
 
 
@@ -12,21 +13,49 @@ class SubstanceRepository(ABC):
         """Создание нового вещества"""
         pass
 
+    @abstractmethod
+    def create_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        """Пакетное создание веществ в одной транзакции.
+
+        Возвращает ID в порядке входных объектов, None - для не прошедших валидацию
+        """
+        pass
+
     @abstractmethod
     def get(self, substance_id: int) -> Optional[Substance]:
         """Получение вещества по ID"""
         pass
 
+    @abstractmethod
+    def get_many(self, substance_ids: Iterable[int]) -> Dict[int, Substance]:
+        """Получение веществ по списку ID (отсутствующие ID в результат не попадают)"""
+        pass
+
     @abstractmethod
     def get_all(self, limit: int = 100, offset: int = 0) -> List[Substance]:
         """Получение списка веществ с пагинацией"""
         pass
 
+    @abstractmethod
+    def iter_all(self, chunk_size: int = 500) -> Iterator[Substance]:
+        """Потоковый обход всех веществ порциями по chunk_size"""
+        pass
+
     @abstractmethod
     def update(self, substance: Substance) -> bool:
         """Обновление данных вещества"""
         pass
 
+    @abstractmethod
+    def update_many(self, substances: Iterable[Substance]) -> List[bool]:
+        """Пакетное обновление веществ в одной транзакции"""
+        pass
+
+    @abstractmethod
+    def upsert_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        """Пакетная вставка или обновление веществ по id"""
+        pass
+
     @abstractmethod
     def delete(self, substance_id: int) -> bool:
         """Удаление вещества"""
@@ -35,4 +64,20 @@ class SubstanceRepository(ABC):
     @abstractmethod
     def search(self, name: Optional[str] = None, sub_type: Optional[int] = None) -> List[Substance]:
         """Поиск веществ по параметрам"""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def iter_search(self, name: Optional[str] = None, sub_type: Optional[int] = None,
+                    chunk_size: int = 500) -> Iterator[Substance]:
+        """Потоковый поиск веществ по параметрам"""
+        pass
+
+    @abstractmethod
+    def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Substance]:
+        """Полнотекстовый поиск веществ по названию без учета регистра (с ранжированием)"""
+        pass
+
+    @abstractmethod
+    def load_columns(self, chunk_size: int = 10000) -> ColumnBatch:
+        """Столбцовая выборка числовых свойств всех веществ"""
+        pass
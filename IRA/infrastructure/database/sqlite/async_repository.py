@@ -0,0 +1,234 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from IRA.domain.models.columns import ColumnBatch
+from IRA.domain.models.equipment import EquipmentDetails, Tank
+from IRA.domain.models.substance import Substance
+from IRA.domain.repositories.equipment_repository import EquipmentRepository, TankRepository
+from IRA.domain.repositories.substance_repository import SubstanceRepository
+
+
+class _Call:
+    """Состояние вызова в рабочем потоке: соединение, которое можно прервать при отмене"""
+
+    def __init__(self, connections):
+        self._connections = connections
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cancelled = False
+
+    def run(self, func: Callable, args) -> Any:
+        with self._lock:
+            if self._cancelled:
+                raise asyncio.CancelledError()
+            self._conn = self._connections.get_connection()
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._conn = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+class AsyncRepositoryFacade:
+    """Асинхронный фасад над синхронным SQLite-репозиторием.
+
+    Запись выполняется в одном выделенном потоке (SQLite допускает одного
+    писателя), чтение - пулом потоков, у каждого из которых свое соединение,
+    поэтому в режиме WAL параллельные чтения не блокируют друг друга и запись.
+    Отмена корутины прерывает выполняющийся запрос через Connection.interrupt().
+    """
+
+    def __init__(self, repository, readers: int = 4):
+        if readers < 1:
+            raise ValueError("readers must be positive")
+
+        self.repository = repository
+        self.logger = repository.logger
+        self._connections = repository.connection_manager
+        name = type(self).__name__
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix=f"{name}-reader")
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args) -> Any:
+        call = _Call(self._connections)
+        future = asyncio.get_running_loop().run_in_executor(executor, call.run, func, args)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+
+    async def read(self, func: Callable, *args) -> Any:
+        """Выполнение произвольного синхронного чтения в пуле читателей"""
+        return await self._run(self._readers, func, *args)
+
+    async def write(self, func: Callable, *args) -> Any:
+        """Выполнение произвольной синхронной записи в потоке писателя"""
+        return await self._run(self._writer, func, *args)
+
+    async def _iterate(self, iterator: Iterator[Any], chunk_size: int) -> AsyncIterator[Any]:
+        """Асинхронный обход синхронного итератора: порция за одно обращение к потоку"""
+        while True:
+            chunk = await self.read(lambda: list(islice(iterator, chunk_size)))
+            for item in chunk:
+                yield item
+            if len(chunk) < chunk_size:
+                return
+
+    def close(self) -> None:
+        """Остановка потоков и закрытие соединений репозитория"""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.repository.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+class AsyncEquipmentRepository(AsyncRepositoryFacade, EquipmentRepository):
+    """Асинхронный репозиторий оборудования поверх SQLiteEquipmentRepository"""
+
+    async def create(self, equipment: Any) -> Optional[int]:
+        return await self.write(self.repository.create, equipment)
+
+    async def create_many(self, equipment: Iterable[Any]) -> List[Optional[int]]:
+        return await self.write(self.repository.create_many, list(equipment))
+
+    async def get(self, equipment_id: int) -> Optional[Any]:
+        return await self.read(self.repository.get, equipment_id)
+
+    async def get_all(self, limit: int = 100, offset: int = 0) -> List[Any]:
+        return await self.read(self.repository.get_all, limit, offset)
+
+    async def iter_all(self, chunk_size: int = 500) -> AsyncIterator[Any]:
+        async for item in self._iterate(self.repository.iter_all(chunk_size), chunk_size):
+            yield item
+
+    async def update(self, equipment: Any) -> bool:
+        return await self.write(self.repository.update, equipment)
+
+    async def update_many(self, equipment: Iterable[Any]) -> List[bool]:
+        return await self.write(self.repository.update_many, list(equipment))
+
+    async def upsert_many(self, equipment: Iterable[Any]) -> List[Optional[int]]:
+        return await self.write(self.repository.upsert_many, list(equipment))
+
+    async def delete(self, equipment_id: int) -> bool:
+        return await self.write(self.repository.delete, equipment_id)
+
+    async def search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[Any]:
+        return await self.read(self.repository.search, name, component_enterprise)
+
+    async def iter_search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                          chunk_size: int = 500) -> AsyncIterator[Any]:
+        iterator = self.repository.iter_search(name, component_enterprise, chunk_size)
+        async for item in self._iterate(iterator, chunk_size):
+            yield item
+
+    async def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Any]:
+        return await self.read(self.repository.search_text, text, limit, prefix)
+
+    async def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Any]:
+        return await self.read(self.repository.within_bbox, min_lat, min_lon, max_lat, max_lon)
+
+    async def within_radius(self, lat: float, lon: float, meters: float) -> List[Any]:
+        return await self.read(self.repository.within_radius, lat, lon, meters)
+
+    async def load_columns(self, substances: Optional[SubstanceRepository] = None, chunk_size: int = 10000,
+                           equipment_ids: Optional[Iterable[int]] = None) -> ColumnBatch:
+        if equipment_ids is not None:
+            equipment_ids = list(equipment_ids)
+        return await self.read(self.repository.load_columns, substances, chunk_size, equipment_ids)
+
+    async def get_details(self, equipment_ids: Optional[Iterable[int]] = None, substance_schema: str = 'main',
+                          share_substances: bool = True) -> List[EquipmentDetails]:
+        if equipment_ids is not None:
+            equipment_ids = list(equipment_ids)
+        return await self.read(self.repository.get_details, equipment_ids, substance_schema, share_substances)
+
+    async def iter_details(self, chunk_size: int = 500, substance_schema: str = 'main',
+                           share_substances: bool = True) -> AsyncIterator[EquipmentDetails]:
+        iterator = self.repository.iter_details(chunk_size, substance_schema, share_substances)
+        async for details in self._iterate(iterator, chunk_size):
+            yield details
+
+
+class AsyncTankRepository(AsyncEquipmentRepository, TankRepository):
+    """Асинхронный репозиторий резервуаров"""
+
+    async def get(self, tank_id: int) -> Optional[Tank]:
+        return await super().get(tank_id)
+
+    async def delete(self, tank_id: int) -> bool:
+        return await super().delete(tank_id)
+
+    async def search(self, tank_name: Optional[str] = None,
+                     component_enterprise: Optional[str] = None) -> List[Tank]:
+        return await super().search(tank_name, component_enterprise)
+
+    async def iter_search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                          chunk_size: int = 500) -> AsyncIterator[Tank]:
+        async for tank in super().iter_search(tank_name, component_enterprise, chunk_size):
+            yield tank
+
+
+class AsyncSubstanceRepository(AsyncRepositoryFacade, SubstanceRepository):
+    """Асинхронный репозиторий веществ (поверх SQLite- или кэширующего репозитория)"""
+
+    async def create(self, substance: Substance) -> Optional[int]:
+        return await self.write(self.repository.create, substance)
+
+    async def create_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        return await self.write(self.repository.create_many, list(substances))
+
+    async def get(self, substance_id: int) -> Optional[Substance]:
+        return await self.read(self.repository.get, substance_id)
+
+    async def get_many(self, substance_ids: Iterable[int]) -> Dict[int, Substance]:
+        return await self.read(self.repository.get_many, list(substance_ids))
+
+    async def get_all(self, limit: int = 100, offset: int = 0) -> List[Substance]:
+        return await self.read(self.repository.get_all, limit, offset)
+
+    async def iter_all(self, chunk_size: int = 500) -> AsyncIterator[Substance]:
+        async for substance in self._iterate(self.repository.iter_all(chunk_size), chunk_size):
+            yield substance
+
+    async def update(self, substance: Substance) -> bool:
+        return await self.write(self.repository.update, substance)
+
+    async def update_many(self, substances: Iterable[Substance]) -> List[bool]:
+        return await self.write(self.repository.update_many, list(substances))
+
+    async def upsert_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        return await self.write(self.repository.upsert_many, list(substances))
+
+    async def delete(self, substance_id: int) -> bool:
+        return await self.write(self.repository.delete, substance_id)
+
+    async def search(self, name: Optional[str] = None, sub_type: Optional[int] = None) -> List[Substance]:
+        return await self.read(self.repository.search, name, sub_type)
+
+    async def iter_search(self, name: Optional[str] = None, sub_type: Optional[int] = None,
+                          chunk_size: int = 500) -> AsyncIterator[Substance]:
+        async for substance in self._iterate(self.repository.iter_search(name, sub_type, chunk_size), chunk_size):
+            yield substance
+
+    async def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Substance]:
+        return await self.read(self.repository.search_text, text, limit, prefix)
+
+    async def load_columns(self, chunk_size: int = 10000) -> ColumnBatch:
+        return await self.read(self.repository.load_columns, chunk_size)
@@ -0,0 +1,267 @@
+import sqlite3
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from IRA.domain.models.columns import ColumnBatch
+from IRA.infrastructure.database.sqlite.columnar import iter_column_values, load_column_batch
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager, get_connection_manager
+from IRA.infrastructure.database.sqlite.mapping import TableMapping
+from IRA.infrastructure.database.sqlite.migrations import ensure_schema
+from IRA.infrastructure.database.sqlite.text_search import FullTextIndex, fts5_available
+
+
+class SQLiteMappedRepository:
+    """Общая реализация SQLite-репозитория поверх описания таблицы TableMapping"""
+
+    mapping: TableMapping
+    # Роль файла БД, схему которой требует репозиторий (migrations.PROJECT или CATALOGUE)
+    schema_role: str
+    _batch_size = 500
+
+    def __init__(self, db_path: str, connection_manager: Optional[SQLiteConnectionManager] = None):
+        self.db_path = db_path
+        self.logger = self._setup_logger()
+        self._connections = connection_manager or get_connection_manager(db_path)
+        self._text_index = FullTextIndex(self.mapping.table, self.mapping.key, self.mapping.text_columns)
+        self._initialize_database()
+
+    def _setup_logger(self) -> logging.Logger:
+        logger = logging.getLogger(type(self).__name__)
+        logger.setLevel(logging.INFO)
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        return logger
+
+    @property
+    def connection_manager(self) -> SQLiteConnectionManager:
+        return self._connections
+
+    @property
+    def table(self) -> str:
+        return self.mapping.table
+
+    def _get_connection(self):
+        return self._connections.connection()
+
+    def transaction(self):
+        """Общая транзакция для нескольких операций репозитория"""
+        return self._connections.transaction()
+
+    def close(self) -> None:
+        """Закрытие соединений с БД"""
+        self._connections.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _initialize_database(self) -> None:
+        """Схема, индексы и справочники роли schema_role создаются миграциями один раз на файл БД"""
+        ensure_schema(self._connections, self.schema_role)
+        with self._get_connection() as conn:
+            self._text_index.enabled = fts5_available(conn)
+        if not self._text_index.enabled:
+            self.logger.warning("Full-text index is not available, name search falls back to LIKE")
+
+    def _fetch(self, query: str, params: Iterable[Any] = ()) -> List[Any]:
+        with self._get_connection() as conn:
+            return self.mapping.from_rows(conn.execute(query, tuple(params)).fetchall())
+
+    def create(self, obj: Any) -> Optional[int]:
+        mapping = self.mapping
+        if not obj.validate():
+            self.logger.error(f"Validation failed for {mapping.label}")
+            return None
+
+        if mapping.key_getter(obj) is None:
+            sql, values = mapping.insert_data_sql, mapping.to_data_row(obj)
+        else:
+            sql, values = mapping.insert_sql, mapping.to_row(obj)
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(sql, values)
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            self.logger.error(f"Error creating {mapping.label}: {e}")
+            return None
+
+    def get(self, obj_id: int) -> Optional[Any]:
+        with self._get_connection() as conn:
+            row = conn.execute(self.mapping.select_by_key_sql, (obj_id,)).fetchone()
+            if row:
+                return self.mapping.from_row(row)
+            return None
+
+    def get_all(self, limit: int = 100, offset: int = 0) -> List[Any]:
+        return self._fetch(f"{self.mapping.select_sql} LIMIT ? OFFSET ?", (limit, offset))
+
+    def _iter_pages(self, conditions: str, params: List[Any], chunk_size: int) -> Iterator[Any]:
+        """Keyset-пагинация по ключу: каждая порция - отдельный запрос key > последнего"""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        mapping = self.mapping
+        sql = f"{mapping.select_sql} WHERE {mapping.key} > ?{conditions} ORDER BY {mapping.key} LIMIT ?"
+        last_id = -(2 ** 63)
+        while True:
+            with self._get_connection() as conn:
+                cursor = conn.execute(sql, (last_id, *params, chunk_size))
+                rows = cursor.fetchmany(chunk_size)
+            for row in rows:
+                yield mapping.from_row(row)
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def iter_all(self, chunk_size: int = 500) -> Iterator[Any]:
+        return self._iter_pages("", [], chunk_size)
+
+    def update(self, obj: Any) -> bool:
+        mapping = self.mapping
+        if not obj.validate():
+            self.logger.error(f"Validation failed for {mapping.label}")
+            return False
+
+        if mapping.key_getter(obj) is None:
+            self.logger.error(f"Cannot update {mapping.label} without id")
+            return False
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(mapping.update_sql, mapping.to_update_row(obj))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            self.logger.error(f"Error updating {mapping.label}: {e}")
+            return False
+
+    def _split_batch(self, objects: List[Any], action: str) -> Tuple[List[int], List[int]]:
+        """Валидация пакета: индексы объектов с заданным ключом и без него"""
+        key_getter = self.mapping.key_getter
+        with_id, without_id = [], []
+        for i, obj in enumerate(objects):
+            if not obj.validate():
+                self.logger.error(f"Validation failed for {self.mapping.label} at position {i} ({action})")
+            elif key_getter(obj) is None:
+                without_id.append(i)
+            else:
+                with_id.append(i)
+        return with_id, without_id
+
+    def _existing_ids(self, cursor: sqlite3.Cursor, ids: List[int]) -> set:
+        mapping = self.mapping
+        existing = set()
+        for start in range(0, len(ids), self._batch_size):
+            chunk = ids[start:start + self._batch_size]
+            cursor.execute(
+                f"SELECT {mapping.key} FROM {mapping.table} WHERE {mapping.key} IN ({', '.join(['?'] * len(chunk))})",
+                chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
+    def _insert_batch(self, objects: List[Any], with_id: List[int], without_id: List[int],
+                      sql_with_id: str, action: str) -> List[Optional[int]]:
+        mapping = self.mapping
+        ids: List[Optional[int]] = [None] * len(objects)
+        if not with_id and not without_id:
+            return ids
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(sql_with_id, [mapping.to_row(objects[i]) for i in with_id])
+                # Строки без ключа вставляются последними: в рамках одной транзакции
+                # SQLite выдает им подряд идущие ID, последний из которых - last_insert_rowid()
+                cursor.executemany(mapping.insert_data_sql, [mapping.to_data_row(objects[i]) for i in without_id])
+                last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except sqlite3.Error as e:
+            self.logger.error(f"Error {action} {mapping.label} batch: {e}")
+            return [None] * len(objects)
+
+        for i in with_id:
+            ids[i] = mapping.key_getter(objects[i])
+        first_id = last_id - len(without_id) + 1
+        for offset, i in enumerate(without_id):
+            ids[i] = first_id + offset
+        return ids
+
+    def create_many(self, objects: Iterable[Any]) -> List[Optional[int]]:
+        objects = list(objects)
+        with_id, without_id = self._split_batch(objects, "create")
+        return self._insert_batch(objects, with_id, without_id, self.mapping.insert_sql, "creating")
+
+    def update_many(self, objects: Iterable[Any]) -> List[bool]:
+        mapping = self.mapping
+        objects = list(objects)
+        with_id, without_id = self._split_batch(objects, "update")
+        for i in without_id:
+            self.logger.error(f"Cannot update {mapping.label} at position {i} without id")
+
+        result = [False] * len(objects)
+        if not with_id:
+            return result
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                existing = self._existing_ids(cursor, [mapping.key_getter(objects[i]) for i in with_id])
+                to_update = [i for i in with_id if mapping.key_getter(objects[i]) in existing]
+                cursor.executemany(mapping.update_sql, [mapping.to_update_row(objects[i]) for i in to_update])
+        except sqlite3.Error as e:
+            self.logger.error(f"Error updating {mapping.label} batch: {e}")
+            return result
+
+        for i in to_update:
+            result[i] = True
+        return result
+
+    def upsert_many(self, objects: Iterable[Any]) -> List[Optional[int]]:
+        objects = list(objects)
+        with_id, without_id = self._split_batch(objects, "upsert")
+        return self._insert_batch(objects, with_id, without_id, self.mapping.upsert_sql, "upserting")
+
+    def delete(self, obj_id: int) -> bool:
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(self.mapping.delete_sql, (obj_id,))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            self.logger.error(f"Error deleting {self.mapping.label}: {e}")
+            return False
+
+    def _text_conditions(self, *column_texts: Tuple[str, Optional[str]]) -> Tuple[str, List[Any]]:
+        """Условия поиска подстроки без учета регистра для пар (колонка, текст)"""
+        conditions = ""
+        params: List[Any] = []
+        for column, text in column_texts:
+            if text:
+                condition, condition_params = self._text_index.condition(column, text)
+                conditions += f" AND {condition}"
+                params.extend(condition_params)
+        return conditions, params
+
+    def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Any]:
+        query, params = self._text_index.ranked_query(self.mapping.select_t_list, text, limit, prefix)
+        return self._fetch(query, params)
+
+    def _load_columns(self, extra_columns: Tuple[str, ...] = (), conditions: str = "",
+                      params: Iterable[Any] = (), chunk_size: int = 10000) -> ColumnBatch:
+        with self._get_connection() as conn:
+            return load_column_batch(conn, self.mapping, extra_columns, conditions, params, chunk_size)
+
+    def iter_column(self, column: str, chunk_size: int = 10000) -> Iterator[List[Any]]:
+        """Значения колонки порциями в порядке ключа, без создания объектов модели.
+
+        Согласованность с другими чтениями (например, load_columns) обеспечивает вызывающий код,
+        выполняя их в одной connection_manager.read_transaction(). Ошибки SQLite не перехватываются:
+        прерванный поток порций нельзя отличить от конца таблицы
+        """
+        with self._get_connection() as conn:
+            yield from iter_column_values(conn, self.mapping, column, chunk_size)
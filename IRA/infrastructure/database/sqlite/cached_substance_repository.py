@@ -0,0 +1,237 @@
+import copy
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from IRA.domain.models.columns import ColumnBatch
+from IRA.domain.models.substance import Substance
+from IRA.domain.repositories.substance_repository import SubstanceRepository
+from IRA.infrastructure.database.sqlite.substance_repository import SQLiteSubstanceRepository
+
+
+@dataclass
+class CacheStats:
+    """Статистика кэша веществ"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachedSubstanceRepository(SubstanceRepository):
+    """Кэширующая обертка над SQLiteSubstanceRepository.
+
+    Вещества - справочные данные, поэтому get/get_many обслуживаются из LRU-кэша
+    (с необязательным TTL в секундах). Записи через обертку точечно сбрасывают
+    кэш, а прочие изменения обнаруживаются по PRAGMA data_version, после чего
+    кэш очищается целиком. Внешней считается любая фиксация в этом файле БД
+    в обход обертки - в том числе записи других репозиториев проекта (например,
+    оборудования), записи внутри transaction() и фиксации другого процесса,
+    совпавшие по времени с записью через обертку (тогда они не обнаруживаются).
+    """
+
+    def __init__(self, repository: SQLiteSubstanceRepository, maxsize: int = 1024,
+                 ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+
+        self.repository = repository
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.logger = repository.logger
+        self._cache: 'OrderedDict[int, Tuple[Substance, float]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+        # Отдельное соединение только для PRAGMA data_version: счетчик меняется
+        # при фиксации транзакций любым другим соединением с этим файлом
+        self._version_conn = sqlite3.connect(repository.db_path, check_same_thread=False)
+        self._data_version = self._read_data_version()
+
+    @property
+    def connection_manager(self):
+        return self.repository.connection_manager
+
+    def _read_data_version(self) -> int:
+        return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_changes(self) -> None:
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            if self._cache:
+                self._stats.invalidations += len(self._cache)
+                self._cache.clear()
+
+    def _lookup(self, substance_id: int) -> Optional[Substance]:
+        entry = self._cache.get(substance_id)
+        if entry is None:
+            return None
+        substance, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._cache[substance_id]
+            self._stats.invalidations += 1
+            return None
+        self._cache.move_to_end(substance_id)
+        return substance
+
+    @contextmanager
+    def _own_write(self, substance_ids: Iterable[Optional[int]]):
+        """Запись через обертку: собственная фиксация не считается внешним изменением"""
+        with self._lock:
+            self._check_external_changes()
+            version = self._data_version
+        try:
+            yield
+        finally:
+            with self._lock:
+                # В общей транзакции фиксация еще впереди - она сбросит кэш целиком
+                if self._data_version == version and not self.connection_manager.in_transaction():
+                    self._data_version = self._read_data_version()
+                self.invalidate(substance_ids)
+
+    def _store(self, substance: Substance) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        self._cache[substance.id] = (copy.copy(substance), expires_at)
+        self._cache.move_to_end(substance.id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _store_loaded(self, substances: Iterable[Substance], version: int) -> None:
+        """Сохранение прочитанных из БД веществ, если за время чтения БД не менялась"""
+        with self._lock:
+            self._check_external_changes()
+            if self._data_version != version:
+                return
+            for substance in substances:
+                self._store(substance)
+
+    def invalidate(self, substance_ids: Optional[Iterable[Optional[int]]] = None) -> None:
+        """Сброс кэша для указанных ID или целиком"""
+        with self._lock:
+            if substance_ids is None:
+                self._stats.invalidations += len(self._cache)
+                self._cache.clear()
+                return
+            for substance_id in substance_ids:
+                if self._cache.pop(substance_id, None) is not None:
+                    self._stats.invalidations += 1
+
+    def stats(self) -> CacheStats:
+        """Снимок статистики попаданий/промахов"""
+        with self._lock:
+            return CacheStats(self._stats.hits, self._stats.misses, self._stats.evictions,
+                              self._stats.invalidations, len(self._cache))
+
+    def create(self, substance: Substance) -> Optional[int]:
+        with self._own_write(()):
+            return self.repository.create(substance)
+
+    def create_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        with self._own_write(()):
+            return self.repository.create_many(substances)
+
+    def get(self, substance_id: int) -> Optional[Substance]:
+        with self._lock:
+            self._check_external_changes()
+            substance = self._lookup(substance_id)
+            if substance is not None:
+                self._stats.hits += 1
+                return copy.copy(substance)
+            self._stats.misses += 1
+            version = self._data_version
+
+        substance = self.repository.get(substance_id)
+        if substance is not None:
+            self._store_loaded([substance], version)
+        return substance
+
+    def get_many(self, substance_ids: Iterable[int]) -> Dict[int, Substance]:
+        result: Dict[int, Substance] = {}
+        missing: List[int] = []
+        with self._lock:
+            self._check_external_changes()
+            for substance_id in dict.fromkeys(substance_ids):
+                substance = self._lookup(substance_id)
+                if substance is not None:
+                    self._stats.hits += 1
+                    result[substance_id] = copy.copy(substance)
+                else:
+                    self._stats.misses += 1
+                    missing.append(substance_id)
+            version = self._data_version
+
+        if missing:
+            loaded = self.repository.get_many(missing)
+            self._store_loaded(loaded.values(), version)
+            result.update(loaded)
+        return result
+
+    def get_all(self, limit: int = 100, offset: int = 0) -> List[Substance]:
+        return self.repository.get_all(limit, offset)
+
+    def iter_all(self, chunk_size: int = 500) -> Iterator[Substance]:
+        return self.repository.iter_all(chunk_size)
+
+    def update(self, substance: Substance) -> bool:
+        with self._own_write([substance.id]):
+            return self.repository.update(substance)
+
+    def update_many(self, substances: Iterable[Substance]) -> List[bool]:
+        substances = list(substances)
+        with self._own_write(s.id for s in substances):
+            return self.repository.update_many(substances)
+
+    def upsert_many(self, substances: Iterable[Substance]) -> List[Optional[int]]:
+        substances = list(substances)
+        with self._own_write(s.id for s in substances):
+            return self.repository.upsert_many(substances)
+
+    def delete(self, substance_id: int) -> bool:
+        with self._own_write([substance_id]):
+            return self.repository.delete(substance_id)
+
+    def search(self, name: Optional[str] = None, sub_type: Optional[int] = None) -> List[Substance]:
+        return self.repository.search(name, sub_type)
+
+    def iter_search(self, name: Optional[str] = None, sub_type: Optional[int] = None,
+                    chunk_size: int = 500) -> Iterator[Substance]:
+        return self.repository.iter_search(name, sub_type, chunk_size)
+
+    def search_text(self, text: str, limit: int = 50, prefix: bool = False) -> List[Substance]:
+        return self.repository.search_text(text, limit, prefix)
+
+    def load_columns(self, chunk_size: int = 10000) -> ColumnBatch:
+        return self.repository.load_columns(chunk_size)
+
+    @contextmanager
+    def transaction(self):
+        """Общая транзакция; при откате кэш сбрасывается целиком"""
+        try:
+            with self.repository.transaction() as conn:
+                yield conn
+        except BaseException:
+            self.invalidate()
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._version_conn.close()
+        self.repository.close()
+
+    def __enter__(self) -> 'CachedSubstanceRepository':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,154 @@
+import logging
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+from IRA.domain.models.change import ChangeSet
+from IRA.domain.repositories.change_log_repository import ChangeLogRepository
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager, get_connection_manager
+from IRA.infrastructure.database.sqlite.failure_rate_repository import FAILURE_RATE_TABLES
+from IRA.infrastructure.database.sqlite.mapping import EQUIPMENT_MAPPINGS, SUBSTANCES
+from IRA.infrastructure.database.sqlite.sql_script import execute_script
+
+CHANGE_LOG_TABLE = 'change_log'
+CONSUMERS_TABLE = 'change_log_consumers'
+
+# Таблица частот -> таблица оборудования
+_RATE_TABLE_EQUIPMENT = {rate_table: table for table, (rate_table, _) in FAILURE_RATE_TABLES.items()}
+
+
+def _tracked_tables() -> List[Tuple[str, str, Sequence[str]]]:
+    """Отслеживаемые таблицы: (таблица, ключ, колонки данных)"""
+    tables = [(SUBSTANCES.table, SUBSTANCES.key, SUBSTANCES.data_columns)]
+    for mapping in EQUIPMENT_MAPPINGS.values():
+        tables.append((mapping.table, mapping.key, mapping.data_columns))
+    for table, (rate_table, _) in FAILURE_RATE_TABLES.items():
+        tables.append((rate_table, 'rate_id', (EQUIPMENT_MAPPINGS[table].type_column, 'type_id', 'rate_value')))
+    return tables
+
+
+def _triggers_ddl(table: str, key: str, columns: Sequence[str]) -> str:
+    # UPDATE OF только колонок данных: служебные lat/lon пространственного индекса не попадают в журнал
+    log = f"INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id, operation) VALUES ('{table}'"
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_log_ai AFTER INSERT ON {table} BEGIN
+        {log}, new.{key}, 'I');
+    END;
+    CREATE TRIGGER IF NOT EXISTS {table}_log_au AFTER UPDATE OF {key}, {', '.join(columns)} ON {table} BEGIN
+        {log}, old.{key}, 'U');
+        INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id, operation)
+            SELECT '{table}', new.{key}, 'U' WHERE new.{key} IS NOT old.{key};
+    END;
+    CREATE TRIGGER IF NOT EXISTS {table}_log_ad AFTER DELETE ON {table} BEGIN
+        {log}, old.{key}, 'D');
+    END;
+    """
+
+
+def create_change_log(conn: sqlite3.Connection) -> None:
+    """Таблица журнала изменений и триггеры отслеживаемых таблиц.
+
+    Триггеры написаны на чистом SQL, поэтому в журнал попадают и изменения,
+    сделанные сторонними инструментами.
+    """
+    execute_script(conn, f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER,
+        operation TEXT NOT NULL CHECK (operation IN ('I', 'U', 'D'))
+    );
+    """)
+    for table, key, columns in _tracked_tables():
+        execute_script(conn, _triggers_ddl(table, key, columns))
+
+
+def create_change_log_consumers(conn: sqlite3.Connection) -> None:
+    """Ревизии потребителей журнала: записи старше самой ранней из них можно удалять"""
+    execute_script(conn, f"""
+    CREATE TABLE IF NOT EXISTS {CONSUMERS_TABLE} (
+        consumer TEXT PRIMARY KEY,
+        revision INTEGER NOT NULL
+    );
+    """)
+
+
+class SQLiteChangeLogRepository(ChangeLogRepository):
+    """Журнал изменений, заполняемый триггерами БД (см. create_change_log)"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[SQLiteConnectionManager] = None):
+        self.db_path = db_path
+        self.logger = self._setup_logger()
+        self._connections = connection_manager or get_connection_manager(db_path)
+
+    def _setup_logger(self) -> logging.Logger:
+        logger = logging.getLogger(type(self).__name__)
+        logger.setLevel(logging.INFO)
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        return logger
+
+    @property
+    def connection_manager(self) -> SQLiteConnectionManager:
+        return self._connections
+
+    def revision(self) -> int:
+        try:
+            with self._connections.connection() as conn:
+                # Счетчик AUTOINCREMENT не уменьшается и после очистки журнала
+                row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,)).fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading change log revision: {e}")
+            return 0
+
+    def changes_since(self, revision: int) -> ChangeSet:
+        try:
+            with self._connections.connection() as conn:
+                rows = conn.execute(f"SELECT change_id, table_name, row_id FROM {CHANGE_LOG_TABLE} "
+                                    f"WHERE change_id > ? ORDER BY change_id", (revision,)).fetchall()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading change log: {e}")
+            return ChangeSet(revision)
+
+        changes = ChangeSet(rows[-1][0] if rows else revision)
+        for _, table, row_id in rows:
+            if table == SUBSTANCES.table:
+                changes.substances.add(row_id)
+            elif table in EQUIPMENT_MAPPINGS:
+                changes.equipment.setdefault(table, set()).add(row_id)
+            elif table in _RATE_TABLE_EQUIPMENT:
+                changes.failure_rates.add(_RATE_TABLE_EQUIPMENT[table])
+        return changes
+
+    def prune(self, revision: int) -> int:
+        try:
+            with self._connections.transaction() as conn:
+                cursor = conn.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE change_id <= ?", (revision,))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"Error pruning change log: {e}")
+            return 0
+
+    def acknowledge(self, consumer: str, revision: int) -> int:
+        try:
+            with self._connections.transaction() as conn:
+                conn.execute(f"INSERT INTO {CONSUMERS_TABLE} (consumer, revision) VALUES (?, ?) "
+                             f"ON CONFLICT(consumer) DO UPDATE SET revision = excluded.revision", (consumer, revision))
+                cursor = conn.execute(f"DELETE FROM {CHANGE_LOG_TABLE} "
+                                      f"WHERE change_id <= (SELECT min(revision) FROM {CONSUMERS_TABLE})")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"Error acknowledging change log revision: {e}")
+            return 0
+
+    def release(self, consumer: str) -> None:
+        try:
+            with self._connections.transaction() as conn:
+                conn.execute(f"DELETE FROM {CONSUMERS_TABLE} WHERE consumer = ?", (consumer,))
+        except sqlite3.Error as e:
+            self.logger.error(f"Error releasing change log consumer: {e}")
@@ -0,0 +1,81 @@
+import sqlite3
+from typing import Any, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from IRA.domain.models.columns import MISSING_INT, ColumnBatch
+from IRA.infrastructure.database.sqlite.mapping import TableMapping
+
+
+def type_code_sql(mapping: TableMapping, alias: str = '') -> str:
+    """SQL-выражение кода типа оборудования: индекс значения в mapping.type_values или -1"""
+    column = f"{alias}.{mapping.type_column}" if alias else mapping.type_column
+    cases = ' '.join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(mapping.type_values))
+    return f"CASE {column} {cases} ELSE -1 END"
+
+
+def fetch_arrays(cursor: sqlite3.Cursor, width: int, chunk_size: int) -> np.ndarray:
+    """Чтение числового результата запроса в матрицу float64 порциями fetchmany (NULL -> NaN)"""
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.float64))
+    if not chunks:
+        return np.empty((0, width), dtype=np.float64)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+def _to_int(column: np.ndarray) -> np.ndarray:
+    result = np.full(len(column), MISSING_INT, dtype=np.int64)
+    present = ~np.isnan(column)
+    result[present] = column[present]
+    return result
+
+
+def load_column_batch(conn: sqlite3.Connection, mapping: TableMapping, extra_columns: Sequence[str] = (),
+                      conditions: str = "", params: Iterable[Any] = (), chunk_size: int = 10000) -> ColumnBatch:
+    """Столбцовая выборка числовых колонок таблицы без создания объектов модели.
+
+    extra_columns - дополнительные числовые колонки таблицы (например lat/lon),
+    conditions - условия WHERE вида " AND ..." для алиаса t.
+    """
+    columns: List[str] = list(mapping.numeric_columns) + list(extra_columns)
+    select = [f"t.{mapping.key}"] + [f"t.{c}" for c in columns]
+    if mapping.type_column:
+        select.append(type_code_sql(mapping, 't'))
+
+    sql = (f"SELECT {', '.join(select)} FROM {mapping.table} t "
+           f"WHERE 1=1{conditions} ORDER BY t.{mapping.key}")
+    data = fetch_arrays(conn.execute(sql, tuple(params)), len(select), chunk_size)
+
+    arrays = {}
+    for i, name in enumerate(columns, start=1):
+        column = np.ascontiguousarray(data[:, i])
+        arrays[name] = _to_int(column) if name in mapping.int_columns else column
+
+    type_codes = None
+    if mapping.type_column:
+        type_codes = data[:, -1].astype(np.int16)
+
+    return ColumnBatch(
+        table=mapping.table,
+        ids=data[:, 0].astype(np.int64),
+        columns=arrays,
+        type_codes=type_codes,
+        type_labels=mapping.type_values,
+    )
+
+
+def iter_column_values(conn: sqlite3.Connection, mapping: TableMapping, column: str,
+                       chunk_size: int = 10000) -> Iterator[List[Any]]:
+    """Значения одной колонки таблицы порциями fetchmany в порядке ключа (как у load_column_batch)"""
+    if column not in mapping.columns:
+        raise ValueError(f"Unknown {mapping.label} column: {column}")
+    cursor = conn.execute(f"SELECT {column} FROM {mapping.table} ORDER BY {mapping.key}")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield [row[0] for row in rows]
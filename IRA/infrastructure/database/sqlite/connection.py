@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from IRA.infrastructure.database.sqlite import spatial, text_search
+
+_PRAGMA_VALUES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+}
+
+
+def _close_connection(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+class _ThreadConnection:
+    """Соединение потока: хранится в threading.local и закрывается при завершении потока"""
+    __slots__ = ('conn', 'close', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.close = weakref.finalize(self, _close_connection, conn)
+
+
+def _close_connections(connections: 'weakref.WeakSet[_ThreadConnection]', lock: threading.Lock) -> None:
+    with lock:
+        holders = list(connections)
+        connections.clear()
+    for holder in holders:
+        holder.close()
+
+
+class SQLiteConnectionManager:
+    """Менеджер постоянных соединений SQLite: одно соединение на поток.
+
+    Соединения открываются в режиме autocommit, транзакциями управляет
+    transaction(); вложенные transaction() оформляются как SAVEPOINT.
+    """
+
+    def __init__(self, db_path: str, journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+                 cache_size: int = -64000, mmap_size: int = 256 * 1024 * 1024, timeout: float = 5.0):
+        if journal_mode.upper() not in _PRAGMA_VALUES['journal_mode']:
+            raise ValueError(f"Unsupported journal_mode: {journal_mode}")
+        if synchronous.upper() not in _PRAGMA_VALUES['synchronous']:
+            raise ValueError(f"Unsupported synchronous: {synchronous}")
+
+        self.db_path = db_path
+        self.journal_mode = journal_mode.upper()
+        self.synchronous = synchronous.upper()
+        self.cache_size = int(cache_size)
+        self.mmap_size = int(mmap_size)
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Слабые ссылки на соединения потоков: поток владеет своим соединением, менеджер только закрывает их
+        self._connections: 'weakref.WeakSet[_ThreadConnection]' = weakref.WeakSet()
+        self._generation = 0
+        # Подключенные через ATTACH базы: схема -> путь; применяются к соединению каждого потока
+        self._attached: Dict[str, str] = {}
+        # Роль файла и версия схемы после миграции (см. migrations.ensure_schema)
+        self.schema_role: Optional[str] = None
+        self.schema_version: Optional[int] = None
+        # Обработчик SQL-выражений (sqlite3 set_trace_callback), см. instrumentation
+        self._trace: Optional[Callable[[str], None]] = None
+        # Соединения закрываются при сборке менеджера или при завершении интерпретатора
+        self._finalizer = weakref.finalize(self, _close_connections, self._connections, self._lock)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=False)
+        text_search.register_functions(conn)
+        spatial.register_functions(conn)
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        if self._trace is not None:
+            conn.set_trace_callback(self._trace)
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока (создается при первом обращении)"""
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            holder = _ThreadConnection(self._connect())
+            with self._lock:
+                self._connections.add(holder)
+                local.holder = holder
+                local.conn = holder.conn
+                local.generation = self._generation
+                local.depth = 0
+                local.attached = {}
+        if local.attached != self._attached and not local.depth:
+            self._sync_attached(local)
+        return local.conn
+
+    def _sync_attached(self, local) -> None:
+        with self._lock:
+            attached = dict(self._attached)
+        for schema in set(local.attached) - set(attached):
+            local.conn.execute(f"DETACH DATABASE {schema}")
+        for schema, path in attached.items():
+            if local.attached.get(schema) != path:
+                if schema in local.attached:
+                    local.conn.execute(f"DETACH DATABASE {schema}")
+                local.conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        local.attached = attached
+
+    def attach(self, db_path: str, schema: str) -> None:
+        """Подключение другой БД (например, базы веществ) под именем схемы ко всем соединениям.
+
+        Соединения потоков подключают ее при следующем обращении вне транзакции.
+        """
+        if not schema.isidentifier() or schema.lower() in ('main', 'temp'):
+            raise ValueError(f"Invalid schema name: {schema}")
+        with self._lock:
+            self._attached[schema] = os.path.abspath(db_path)
+        self.get_connection()
+
+    def detach(self, schema: str) -> None:
+        """Отключение ранее подключенной БД"""
+        with self._lock:
+            self._attached.pop(schema, None)
+        self.get_connection()
+
+    @property
+    def attached(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._attached)
+
+    def set_trace_callback(self, callback: Optional[Callable[[str], None]]) -> None:
+        """Обработчик выполняемых SQL-выражений для всех соединений (None - отключить)"""
+        with self._lock:
+            self._trace = callback
+            for holder in self._connections:
+                holder.conn.set_trace_callback(callback)
+
+    @contextmanager
+    def connection(self):
+        """Соединение текущего потока для чтения (не закрывается после использования)"""
+        yield self.get_connection()
+
+    @contextmanager
+    def transaction(self):
+        """Транзакция на соединении текущего потока.
+
+        Внешний уровень - BEGIN IMMEDIATE/COMMIT, вложенные - SAVEPOINT/RELEASE,
+        при исключении изменения уровня откатываются.
+        """
+        conn = self.get_connection()
+        local = self._local
+        depth = local.depth
+        savepoint = f"ira_sp_{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            local.depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            local.depth = depth
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+
+    @contextmanager
+    def read_transaction(self):
+        """Согласованное чтение: отложенная транзакция BEGIN/COMMIT на соединении текущего потока.
+
+        Все запросы внутри видят один снимок БД (в режиме WAL писатели не блокируются);
+        внутри уже открытой транзакции новая не начинается.
+        """
+        conn = self.get_connection()
+        local = self._local
+        if local.depth:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            local.depth = 0
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            local.depth = 0
+            conn.execute("COMMIT")
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, 'depth', 0) > 0
+
+    def close(self) -> None:
+        """Закрытие всех соединений; при следующем обращении они будут открыты заново"""
+        with self._lock:
+            self._generation += 1
+        _close_connections(self._connections, self._lock)
+
+    def __enter__(self) -> 'SQLiteConnectionManager':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+_managers: 'weakref.WeakValueDictionary[str, SQLiteConnectionManager]' = weakref.WeakValueDictionary()
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str, **pragmas) -> SQLiteConnectionManager:
+    """Общий менеджер соединений для файла БД.
+
+    Репозитории, открытые на одном файле, используют один менеджер, поэтому
+    transaction() одного репозитория охватывает операции остальных.
+    Параметры PRAGMA учитываются только при создании менеджера.
+    """
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    with _managers_lock:
+        manager: Optional[SQLiteConnectionManager] = _managers.get(key)
+        if manager is None:
+            manager = SQLiteConnectionManager(db_path, **pragmas)
+            _managers[key] = manager
+        return manager
@@ -1,139 +1,181 @@
-# src/infrastructure/database/sqlite/substance_repository.py
+import json
 import sqlite3
-from typing import List, Optional, Dict, Any
-from contextlib import contextmanager
-import logging
-
-from IRA.domain.models.equipment import Tank
-from IRA.domain.repositories.equipment_repository import TankRepository
-
-
-class SQLiteTankRepository(TankRepository):
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self.logger = self._setup_logger()
-
-    def _setup_logger(self) -> logging.Logger:
-        logger = logging.getLogger('SQLiteTankRepository')
-        logger.setLevel(logging.INFO)
-
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-
-        return logger
-
-    @contextmanager
-    def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from IRA.domain.models.columns import ColumnBatch
+from IRA.domain.models.equipment import EquipmentDetails, Tank
+from IRA.domain.models.failure_rate import FULL_RUPTURE, PARTIAL_RUPTURE
+from IRA.domain.models.substance import Substance
+from IRA.domain.repositories.equipment_repository import (
+    CompressorRepository, PipelineRepository, PumpRepository, TankRepository,
+    TechnologicalDeviceRepository, TruckTankRepository,
+)
+from IRA.domain.repositories.substance_repository import SubstanceRepository
+from IRA.infrastructure.database.sqlite.base_repository import SQLiteMappedRepository
+from IRA.infrastructure.database.sqlite.failure_rate_repository import FAILURE_RATE_TABLES
+from IRA.infrastructure.database.sqlite.mapping import (
+    COMPRESSOR, PIPELINE, PUMP, SUBSTANCES, TANK, TECHNOLOGICAL_DEVICES, TRUCK_TANK,
+)
+from IRA.infrastructure.database.sqlite.migrations import PROJECT
+from IRA.infrastructure.database.sqlite.spatial import SpatialIndex
+
+
+class SQLiteEquipmentRepository(SQLiteMappedRepository):
+    """SQLite-репозиторий оборудования: таблица описывается атрибутом mapping"""
+
+    schema_role = PROJECT
+
+    def _initialize_database(self) -> None:
+        self._spatial_index = SpatialIndex(self.mapping.table, self.mapping.key)
+        super()._initialize_database()
+
+    def search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[Any]:
+        conditions, params = self._text_conditions((self.mapping.name_column, name),
+                                                   ('component_enterprise', component_enterprise))
+        return self._fetch(f"{self.mapping.select_sql} WHERE 1=1{conditions}", params)
+
+    def iter_search(self, name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                    chunk_size: int = 500) -> Iterator[Any]:
+        conditions, params = self._text_conditions((self.mapping.name_column, name),
+                                                   ('component_enterprise', component_enterprise))
+        return self._iter_pages(conditions, params, chunk_size)
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Any]:
+        return self._fetch(*self._spatial_index.bbox_query(self.mapping.select_t_list,
+                                                           min_lat, min_lon, max_lat, max_lon))
+
+    def within_radius(self, lat: float, lon: float, meters: float) -> List[Any]:
+        return self._fetch(*self._spatial_index.radius_query(self.mapping.select_t_list, lat, lon, meters))
+
+    def load_columns(self, substances: Optional[SubstanceRepository] = None, chunk_size: int = 10000,
+                     equipment_ids: Optional[Iterable[int]] = None) -> ColumnBatch:
+        if equipment_ids is None:
+            batch = self._load_columns(('lat', 'lon'), chunk_size=chunk_size)
+        else:
+            # Список ID одним параметром: размер выборки не ограничен числом переменных SQLite
+            condition = f" AND t.{self.mapping.key} IN (SELECT value FROM json_each(?))"
+            batch = self._load_columns(('lat', 'lon'), condition, (json.dumps(list(equipment_ids)),), chunk_size)
+        if substances is not None:
+            batch.substance = substances.load_columns(chunk_size).take(batch['sub_id'])
+        return batch
+
+    def _details_sql(self, substance_schema: str) -> str:
+        """SELECT оборудования с веществом и частотами полного и частичного разрушения"""
+        if not substance_schema.isidentifier():
+            raise ValueError(f"Invalid schema name: {substance_schema}")
+
+        mapping = self.mapping
+        rate_table, _ = FAILURE_RATE_TABLES[mapping.table]
+        type_column = mapping.type_column
+        substance_list = ', '.join(f"s.{c}" for c in SUBSTANCES.columns)
+        return (f"SELECT {mapping.select_t_list}, {substance_list}, f1.rate_value, f2.rate_value "
+                f"FROM {mapping.table} t "
+                f"LEFT JOIN {substance_schema}.{SUBSTANCES.table} s ON s.{SUBSTANCES.key} = t.sub_id "
+                f"LEFT JOIN {rate_table} f1 ON f1.{type_column} = t.{type_column} AND f1.type_id = {FULL_RUPTURE} "
+                f"LEFT JOIN {rate_table} f2 ON f2.{type_column} = t.{type_column} AND f2.type_id = {PARTIAL_RUPTURE}")
+
+    def _details_from_rows(self, rows: Sequence[Sequence[Any]],
+                           shared: Optional[Dict[int, Substance]]) -> List[EquipmentDetails]:
+        model = self.mapping.model
+        equipment_end = len(self.mapping.columns)
+        substance_end = equipment_end + len(SUBSTANCES.columns)
+        result = []
+        for row in rows:
+            substance_id = row[equipment_end]
+            if substance_id is None:
+                substance = None
+            elif shared is None:
+                substance = Substance(*row[equipment_end:substance_end])
+            else:
+                substance = shared.get(substance_id)
+                if substance is None:
+                    substance = shared[substance_id] = Substance(*row[equipment_end:substance_end])
+
+            full, partial = row[substance_end], row[substance_end + 1]
+            rates = {}
+            if full is not None:
+                rates[FULL_RUPTURE] = full
+            if partial is not None:
+                rates[PARTIAL_RUPTURE] = partial
+            result.append(EquipmentDetails(model(*row[:equipment_end]), substance, rates))
+        return result
+
+    def get_details(self, equipment_ids: Optional[Iterable[int]] = None, substance_schema: str = 'main',
+                    share_substances: bool = True) -> List[EquipmentDetails]:
+        sql = self._details_sql(substance_schema)
+        key = self.mapping.key
+        shared: Optional[Dict[int, Substance]] = {} if share_substances else None
         try:
-            yield conn
-        finally:
-            conn.close()
-
-    def _row_to_tank(self, row: sqlite3.Row) -> Tank:
-        """Конвертация строки БД в объект Tank"""
-        return Tank(**dict(row))
-
-    def _tank_to_dict(self, tank: Tank) -> Dict[str, Any]:
-        """Конвертация объекта Tank в словарь для БД"""
-        data = tank.__dict__.copy()
-        if 'id' in data and data['id'] is None:
-            del data['id']
-        return data
-
-    def create(self, tank: Tank) -> Optional[int]:
-        if not tank.validate():
-            self.logger.error("Validation failed for Tank")
-            return None
-
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            data = self._tank_to_dict(tank)
-
-            placeholders = ', '.join(['?'] * len(data))
-            columns = ', '.join(data.keys())
-            values = tuple(data.values())
-
-            sql = f"INSERT INTO Tank ({columns}) VALUES ({placeholders})"
-
+            with self._get_connection() as conn:
+                if equipment_ids is None:
+                    return self._details_from_rows(conn.execute(f"{sql} ORDER BY t.{key}").fetchall(), shared)
+
+                equipment_ids = list(dict.fromkeys(equipment_ids))
+                result = []
+                for start in range(0, len(equipment_ids), self._batch_size):
+                    chunk = equipment_ids[start:start + self._batch_size]
+                    rows = conn.execute(f"{sql} WHERE t.{key} IN ({', '.join(['?'] * len(chunk))}) "
+                                        f"ORDER BY t.{key}", chunk).fetchall()
+                    result.extend(self._details_from_rows(rows, shared))
+                return result
+        except sqlite3.Error as e:
+            self.logger.error(f"Error loading {self.mapping.label} details: {e}")
+            return []
+
+    def iter_details(self, chunk_size: int = 500, substance_schema: str = 'main',
+                     share_substances: bool = True) -> Iterator[EquipmentDetails]:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        key = self.mapping.key
+        sql = f"{self._details_sql(substance_schema)} WHERE t.{key} > ? ORDER BY t.{key} LIMIT ?"
+        shared: Optional[Dict[int, Substance]] = {} if share_substances else None
+        last_id = -(2 ** 63)
+        while True:
             try:
-                cursor.execute(sql, values)
-                conn.commit()
-                return cursor.lastrowid
+                with self._get_connection() as conn:
+                    rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
             except sqlite3.Error as e:
-                self.logger.error(f"Error creating Tank: {e}")
-                return None
+                self.logger.error(f"Error loading {self.mapping.label} details: {e}")
+                return
+            yield from self._details_from_rows(rows, shared)
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+
+class SQLiteTankRepository(SQLiteEquipmentRepository, TankRepository):
+    mapping = TANK
 
     def get(self, tank_id: int) -> Optional[Tank]:
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM Tank WHERE tank_id = ?", (tank_id,))
-            row = cursor.fetchone()
+        return super().get(tank_id)
 
-            if row:
-                return self._row_to_tank(row)
-            return None
+    def delete(self, tank_id: int) -> bool:
+        return super().delete(tank_id)
 
-    def get_all(self, limit: int = 100, offset: int = 0) -> List[Tank]:
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM Tank LIMIT ? OFFSET ?", (limit, offset))
-            return [self._row_to_tank(row) for row in cursor.fetchall()]
+    def search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[Tank]:
+        return super().search(tank_name, component_enterprise)
 
-    def update(self, tank: Tank) -> bool:
-        if not tank.validate():
-            self.logger.error("Validation failed for tank")
-            return False
+    def iter_search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None,
+                    chunk_size: int = 500) -> Iterator[Tank]:
+        return super().iter_search(tank_name, component_enterprise, chunk_size)
 
-        if tank.tank_id is None:
-            self.logger.error("Cannot update substance without id")
-            return False
 
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            data = self._tank_to_dict(tank)
+class SQLitePipelineRepository(SQLiteEquipmentRepository, PipelineRepository):
+    mapping = PIPELINE
 
-            set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
-            values = tuple(data.values()) + (tank.tank_id,)
 
-            sql = f"UPDATE Tank SET {set_clause} WHERE tank_id = ?"
+class SQLitePumpRepository(SQLiteEquipmentRepository, PumpRepository):
+    mapping = PUMP
 
-            try:
-                cursor.execute(sql, values)
-                conn.commit()
-                return cursor.rowcount > 0
-            except sqlite3.Error as e:
-                self.logger.error(f"Error updating tank: {e}")
-                return False
 
-    def delete(self, tank_id: int) -> bool:
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute("DELETE FROM Tank WHERE tank_id = ?", (tank_id,))
-                conn.commit()
-                return cursor.rowcount > 0
-            except sqlite3.Error as e:
-                self.logger.error(f"Error deleting substance: {e}")
-                return False
+class SQLiteCompressorRepository(SQLiteEquipmentRepository, CompressorRepository):
+    mapping = COMPRESSOR
 
-    def search(self, tank_name: Optional[str] = None, component_enterprise: Optional[str] = None) -> List[Tank]:
-        query = "SELECT * FROM Tank WHERE 1=1"
-        params = []
 
-        if tank_name:
-            query += " AND tank_name LIKE ?"
-            params.append(f"%{tank_name}%")
+class SQLiteTechnologicalDeviceRepository(SQLiteEquipmentRepository, TechnologicalDeviceRepository):
+    mapping = TECHNOLOGICAL_DEVICES
 
-        if component_enterprise:
-            query += " AND component_enterprise LIKE ?"
-            params.append(f"%{component_enterprise}%")
 
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return [self._row_to_tank(row) for row in cursor.fetchall()]
+class SQLiteTruckTankRepository(SQLiteEquipmentRepository, TruckTankRepository):
+    mapping = TRUCK_TANK
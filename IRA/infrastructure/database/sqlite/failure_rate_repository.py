@@ -0,0 +1,93 @@
+import logging
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from IRA.domain.models.failure_rate import FULL_RUPTURE, PARTIAL_RUPTURE, FailureRates
+from IRA.domain.repositories.failure_rate_repository import FailureRateRepository
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager, get_connection_manager
+from IRA.infrastructure.database.sqlite.mapping import EQUIPMENT_MAPPINGS
+
+# Таблица оборудования -> (таблица частот, колонка длины для частот на метр)
+FAILURE_RATE_TABLES: Dict[str, Tuple[str, Optional[str]]] = {
+    'Tank': ('Tank_failure_rate', None),
+    'Pipeline': ('Pipeline_failure_rate', 'length_meters'),
+    'Pump': ('Pump_failure_rate', None),
+    'Compressor': ('Comp_failure_rate', None),
+    'Technological_devices': ('Device_failure_rate', None),
+    'Truck_tank': ('Truck_tank_failure_rate', None),
+}
+
+
+class SQLiteFailureRateRepository(FailureRateRepository):
+    """Справочник частот разгерметизации из таблиц *_failure_rate.
+
+    Строки матрицы частот упорядочены как type_values описания таблицы оборудования,
+    поэтому коды типов ColumnBatch.type_codes служат индексами матрицы напрямую.
+    """
+
+    def __init__(self, db_path: str, connection_manager: Optional[SQLiteConnectionManager] = None):
+        self.db_path = db_path
+        self.logger = self._setup_logger()
+        self._connections = connection_manager or get_connection_manager(db_path)
+
+    def _setup_logger(self) -> logging.Logger:
+        logger = logging.getLogger(type(self).__name__)
+        logger.setLevel(logging.INFO)
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        return logger
+
+    @property
+    def connection_manager(self) -> SQLiteConnectionManager:
+        return self._connections
+
+    def get_depressurization_types(self) -> Dict[int, str]:
+        try:
+            with self._connections.connection() as conn:
+                rows = conn.execute("SELECT type_id, type_name FROM Depressurization_type ORDER BY type_id").fetchall()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error loading depressurization types: {e}")
+            return {}
+        return dict(rows)
+
+    def get_rates(self, table: str) -> Optional[FailureRates]:
+        if table not in FAILURE_RATE_TABLES:
+            self.logger.error(f"No failure rate table for {table}")
+            return None
+
+        mapping = EQUIPMENT_MAPPINGS[table]
+        rate_table, length_column = FAILURE_RATE_TABLES[table]
+        try:
+            with self._connections.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {mapping.type_column}, type_id, rate_value FROM {rate_table}").fetchall()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error loading {rate_table}: {e}")
+            return None
+
+        type_ids = tuple(sorted({FULL_RUPTURE, PARTIAL_RUPTURE} | {row[1] for row in rows}))
+        rates = np.full((len(mapping.type_values), len(type_ids)), np.nan, dtype=np.float64)
+        for type_label, type_id, rate_value in rows:
+            if type_label not in mapping.type_values:
+                self.logger.warning(f"Unknown {mapping.type_column} '{type_label}' in {rate_table}")
+                continue
+            rates[mapping.type_values.index(type_label), type_ids.index(type_id)] = rate_value
+
+        if not rows:
+            self.logger.warning(f"{rate_table} is empty, {table} scenario frequencies are undefined")
+        return FailureRates(table, mapping.type_values, type_ids, rates, length_column)
+
+    def get_all(self) -> Dict[str, FailureRates]:
+        result = {}
+        for table in FAILURE_RATE_TABLES:
+            rates = self.get_rates(table)
+            if rates is not None:
+                result[table] = rates
+        return result
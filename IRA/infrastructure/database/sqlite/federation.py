@@ -0,0 +1,395 @@
+import heapq
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import islice
+from operator import attrgetter
+from typing import IO, Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.request import pathname2url
+
+from IRA.infrastructure.database.sqlite import spatial, text_search
+from IRA.infrastructure.database.sqlite.mapping import EQUIPMENT_MAPPINGS, SUBSTANCES
+from IRA.infrastructure.database.sqlite.spatial import SpatialIndex, _coordinate_sql, _lon_range, _lon_sql, radius_bbox
+
+# Запрос к одной БД: SQL с параметрами или функция, строящая их по соединению (схема БД может отличаться)
+Statement = Union[str, Callable[[sqlite3.Connection], Tuple[str, Sequence[Any]]]]
+
+SUBSTANCE_SCHEMA = 'ira_substances'
+
+
+def open_read_only(db_path: str, timeout: float = 5.0, immutable: bool = False,
+                   mmap_size: int = 256 * 1024 * 1024) -> sqlite3.Connection:
+    """Соединение с БД проекта только для чтения: файл не создается и не изменяется, миграции не выполняются.
+
+    immutable - для архивных файлов, которые гарантированно не меняются: SQLite не ставит блокировок
+    """
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, timeout=timeout, isolation_level=None, check_same_thread=False)
+    try:
+        text_search.register_functions(conn)
+        spatial.register_functions(conn)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+@dataclass
+class ProjectTiming:
+    """Замер запроса к одной БД проекта: время в потоках пула (открытие, запрос, чтение порций), с"""
+    path: str
+    seconds: float = 0.0
+    rows: int = 0
+    chunks: int = 0
+    error: Optional[str] = None
+
+
+class ProjectRow(NamedTuple):
+    """Строка результата с путем БД проекта"""
+    project: str
+    row: Tuple[Any, ...]
+
+
+class FleetEquipment(NamedTuple):
+    """Оборудование из БД проекта; distance - расстояние до точки запроса, м (None без отбора по радиусу)"""
+    project: str
+    equipment: Any
+    distance: Optional[float]
+
+
+class _ProjectStream:
+    """Результат запроса к одной БД, читаемый порциями; порции запрашиваются из потоков пула по одной"""
+
+    def __init__(self, fleet: 'ProjectFleet', path: str, statement: Statement, params: Sequence[Any],
+                 convert: Callable[[str, Tuple[Any, ...]], Any]):
+        self.fleet = fleet
+        self.path = path
+        self.statement = statement
+        self.params = params
+        self.convert = convert
+        self.timing = ProjectTiming(path)
+        self.finished = False
+        self.future: Optional[Future] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor: Optional[sqlite3.Cursor] = None
+
+    def fetch(self) -> List[Any]:
+        chunk_size = self.fleet.chunk_size
+        started = time.perf_counter()
+        try:
+            if self._cursor is None:
+                self._conn = self.fleet.connect(self.path)
+                if callable(self.statement):
+                    sql, params = self.statement(self._conn)
+                else:
+                    sql, params = self.statement, self.params
+                self._cursor = self._conn.execute(sql, params)
+            rows = self._cursor.fetchmany(chunk_size)
+            items = [self.convert(self.path, row) for row in rows]
+        except sqlite3.Error as e:
+            self.fleet.logger.error(f"Error querying project {self.path}: {e}")
+            self.timing.error = str(e)
+            rows = items = []
+        if len(rows) < chunk_size:
+            self.close()
+        self.timing.seconds += time.perf_counter() - started
+        self.timing.rows += len(items)
+        self.timing.chunks += 1
+        return items
+
+    def close(self) -> None:
+        self.finished = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = self._cursor = None
+
+
+class FleetScan:
+    """Потоковый результат запроса по БД проектов.
+
+    Строки выдаются порциями по мере готовности; у каждой БД в работе не больше
+    одной порции (следующая читается, пока обрабатывается текущая), поэтому
+    память ограничена числом БД и размером порции. Одновременно открыто не
+    больше max_workers БД. С ключом сортировки отсортированные в каждой БД
+    результаты сливаются heapq.merge группами по max_workers БД: все группы,
+    кроме последней, до выдачи первой строки сливаются во временные файлы
+    (отсортированные прогоны, строки должны сериализоваться pickle), затем
+    прогоны и последняя группа сливаются в общий порядок.
+    timings - замеры по БД в порядке путей, elapsed - общее время обхода, с.
+    """
+
+    def __init__(self, fleet: 'ProjectFleet', streams: List[_ProjectStream], key: Optional[Callable[[Any], Any]],
+                 reverse: bool):
+        self.fleet = fleet
+        self.timings: List[ProjectTiming] = [stream.timing for stream in streams]
+        self.elapsed = 0.0
+        self._streams = streams
+        self._rows = self._iterate(key, reverse)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._rows)
+
+    @property
+    def busy(self) -> float:
+        """Суммарное время запросов по всем БД; busy / elapsed - достигнутый параллелизм"""
+        return sum(timing.seconds for timing in self.timings)
+
+    @property
+    def errors(self) -> List[ProjectTiming]:
+        return [timing for timing in self.timings if timing.error is not None]
+
+    def _submit(self, stream: _ProjectStream) -> Future:
+        stream.future = self.fleet.executor.submit(stream.fetch)
+        return stream.future
+
+    def _merge(self, streams: List[_ProjectStream], key: Callable[[Any], Any], reverse: bool) -> Iterator[Any]:
+        def rows(stream: _ProjectStream) -> Iterator[Any]:
+            while True:
+                chunk = stream.future.result()
+                # Следующая порция читается в пуле, пока слияние разбирает текущую
+                stream.future = None if stream.finished else self._submit(stream)
+                yield from chunk
+                if stream.future is None:
+                    return
+
+        for stream in streams:
+            self._submit(stream)
+        yield from heapq.merge(*(rows(stream) for stream in streams), key=key, reverse=reverse)
+
+    def _spill(self, streams: List[_ProjectStream], key: Callable[[Any], Any], reverse: bool,
+               file: IO[bytes]) -> Iterator[Any]:
+        """Слияние группы БД в отсортированный прогон во временном файле; БД группы к возврату закрыты"""
+        rows = self._merge(streams, key, reverse)
+        while True:
+            chunk = list(islice(rows, self.fleet.chunk_size))
+            if not chunk:
+                break
+            pickle.dump(chunk, file, pickle.HIGHEST_PROTOCOL)
+        file.seek(0)
+        return self._read_run(file)
+
+    @staticmethod
+    def _read_run(file: IO[bytes]) -> Iterator[Any]:
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                return
+            yield from chunk
+
+    def _ordered(self, key: Callable[[Any], Any], reverse: bool) -> Iterator[Any]:
+        limit = self.fleet.max_workers
+        groups = [self._streams[start:start + limit] for start in range(0, len(self._streams), limit)]
+        if not groups:
+            return
+        with ExitStack() as files:
+            sources = [self._spill(group, key, reverse, files.enter_context(tempfile.TemporaryFile()))
+                       for group in groups[:-1]]
+            sources.append(self._merge(groups[-1], key, reverse))
+            yield from heapq.merge(*sources, key=key, reverse=reverse)
+
+    def _unordered(self) -> Iterator[Any]:
+        pending = deque(self._streams)
+        running = {}
+        while pending or running:
+            while pending and len(running) < self.fleet.max_workers:
+                stream = pending.popleft()
+                running[self._submit(stream)] = stream
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stream = running.pop(future)
+                stream.future = None
+                if not stream.finished:
+                    running[self._submit(stream)] = stream
+                yield from future.result()
+
+    def _iterate(self, key: Optional[Callable[[Any], Any]], reverse: bool) -> Iterator[Any]:
+        started = time.perf_counter()
+        try:
+            yield from self._ordered(key, reverse) if key is not None else self._unordered()
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self.close()
+
+    def close(self) -> None:
+        """Прекращение обхода: незапущенные порции отменяются, выполняющиеся дочитываются, БД закрываются"""
+        futures = [stream.future for stream in self._streams if stream.future is not None]
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        for stream in self._streams:
+            stream.future = None
+            stream.close()
+
+    def __enter__(self) -> 'FleetScan':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._rows.close()
+
+
+class ProjectFleet:
+    """Запросы к множеству БД проектов (файл на объект) только для чтения.
+
+    Каждая БД открывается отдельным соединением в режиме mode=ro без миграций,
+    запросы к БД выполняются пулом из max_workers потоков (SQLite освобождает
+    GIL на время выполнения запроса). БД, запрос к которой завершился ошибкой,
+    пропускается с записью в журнал и в ProjectTiming.error.
+    substances_path - общая БД веществ, подключаемая к каждому проекту
+    (по умолчанию вещества берутся из БД проекта).
+    """
+
+    def __init__(self, paths: Iterable[str], max_workers: Optional[int] = None, chunk_size: int = 500,
+                 substances_path: Optional[str] = None, immutable: bool = False, timeout: float = 5.0):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be positive")
+
+        self.paths = list(paths)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.substances_path = substances_path
+        self.immutable = immutable
+        self.timeout = timeout
+        self.logger = self._setup_logger()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _setup_logger(self) -> logging.Logger:
+        logger = logging.getLogger(type(self).__name__)
+        logger.setLevel(logging.INFO)
+
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+
+        return logger
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix=type(self).__name__)
+        return self._executor
+
+    @property
+    def substance_schema(self) -> str:
+        return SUBSTANCE_SCHEMA if self.substances_path else 'main'
+
+    def connect(self, db_path: str) -> sqlite3.Connection:
+        """Соединение только для чтения с БД проекта (и подключенной БД веществ)"""
+        conn = open_read_only(db_path, self.timeout, self.immutable)
+        if self.substances_path:
+            uri = f"file:{pathname2url(os.path.abspath(self.substances_path))}?mode=ro"
+            try:
+                conn.execute(f"ATTACH DATABASE ? AS {SUBSTANCE_SCHEMA}", (uri,))
+            except sqlite3.Error:
+                conn.close()
+                raise
+        return conn
+
+    def scan(self, statement: Statement, params: Sequence[Any] = (), key: Optional[Callable[[Any], Any]] = None,
+             reverse: bool = False, convert: Optional[Callable[[str, Tuple[Any, ...]], Any]] = None) -> FleetScan:
+        """Выполнение запроса в каждой БД; строки (по умолчанию ProjectRow) выдаются потоком.
+
+        С key результаты сливаются в общем порядке - запрос должен сортировать строки по тому же ключу.
+        """
+        convert = convert or ProjectRow
+        streams = [_ProjectStream(self, path, statement, params, convert) for path in self.paths]
+        return FleetScan(self, streams, key, reverse)
+
+    def equipment(self, table: str, types: Optional[Iterable[str]] = None,
+                  substance_classes: Optional[Iterable[int]] = None,
+                  near: Optional[Tuple[float, float, float]] = None, order_by: Optional[str] = None,
+                  reverse: bool = False) -> FleetScan:
+        """Оборудование таблицы по всем проектам как FleetEquipment.
+
+        types - типы оборудования (колонка типа таблицы), substance_classes - классы опасности вещества,
+        near - (широта, долгота, радиус в м). Результат упорядочен по колонке order_by, а при отборе по
+        радиусу без order_by - по расстоянию; без того и другого строки выдаются по мере готовности.
+        В БД без R*Tree (исходная схема db_eg.db) координаты разбираются из текстовой колонки.
+        """
+        mapping = EQUIPMENT_MAPPINGS.get(table)
+        if mapping is None:
+            raise ValueError(f"Unknown equipment table: {table}")
+        if order_by is not None and order_by not in mapping.columns:
+            raise ValueError(f"Unknown {mapping.label} column: {order_by}")
+
+        types = list(types) if types is not None else None
+        classes = list(substance_classes) if substance_classes is not None else None
+        substance_schema = self.substance_schema
+        model = mapping.model
+
+        def statement(conn: sqlite3.Connection) -> Tuple[str, List[Any]]:
+            params: List[Any] = []
+            if near is None:
+                sql = f"SELECT {mapping.select_t_list}, NULL FROM {mapping.table} t WHERE 1=1"
+            else:
+                lat, lon, meters = near
+                min_lat, min_lon, max_lat, max_lon = radius_bbox(lat, lon, meters)
+                index = SpatialIndex(mapping.table, mapping.key)
+                select = f"{mapping.select_t_list}, ira_haversine(t.lat, t.lon, ?, ?)"
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (index.rtree_table,)).fetchone():
+                    sql, params = index.bbox_query(select, min_lat, min_lon, max_lat, max_lon)
+                else:
+                    min_lon, max_lon, crosses = _lon_range(min_lon, max_lon)
+                    sql = (f"SELECT {select} FROM (SELECT *, {_coordinate_sql('coordinate', 0)} AS lat, "
+                           f"{_coordinate_sql('coordinate', 1)} AS lon FROM {mapping.table}) t "
+                           f"WHERE t.lat BETWEEN ? AND ? AND {_lon_sql('t.lon', 't.lon', crosses)}")
+                    params = [min_lat, max_lat, min_lon, max_lon]
+                params = [lat, lon] + params
+                sql += " AND ira_haversine(t.lat, t.lon, ?, ?) <= ?"
+                params += [lat, lon, meters]
+            if types is not None:
+                sql += f" AND t.{mapping.type_column} IN (SELECT value FROM json_each(?))"
+                params.append(json.dumps(types))
+            if classes is not None:
+                sql += (f" AND t.sub_id IN (SELECT {SUBSTANCES.key} FROM {substance_schema}.{SUBSTANCES.table} "
+                        f"WHERE class_substance IN (SELECT value FROM json_each(?)))")
+                params.append(json.dumps(classes))
+            if order_by is not None:
+                sql += f" ORDER BY t.{order_by}{' DESC' if reverse else ''}"
+            elif near is not None:
+                sql += f" ORDER BY ira_haversine(t.lat, t.lon, ?, ?){' DESC' if reverse else ''}"
+                params += [near[0], near[1]]
+            return sql, params
+
+        def convert(project: str, row: Tuple[Any, ...]) -> FleetEquipment:
+            return FleetEquipment(project, model(*row[:-1]), row[-1])
+
+        key = None
+        if order_by is not None:
+            value = attrgetter(f"equipment.{order_by}")
+            # NULL в SQLite меньше любого значения
+            key = lambda item: (value(item) is not None, value(item))  # noqa: E731
+        elif near is not None:
+            key = attrgetter('distance')
+        return self.scan(statement, key=key, reverse=reverse, convert=convert)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> 'ProjectFleet':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,287 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+# Верхние границы интервалов гистограммы задержек: 1 мкс * 2^i, последний интервал открыт
+_BUCKET_COUNT = 28
+_MAX_STATEMENTS = 20
+
+
+@dataclass
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими (по основанию 2) интервалами от 1 мкс"""
+    counts: List[int] = field(default_factory=lambda: [0] * _BUCKET_COUNT)
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        micros = int(seconds * 1e6)
+        self.counts[min(micros.bit_length(), _BUCKET_COUNT - 1)] += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, p: float) -> float:
+        """Оценка перцентиля сверху: граница интервала, в который он попадает, с"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = p / 100.0 * count
+        seen = 0
+        for i, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min((1 << i) * 1e-6, self.maximum)
+        return self.maximum
+
+
+@dataclass
+class MethodStats:
+    """Статистика вызовов одного метода репозитория"""
+    calls: int = 0
+    errors: int = 0
+    rows: int = 0
+    statements: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'statements': self.statements,
+            'total_s': latency.total,
+            'mean_s': latency.total / self.calls if self.calls else 0.0,
+            'p50_s': latency.percentile(50),
+            'p95_s': latency.percentile(95),
+            'p99_s': latency.percentile(99),
+            'max_s': latency.maximum,
+            'histogram': latency.counts,
+        }
+
+
+@dataclass
+class SlowCall:
+    """Запись журнала медленных вызовов"""
+    method: str
+    seconds: float
+    rows: Optional[int]
+    statements: List[str]
+    plans: Dict[str, List[str]]
+
+
+class _ActiveCall:
+    __slots__ = ('statements', 'statement_count')
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.statement_count = 0
+
+
+def _row_count(result: Any) -> Optional[int]:
+    """Число возвращенных записей: длина коллекции, 1 для объекта, None для результатов записи"""
+    if result is None:
+        return 0
+    if isinstance(result, (bool, int)):
+        return None
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+class Instrumentation:
+    """Подключаемая инструментовка SQLite-репозиториев.
+
+    attach() заменяет методы интерфейса репозитория обертками на уровне
+    экземпляра и устанавливает set_trace_callback на соединения его
+    менеджера: SQL-выражения относятся к выполняющемуся в потоке методу.
+    Для вызовов дольше slow_threshold в журнал пишутся выражения и
+    EXPLAIN QUERY PLAN. Репозитории без attach() работают без накладных расходов.
+    """
+
+    def __init__(self, slow_threshold: float = 0.1, explain: bool = True, slow_log_size: int = 100,
+                 logger: Optional[logging.Logger] = None):
+        self.slow_threshold = slow_threshold
+        self.explain = explain
+        self.logger = logger or logging.getLogger(type(self).__name__)
+        self.stats: Dict[str, MethodStats] = {}
+        self.slow_log: Deque[SlowCall] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._attached: Dict[int, Any] = {}
+
+    def _stack(self) -> List[_ActiveCall]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _trace(self, statement: str) -> None:
+        # Тела триггеров приходят строками "-- TRIGGER ..." - они часть вызвавшего выражения
+        if statement.startswith('--'):
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            call = stack[-1]
+            call.statement_count += 1
+            # Для журнала хранятся первые различные выражения; executemany и шаги виртуальных
+            # таблиц повторяют одно и то же выражение
+            if len(call.statements) < _MAX_STATEMENTS and statement not in call.statements:
+                call.statements.append(statement)
+
+    @staticmethod
+    def _interface_methods(repository: Any) -> List[str]:
+        names = set()
+        for klass in type(repository).__mro__:
+            names.update(getattr(klass, '__abstractmethods__', ()))
+        return sorted(name for name in names if not name.startswith('_'))
+
+    def attach(self, *repositories: Any) -> 'Instrumentation':
+        """Инструментовка методов интерфейса репозиториев и SQL их менеджеров соединений"""
+        for repository in repositories:
+            if id(repository) in self._attached:
+                continue
+            label = type(repository).__name__
+            for name in self._interface_methods(repository):
+                method = getattr(repository, name)
+                setattr(repository, name, self._wrap(f"{label}.{name}", method, repository))
+            repository.connection_manager.set_trace_callback(self._trace)
+            self._attached[id(repository)] = repository
+        return self
+
+    def detach(self, *repositories: Any) -> None:
+        """Снятие инструментовки (все репозитории, если не указаны)"""
+        for repository in repositories or list(self._attached.values()):
+            if self._attached.pop(id(repository), None) is None:
+                continue
+            for name in self._interface_methods(repository):
+                repository.__dict__.pop(name, None)
+            manager = repository.connection_manager
+            if not any(r.connection_manager is manager for r in self._attached.values()):
+                manager.set_trace_callback(None)
+
+    def _wrap(self, name: str, method: Callable, repository: Any) -> Callable:
+        if inspect.isasyncgenfunction(method) or inspect.iscoroutinefunction(method):
+            raise TypeError(f"Cannot instrument asynchronous method {name}")
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            call = _ActiveCall()
+            stack.append(call)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                stack.pop()
+                self._record(name, repository, call, time.perf_counter() - start, None, error=True)
+                raise
+            stack.pop()
+            if inspect.isgenerator(result):
+                return self._wrap_iterator(name, repository, result)
+            self._record(name, repository, call, time.perf_counter() - start, _row_count(result))
+            return result
+        return wrapper
+
+    def _wrap_iterator(self, name: str, repository: Any, iterator: Iterable[Any]):
+        """Потоковые методы: время и строки учитываются за весь обход"""
+        stack = self._stack()
+        call = _ActiveCall()
+        elapsed = 0.0
+        rows = 0
+        error = False
+        iterator = iter(iterator)
+        try:
+            while True:
+                stack.append(call)
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    elapsed += time.perf_counter() - start
+                    stack.pop()
+                rows += 1
+                yield item
+        finally:
+            self._record(name, repository, call, elapsed, rows, error)
+
+    def _record(self, name: str, repository: Any, call: _ActiveCall, seconds: float,
+                rows: Optional[int], error: bool = False) -> None:
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = MethodStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.rows += rows or 0
+            stats.statements += call.statement_count
+            stats.latency.add(seconds)
+
+        if seconds >= self.slow_threshold:
+            plans = self._explain(repository, call.statements) if self.explain else {}
+            self.slow_log.append(SlowCall(name, seconds, rows, list(call.statements), plans))
+            details = ''.join(f"\n  {s}" + ''.join(f"\n    {p}" for p in plans.get(s, ()))
+                              for s in call.statements)
+            self.logger.warning(f"Slow call {name}: {seconds * 1000:.1f} ms, rows={rows}, "
+                                f"statements={call.statement_count}{details}")
+
+    def _explain(self, repository: Any, statements: List[str]) -> Dict[str, List[str]]:
+        plans: Dict[str, List[str]] = {}
+        conn = repository.connection_manager.get_connection()
+        # Собственные EXPLAIN не должны учитываться во внешнем вызове
+        stack = self._stack()
+        stack.append(_ActiveCall())
+        try:
+            for statement in statements:
+                plan = self._plan(conn, statement)
+                if plan is not None:
+                    plans[statement] = plan
+        finally:
+            stack.pop()
+        return plans
+
+    @staticmethod
+    def _plan(conn, statement: str) -> Optional[List[str]]:
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+            return None
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+        except Exception as e:
+            return [f"(plan unavailable: {e})"]
+        return [row[-1] for row in rows]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика по методам в виде словаря (для JSON)"""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self.stats.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats.clear()
+            self.slow_log.clear()
+
+    def report(self) -> str:
+        """Текстовая таблица: вызовы, строки, выражения и задержки по методам"""
+        lines = [f"{'method':<48} {'calls':>7} {'rows':>9} {'stmts':>8} {'total ms':>10} "
+                 f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for name, s in self.snapshot().items():
+            lines.append(f"{name:<48} {s['calls']:>7} {s['rows']:>9} {s['statements']:>8} "
+                         f"{s['total_s'] * 1000:>10.2f} {s['p50_s'] * 1000:>8.3f} {s['p95_s'] * 1000:>8.3f} "
+                         f"{s['max_s'] * 1000:>8.3f}")
+        return '\n'.join(lines)
@@ -0,0 +1,93 @@
+from dataclasses import fields
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from IRA.domain.models.equipment import (
+    COMPRESSOR_TYPES, DEVICE_TYPES, PIPELINE_DIAMETER_CATEGORIES, PUMP_TYPES, TANK_TYPES, TRUCK_TANK_PRESSURE_TYPES,
+    Compressor, Pipeline, Pump, Tank, TechnologicalDevice, TruckTank,
+)
+from IRA.domain.models.substance import Substance
+
+
+class TableMapping:
+    """Декларативное описание соответствия модели и таблицы БД.
+
+    Порядок колонок совпадает с порядком полей модели (первое поле - ключ),
+    поэтому строки БД превращаются в объекты позиционно: model(*row).
+    Все SQL-выражения строятся один раз при создании описания.
+    """
+
+    def __init__(self, table: str, model: Type, name_column: str, type_column: Optional[str] = None,
+                 type_values: Sequence[str] = (), text_columns: Optional[Sequence[str]] = None):
+        self.table = table
+        self.model = model
+        self.columns: Tuple[str, ...] = tuple(f.name for f in fields(model))
+        self.key = self.columns[0]
+        self.data_columns = self.columns[1:]
+        self.name_column = name_column
+        self.type_column = type_column
+        self.type_values = tuple(type_values)
+        self.text_columns = tuple(text_columns) if text_columns else (name_column,)
+
+        # Числовые колонки для столбцового представления (ColumnBatch)
+        model_fields = fields(model)[1:]
+        self.int_columns = tuple(f.name for f in model_fields if f.type in (int, Optional[int]))
+        self.numeric_columns = tuple(f.name for f in model_fields
+                                     if f.type in (int, float, Optional[int], Optional[float]))
+
+        self.row_getter = attrgetter(*self.columns)
+        self.data_getter = attrgetter(*self.data_columns)
+        self.key_getter = attrgetter(self.key)
+
+        columns = ', '.join(self.columns)
+        data_columns = ', '.join(self.data_columns)
+        self.select_list = columns
+        self.select_t_list = ', '.join(f"t.{c}" for c in self.columns)
+        self.select_sql = f"SELECT {columns} FROM {table}"
+        self.select_by_key_sql = f"{self.select_sql} WHERE {self.key} = ?"
+        self.insert_sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['?'] * len(self.columns))})"
+        self.insert_data_sql = (f"INSERT INTO {table} ({data_columns}) "
+                                f"VALUES ({', '.join(['?'] * len(self.data_columns))})")
+        self.update_sql = (f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in self.data_columns)} "
+                           f"WHERE {self.key} = ?")
+        self.upsert_sql = (f"{self.insert_sql} ON CONFLICT({self.key}) DO UPDATE SET "
+                           f"{', '.join(f'{c} = excluded.{c}' for c in self.data_columns)}")
+        self.delete_sql = f"DELETE FROM {table} WHERE {self.key} = ?"
+
+    @property
+    def label(self) -> str:
+        return self.model.__name__
+
+    def from_row(self, row: Sequence[Any]) -> Any:
+        return self.model(*row)
+
+    def from_rows(self, rows: Iterable[Sequence[Any]]) -> List[Any]:
+        model = self.model
+        return [model(*row) for row in rows]
+
+    def to_row(self, obj: Any) -> Tuple[Any, ...]:
+        return self.row_getter(obj)
+
+    def to_data_row(self, obj: Any) -> Tuple[Any, ...]:
+        return self.data_getter(obj)
+
+    def to_update_row(self, obj: Any) -> Tuple[Any, ...]:
+        return self.data_getter(obj) + (self.key_getter(obj),)
+
+
+SUBSTANCES = TableMapping('substances', Substance, 'sub_name')
+
+TANK = TableMapping('Tank', Tank, 'tank_name', 'tank_type', TANK_TYPES, ('tank_name', 'component_enterprise'))
+PIPELINE = TableMapping('Pipeline', Pipeline, 'pipeline_name', 'diameter_category', PIPELINE_DIAMETER_CATEGORIES,
+                        ('pipeline_name', 'component_enterprise'))
+PUMP = TableMapping('Pump', Pump, 'pump_name', 'pump_type', PUMP_TYPES, ('pump_name', 'component_enterprise'))
+COMPRESSOR = TableMapping('Compressor', Compressor, 'comp_name', 'comp_type', COMPRESSOR_TYPES,
+                          ('comp_name', 'component_enterprise'))
+TECHNOLOGICAL_DEVICES = TableMapping('Technological_devices', TechnologicalDevice, 'device_name', 'device_type',
+                                     DEVICE_TYPES, ('device_name', 'component_enterprise'))
+TRUCK_TANK = TableMapping('Truck_tank', TruckTank, 'truck_tank_name', 'pressure_type', TRUCK_TANK_PRESSURE_TYPES,
+                          ('truck_tank_name', 'component_enterprise'))
+
+EQUIPMENT_MAPPINGS: Dict[str, TableMapping] = {
+    mapping.table: mapping for mapping in (TANK, PIPELINE, PUMP, COMPRESSOR, TECHNOLOGICAL_DEVICES, TRUCK_TANK)
+}
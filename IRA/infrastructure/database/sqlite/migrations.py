@@ -0,0 +1,371 @@
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from IRA.infrastructure.database.sqlite.change_log_repository import create_change_log, create_change_log_consumers
+from IRA.infrastructure.database.sqlite.connection import SQLiteConnectionManager
+from IRA.infrastructure.database.sqlite.mapping import EQUIPMENT_MAPPINGS, SUBSTANCES
+from IRA.infrastructure.database.sqlite.spatial import SpatialIndex
+from IRA.infrastructure.database.sqlite.sql_script import execute_script
+from IRA.infrastructure.database.sqlite.text_search import FullTextIndex, fts5_available
+
+logger = logging.getLogger(__name__)
+
+# Схема совпадает с Documentation/equipment/Создание таблицы.sql;
+# IF NOT EXISTS - для баз, созданных этим скриптом вручную до появления миграций
+_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS Depressurization_type (
+    type_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type_name VARCHAR(50) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Pipeline (
+    pipeline_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline_name VARCHAR(100) NOT NULL,
+    diameter_category VARCHAR(20) NOT NULL,
+    length_meters REAL,
+    diameter_pipeline REAL,
+    flow REAL,
+    time_out REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    sub_id INTEGER NOT NULL DEFAULT 0,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Pipeline_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    diameter_category VARCHAR(20) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/(год·м)
+    UNIQUE (diameter_category, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+
+CREATE TABLE IF NOT EXISTS Pump (
+    pump_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pump_name VARCHAR(100) NOT NULL,
+    pump_type VARCHAR(50) NOT NULL,
+    volume REAL,
+    flow REAL,
+    time_out REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    sub_id INTEGER NOT NULL DEFAULT 0,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Pump_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pump_type VARCHAR(50) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/год
+    UNIQUE (pump_type, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+
+CREATE TABLE IF NOT EXISTS Technological_devices (
+    device_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device_name VARCHAR(100) NOT NULL,
+    device_type VARCHAR(100) NOT NULL,
+    volume REAL,
+    degree_filling REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    spill_square REAL,
+    sub_id INTEGER NOT NULL DEFAULT 0,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Device_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device_type VARCHAR(100) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/год
+    UNIQUE (device_type, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+
+CREATE TABLE IF NOT EXISTS Tank (
+    tank_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tank_name VARCHAR(100) NOT NULL,
+    tank_type VARCHAR(100) NOT NULL,
+    volume REAL,
+    degree_filling REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    spill_square REAL,
+    sub_id INTEGER NOT NULL DEFAULT 0,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Tank_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tank_type VARCHAR(100) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/год
+    UNIQUE (tank_type, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+
+CREATE TABLE IF NOT EXISTS Truck_tank (
+    truck_tank_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    truck_tank_name VARCHAR(100) NOT NULL,
+    pressure_type VARCHAR(50) NOT NULL,
+    volume REAL,
+    degree_filling REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    spill_square REAL,
+    sub_id INTEGER NOT NULL DEFAULT 0,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Truck_tank_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pressure_type VARCHAR(50) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/год
+    UNIQUE (pressure_type, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+
+CREATE TABLE IF NOT EXISTS Compressor (
+    comp_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    comp_name VARCHAR(100) NOT NULL,
+    comp_type VARCHAR(50) NOT NULL,
+    volume REAL,
+    flow REAL,
+    time_out REAL,
+    pressure REAL,
+    temperature REAL,
+    component_enterprise VARCHAR(100),
+    sub_id INTEGER NOT NULL,
+    coordinate VARCHAR(300)
+);
+
+CREATE TABLE IF NOT EXISTS Comp_failure_rate (
+    rate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    comp_type VARCHAR(50) NOT NULL,
+    type_id INTEGER,
+    rate_value REAL NOT NULL, -- Частота разгерметизации, 1/год
+    UNIQUE (comp_type, type_id),
+    FOREIGN KEY (type_id) REFERENCES Depressurization_type(type_id)
+);
+"""
+
+# Таблица веществ - общая для БД проекта и отдельного каталога веществ
+_SUBSTANCES_SQL = """
+CREATE TABLE IF NOT EXISTS substances (
+    id INTEGER PRIMARY KEY,
+    sub_name TEXT NOT NULL,
+    density_liquid REAL,
+    molecular_weight REAL,
+    boiling_temperature_liquid REAL,
+    heat_evaporation_liquid REAL,
+    adiabatic REAL,
+    heat_capacity_liquid REAL,
+    class_substance INTEGER CHECK (class_substance BETWEEN 1 AND 4),
+    heat_of_combustion REAL,
+    sigma INTEGER CHECK (sigma IN (4, 7)),
+    energy_level INTEGER CHECK (energy_level IN (1, 2)),
+    flash_point REAL,
+    auto_ignition_temp REAL,
+    lower_concentration_limit REAL,
+    upper_concentration_limit REAL,
+    threshold_toxic_dose REAL,
+    lethal_toxic_dose REAL,
+    sub_type INTEGER CHECK (sub_type BETWEEN 0 AND 7)
+);
+"""
+
+# Справочники из Documentation/equipment/Добавление данных.sql
+_SEED_SQL = """
+INSERT OR IGNORE INTO Depressurization_type (type_id, type_name) VALUES
+    (1, 'Полное разрушение'),
+    (2, 'Частичное разрушение');
+
+INSERT OR IGNORE INTO Pipeline_failure_rate (diameter_category, type_id, rate_value) VALUES
+    ('Менее 75 мм', 1, 5.7E-7),
+    ('Менее 75 мм', 2, 2.4E-6),
+    ('От 75 до 150 мм', 1, 2.7E-7),
+    ('От 75 до 150 мм', 2, 1.1E-6),
+    ('Более 150 мм', 1, 8.8E-8),
+    ('Более 150 мм', 2, 3.7E-7);
+
+INSERT OR IGNORE INTO Pump_failure_rate (pump_type, type_id, rate_value) VALUES
+    ('Центробежные герметичные', 1, 1.0E-4),
+    ('Центробежные герметичные', 2, 5.0E-4),
+    ('Центробежные с уплотнениями', 1, 5.0E-4),
+    ('Центробежные с уплотнениями', 2, 2.5E-3),
+    ('Поршневые', 1, 5.0E-4),
+    ('Поршневые', 2, 2.5E-3);
+
+INSERT OR IGNORE INTO Device_failure_rate (device_type, type_id, rate_value) VALUES
+    ('Сосуды хранения под давлением', 1, 5.7E-7),
+    ('Сосуды хранения под давлением', 2, 1.0E-4),
+    ('Технологические аппараты', 1, 1.0E-4),
+    ('Технологические аппараты', 2, 5.0E-4),
+    ('Химические реакторы', 1, 1.0E-4),
+    ('Химические реакторы', 2, 5.0E-4);
+
+INSERT OR IGNORE INTO Tank_failure_rate (tank_type, type_id, rate_value) VALUES
+    ('Одностенный', 1, 1.0E-4),
+    ('Одностенный', 2, 5.0E-4),
+    ('С внешней защитной оболочкой', 1, 5.7E-7),
+    ('С внешней защитной оболочкой', 2, 5.0E-4),
+    ('С двойной оболочкой', 1, 2.5E-5),
+    ('С двойной оболочкой', 2, 5.0E-4),
+    ('Полной герметизации', 1, 1.0E-5),
+    ('Полной герметизации', 2, 5.0E-4);
+
+INSERT OR IGNORE INTO Truck_tank_failure_rate (pressure_type, type_id, rate_value) VALUES
+    ('Под избыточным давлением', 1, 5.0E-7),
+    ('Под избыточным давлением', 2, 5.0E-7),
+    ('При атмосферном давлении', 1, 1.0E-4),
+    ('При атмосферном давлении', 2, 5.0E-7);
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Шаг миграции схемы: после применения PRAGMA user_version = version"""
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    execute_script(conn, _TABLES_SQL)
+    execute_script(conn, _SUBSTANCES_SQL)
+    execute_script(conn, _SEED_SQL)
+
+
+def _create_substances_table(conn: sqlite3.Connection) -> None:
+    execute_script(conn, _SUBSTANCES_SQL)
+
+
+def _create_substance_search_index(conn: sqlite3.Connection) -> None:
+    if fts5_available(conn):
+        FullTextIndex(SUBSTANCES.table, SUBSTANCES.key, SUBSTANCES.text_columns).ensure(conn)
+    else:
+        logger.warning("FTS5 is not available, full-text indexes are not created")
+
+
+def _create_indexes(conn: sqlite3.Connection) -> None:
+    for mapping in EQUIPMENT_MAPPINGS.values():
+        table = mapping.table
+        for column in ('sub_id', mapping.type_column, 'component_enterprise'):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+
+def _create_search_indexes(conn: sqlite3.Connection) -> None:
+    if fts5_available(conn):
+        for mapping in (SUBSTANCES, *EQUIPMENT_MAPPINGS.values()):
+            FullTextIndex(mapping.table, mapping.key, mapping.text_columns).ensure(conn)
+    else:
+        logger.warning("FTS5 is not available, full-text indexes are not created")
+    for mapping in EQUIPMENT_MAPPINGS.values():
+        SpatialIndex(mapping.table, mapping.key).ensure(conn)
+
+
+def _upgrade_spatial_indexes(conn: sqlite3.Connection) -> None:
+    for mapping in EQUIPMENT_MAPPINGS.values():
+        SpatialIndex(mapping.table, mapping.key).ensure(conn)
+
+
+# Роли файлов БД: проект (оборудование, справочники частот, вещества) или отдельный каталог веществ.
+# Роль хранится в PRAGMA application_id, версия схемы роли - в PRAGMA user_version
+PROJECT = 'project'
+CATALOGUE = 'catalogue'
+APPLICATION_IDS: Dict[str, int] = {PROJECT: 0x49524150, CATALOGUE: 0x49524143}  # 'IRAP', 'IRAC'
+
+PROJECT_MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "Equipment, failure rate and substance tables with reference data", _create_tables),
+    Migration(2, "Secondary indexes on sub_id, equipment type and component_enterprise", _create_indexes),
+    Migration(3, "Full-text and spatial indexes", _create_search_indexes),
+    Migration(4, "Change log with triggers on equipment, substance and failure rate tables", create_change_log),
+    Migration(5, "Equipment coordinates as generated columns, R*Tree triggers without row updates",
+              _upgrade_spatial_indexes),
+    Migration(6, "Change log consumer revisions for pruning", create_change_log_consumers),
+)
+
+CATALOGUE_MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "Substance table", _create_substances_table),
+    Migration(2, "Full-text index on substance names", _create_substance_search_index),
+)
+
+MIGRATIONS: Dict[str, Tuple[Migration, ...]] = {PROJECT: PROJECT_MIGRATIONS, CATALOGUE: CATALOGUE_MIGRATIONS}
+
+SCHEMA_VERSIONS: Dict[str, int] = {role: migrations[-1].version for role, migrations in MIGRATIONS.items()}
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def database_role(conn: sqlite3.Connection) -> Optional[str]:
+    """Роль файла БД; None - новый или не размеченный миграциями файл.
+
+    Файлы, размеченные до появления ролей (user_version без application_id), - проекты
+    """
+    application_id = conn.execute("PRAGMA application_id").fetchone()[0]
+    if application_id == 0:
+        return PROJECT if schema_version(conn) > 0 else None
+    for role, value in APPLICATION_IDS.items():
+        if value == application_id:
+            return role
+    raise ValueError(f"Not an IRA database (application_id {application_id:#x})")
+
+
+def _target_role(current: Optional[str], requested: str) -> str:
+    """Проект включает таблицу веществ: каталог при открытии как проект дополняется до проекта, не наоборот"""
+    if requested not in MIGRATIONS:
+        raise ValueError(f"Unknown database role: {requested}")
+    return PROJECT if PROJECT in (current, requested) else CATALOGUE
+
+
+def migrate(connections: SQLiteConnectionManager, role: str = PROJECT) -> Tuple[str, int]:
+    """Применение недостающих миграций роли в одной транзакции; возвращает роль файла и версию схемы.
+
+    Для актуальной базы выполняются только чтения PRAGMA application_id и user_version.
+    Каталог веществ, открытый как проект, проходит все миграции проекта (они не пересоздают
+    существующие таблицы и индексы).
+    """
+    conn = connections.get_connection()
+    current = database_role(conn)
+    target = _target_role(current, role)
+    latest = SCHEMA_VERSIONS[target]
+    if current == target:
+        version = schema_version(conn)
+        if version >= latest:
+            if version > latest:
+                logger.warning(f"Database {target} schema version {version} is newer than supported {latest}")
+            return target, version
+
+    with connections.transaction() as conn:
+        # Повторная проверка под блокировкой записи: базу мог обновить другой процесс
+        current = database_role(conn)
+        target = _target_role(current, role)
+        version = schema_version(conn) if current == target else 0
+        for migration in MIGRATIONS[target]:
+            if migration.version > version:
+                logger.info(f"Applying {target} migration {migration.version}: {migration.description}")
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+                version = migration.version
+        conn.execute(f"PRAGMA application_id = {APPLICATION_IDS[target]}")
+    return target, version
+
+
+def ensure_schema(connections: SQLiteConnectionManager, role: str = PROJECT) -> int:
+    """Миграция базы для роли один раз на менеджер соединений (повторные открытия не обращаются к БД)"""
+    if connections.schema_version is None or _target_role(connections.schema_role, role) != connections.schema_role:
+        connections.schema_role, connections.schema_version = migrate(connections, role)
+    return connections.schema_version
@@ -0,0 +1,145 @@
+import math
+import sqlite3
+from typing import Any, List, Optional, Tuple
+
+from IRA.infrastructure.database.sqlite.sql_script import execute_script
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1: Optional[float], lon1: Optional[float],
+                lat2: Optional[float], lon2: Optional[float]) -> Optional[float]:
+    """Расстояние по дуге большого круга между двумя точками, м"""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lon: float, meters: float) -> Tuple[float, float, float, float]:
+    """Описанный вокруг круга прямоугольник (min_lat, min_lon, max_lat, max_lon).
+
+    Долготы не приводятся к [-180, 180]: у круга через меридиан 180° min_lon < -180
+    или max_lon > 180, такой диапазон разбирает bbox_query (см. _lon_range)
+    """
+    d_lat = math.degrees(meters / EARTH_RADIUS_M)
+    cos_lat = math.cos(math.radians(lat))
+    d_lon = 180.0 if cos_lat < 1e-9 else min(180.0, d_lat / cos_lat)
+    return max(-90.0, lat - d_lat), lon - d_lon, min(90.0, lat + d_lat), lon + d_lon
+
+
+def _lon_range(min_lon: float, max_lon: float) -> Tuple[float, float, bool]:
+    """Диапазон долгот в [-180, 180] и признак перехода через меридиан 180° (тогда min_lon > max_lon)"""
+    if max_lon - min_lon >= 360:
+        return -180.0, 180.0, False
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, max_lon, min_lon > max_lon
+
+
+def _lon_sql(min_column: str, max_column: str, crosses: bool) -> str:
+    """Условие пересечения с диапазоном долгот (параметры - min_lon, max_lon); через 180° - два диапазона"""
+    if crosses:
+        return f"({max_column} >= ? OR {min_column} <= ?)"
+    return f"{max_column} >= ? AND {min_column} <= ?"
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function('ira_haversine', 4, haversine_m, deterministic=True)
+
+
+def _coordinate_sql(value: str, part: int) -> str:
+    """SQL-выражение разбора широты (part=0) или долготы (part=1) из текстовой координаты"""
+    comma = f"instr({value}, ',')"
+    text = f"substr({value}, 1, {comma} - 1)" if part == 0 else f"substr({value}, {comma} + 1)"
+    return f"CASE WHEN {comma} > 0 THEN CAST(trim({text}) AS REAL) END"
+
+
+class SpatialIndex:
+    """Пространственный индекс R*Tree по координатам оборудования.
+
+    Широта и долгота - вычисляемые (VIRTUAL) колонки lat/lon, разбираемые из
+    текстовой колонки coordinate; точки хранятся в виртуальной таблице
+    <table>_rtree, которую поддерживают триггеры. Вставка строки оборудования
+    не требует повторной записи, а индекс поддерживается и при записи в БД
+    сторонними инструментами.
+    """
+
+    def __init__(self, table: str, key: str, coordinate: str = 'coordinate'):
+        self.table = table
+        self.key = key
+        self.coordinate = coordinate
+        self.rtree_table = f"{table}_rtree"
+
+    def _ddl(self) -> str:
+        table, key, rtree = self.table, self.key, self.rtree_table
+        insert_point = (f"INSERT INTO {rtree} SELECT new.{key}, new.lat, new.lat, new.lon, new.lon "
+                        f"WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL;")
+        return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+        CREATE TRIGGER {rtree}_ai AFTER INSERT ON {table} BEGIN
+            {insert_point}
+        END;
+        CREATE TRIGGER {rtree}_au AFTER UPDATE OF {self.coordinate}, {key} ON {table} BEGIN
+            DELETE FROM {rtree} WHERE id = old.{key};
+            {insert_point}
+        END;
+        CREATE TRIGGER {rtree}_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {rtree} WHERE id = old.{key};
+        END;
+        """
+
+    def ensure(self, conn: sqlite3.Connection) -> bool:
+        """Вычисляемые колонки lat/lon, индекс и триггеры; существующие строки индексируются один раз.
+
+        Хранимые колонки lat/lon, которые заполнялись триггерами в прежних версиях
+        схемы, заменяются вычисляемыми. Выполняется в транзакции вызывающего кода (см. migrations)
+        """
+        names = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?)", (self.table, self.rtree_table))}
+        if self.table not in names:
+            return False
+        # PRAGMA table_xinfo: hidden = 2 или 3 у вычисляемых колонок
+        columns = {row[1]: row[6] for row in conn.execute(f"PRAGMA table_xinfo({self.table})")}
+        generated = columns.get('lat') in (2, 3) and columns.get('lon') in (2, 3)
+        if self.rtree_table in names and generated:
+            return True
+
+        script = ''.join(f"DROP TRIGGER IF EXISTS {self.rtree_table}_{suffix};" for suffix in ('ai', 'au', 'ad'))
+        if not generated:
+            script += ''.join(f"ALTER TABLE {self.table} DROP COLUMN {c};" for c in ('lat', 'lon') if c in columns)
+            script += ''.join(f"ALTER TABLE {self.table} ADD COLUMN {c} REAL "
+                              f"GENERATED ALWAYS AS ({_coordinate_sql(self.coordinate, part)}) VIRTUAL;"
+                              for part, c in enumerate(('lat', 'lon')))
+        script += self._ddl()
+        if self.rtree_table not in names:
+            script += (f"INSERT INTO {self.rtree_table} SELECT {self.key}, lat, lat, lon, lon FROM {self.table} "
+                       f"WHERE lat IS NOT NULL AND lon IS NOT NULL;")
+        execute_script(conn, script)
+        return True
+
+    def bbox_query(self, select: str, min_lat: float, min_lon: float,
+                   max_lat: float, max_lon: float) -> Tuple[str, List[Any]]:
+        """Запрос точек в прямоугольнике; базовая таблица доступна как t.
+
+        R*Tree хранит границы в float32 с округлением наружу, поэтому после
+        отбора по индексу границы проверяются по точным lat/lon. Прямоугольник
+        через меридиан 180° (min_lon > max_lon или долготы за пределами ±180)
+        разбивается на два диапазона долгот; индекс тогда отбирает только по широте.
+        """
+        min_lon, max_lon, crosses = _lon_range(min_lon, max_lon)
+        sql = (f"SELECT {select} FROM {self.rtree_table} r JOIN {self.table} t ON t.{self.key} = r.id "
+               f"WHERE r.max_lat >= ? AND r.min_lat <= ? AND {_lon_sql('r.min_lon', 'r.max_lon', crosses)} "
+               f"AND t.lat BETWEEN ? AND ? AND {_lon_sql('t.lon', 't.lon', crosses)}")
+        return sql, [min_lat, max_lat, min_lon, max_lon, min_lat, max_lat, min_lon, max_lon]
+
+    def radius_query(self, select: str, lat: float, lon: float, meters: float) -> Tuple[str, List[Any]]:
+        """Запрос точек в радиусе meters от (lat, lon), отсортированных по расстоянию"""
+        sql, params = self.bbox_query(select, *radius_bbox(lat, lon, meters))
+        sql += " AND ira_haversine(t.lat, t.lon, ?, ?) <= ? ORDER BY ira_haversine(t.lat, t.lon, ?, ?)"
+        return sql, params + [lat, lon, meters, lat, lon]
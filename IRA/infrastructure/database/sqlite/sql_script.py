@@ -0,0 +1,25 @@
+import sqlite3
+from typing import List
+
+
+def split_statements(script: str) -> List[str]:
+    """Разбиение SQL-скрипта на отдельные выражения (с учетом тел триггеров, строк и комментариев)"""
+    statements = []
+    current = ''
+    for piece in script.split(';'):
+        current += piece + ';'
+        if sqlite3.complete_statement(current):
+            if current.strip(' \t\r\n;'):
+                statements.append(current.strip())
+            current = ''
+    return statements
+
+
+def execute_script(conn: sqlite3.Connection, script: str) -> None:
+    """Выполнение SQL-скрипта в текущей транзакции.
+
+    В отличие от Connection.executescript не фиксирует открытую транзакцию,
+    поэтому скрипт может быть частью миграции.
+    """
+    for statement in split_statements(script):
+        conn.execute(statement)
@@ -0,0 +1,131 @@
+import sqlite3
+from typing import Any, List, Optional, Sequence, Tuple
+
+from IRA.infrastructure.database.sqlite.sql_script import execute_script
+
+# Триграммный токенизатор ищет подстроки длиной от 3 символов
+MIN_FTS_QUERY_LENGTH = 3
+
+_fts5_available: Optional[bool] = None
+
+
+def casefold(value: Optional[str]) -> Optional[str]:
+    """Unicode-свертка регистра для SQL-функции ira_casefold (LIKE в SQLite сворачивает только ASCII)"""
+    return value.casefold() if isinstance(value, str) else value
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function('ira_casefold', 1, casefold, deterministic=True)
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Поддерживает ли сборка SQLite FTS5 с триграммным токенизатором"""
+    global _fts5_available
+    if _fts5_available is None:
+        try:
+            conn.execute("CREATE VIRTUAL TABLE temp.ira_fts5_probe USING fts5(value, tokenize='trigram')")
+            conn.execute("DROP TABLE temp.ira_fts5_probe")
+            _fts5_available = True
+        except sqlite3.OperationalError:
+            _fts5_available = False
+    return _fts5_available
+
+
+def _like_pattern(text: str, prefix: bool) -> str:
+    escaped = casefold(text).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%" if prefix else f"%{escaped}%"
+
+
+class FullTextIndex:
+    """Полнотекстовый индекс FTS5 (trigram) по текстовым колонкам таблицы.
+
+    Индекс хранится во внешней FTS5-таблице <table>_fts и синхронизируется
+    триггерами. Если FTS5 недоступен или запрос короче трех символов, поиск
+    выполняется через ira_casefold(column) LIKE.
+    """
+
+    def __init__(self, table: str, key: str, columns: Sequence[str]):
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+        self.fts_table = f"{table}_fts"
+        self.enabled = False
+
+    def _ddl(self) -> str:
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f"new.{c}" for c in self.columns)
+        old_values = ', '.join(f"old.{c}" for c in self.columns)
+        fts = self.fts_table
+        return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {columns}, content='{self.table}', content_rowid='{self.key}', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {self.table} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.{self.key}, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {self.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{self.key}, {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {self.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{self.key}, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.{self.key}, {new_values});
+        END;
+        """
+
+    def ensure(self, conn: sqlite3.Connection) -> bool:
+        """Создание индекса и триггеров (при первом создании индекс заполняется по таблице)"""
+        if not fts5_available(conn):
+            self.enabled = False
+            return False
+
+        names = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?)", (self.table, self.fts_table))}
+        if self.table not in names:
+            self.enabled = False
+            return False
+        if self.fts_table not in names:
+            execute_script(conn, self._ddl())
+            conn.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+        self.enabled = True
+        return True
+
+    def _use_fts(self, text: str) -> bool:
+        return self.enabled and len(text) >= MIN_FTS_QUERY_LENGTH
+
+    def _match_expression(self, text: str, column: Optional[str]) -> str:
+        phrase = '"' + text.replace('"', '""') + '"'
+        return f"{column} : {phrase}" if column else phrase
+
+    def condition(self, column: str, text: str, alias: str = '') -> Tuple[str, List[Any]]:
+        """Условие WHERE "колонка содержит text" без учета регистра"""
+        prefix = f"{alias}." if alias else ''
+        if self._use_fts(text):
+            return (f"{prefix}{self.key} IN (SELECT rowid FROM {self.fts_table} WHERE {self.fts_table} MATCH ?)",
+                    [self._match_expression(text, column)])
+        return f"ira_casefold({prefix}{column}) LIKE ? ESCAPE '\\'", [_like_pattern(text, False)]
+
+    def ranked_query(self, select: str, text: str, limit: int,
+                     prefix: bool = False) -> Tuple[str, List[Any]]:
+        """Запрос по всем колонкам индекса с ранжированием (bm25); базовая таблица доступна как t.
+
+        prefix=True оставляет только строки, одна из колонок которых начинается с text.
+        """
+        pattern = _like_pattern(text, prefix)
+        like_any = ' OR '.join(f"ira_casefold(t.{c}) LIKE ? ESCAPE '\\'" for c in self.columns)
+        like_params: List[Any] = [pattern] * len(self.columns)
+
+        if self._use_fts(text):
+            sql = (f"SELECT {select} FROM {self.fts_table} f "
+                   f"JOIN {self.table} t ON t.{self.key} = f.rowid "
+                   f"WHERE {self.fts_table} MATCH ?")
+            params: List[Any] = [self._match_expression(text, None)]
+            if prefix:
+                sql += f" AND ({like_any})"
+                params.extend(like_params)
+            order = "f.rank"
+        else:
+            sql = f"SELECT {select} FROM {self.table} t WHERE {like_any}"
+            params = like_params
+            order = f"t.{self.key}"
+
+        return f"{sql} ORDER BY {order} LIMIT ?", params + [limit]
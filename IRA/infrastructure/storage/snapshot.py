@@ -0,0 +1,365 @@
+import importlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import typing
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from IRA.domain.models.columns import MISSING_INT, ColumnBatch
+from IRA.domain.models.failure_rate import FailureRates
+from IRA.domain.repositories.equipment_repository import EquipmentRepository
+from IRA.domain.repositories.failure_rate_repository import FailureRateRepository
+from IRA.domain.repositories.substance_repository import SubstanceRepository
+
+MAGIC = b'IRASNAP\x00'
+FORMAT_VERSION = 1
+
+# Заголовок: сигнатура, версия формата, резерв, смещение и длина оглавления (JSON)
+_HEADER = struct.Struct('<8sIIQQ')
+# Выравнивание блоков: массивы numpy создаются поверх mmap без копирования
+_ALIGNMENT = 64
+SUBSTANCES_TABLE = 'substances'
+_MODELS_PACKAGE = 'IRA.domain.models.'
+
+
+class SnapshotError(Exception):
+    """Файл не является снимком проекта или имеет неподдерживаемую версию"""
+
+
+class StringColumn:
+    """Строковая колонка снимка: смещения строк и общий буфер UTF-8, строки декодируются при обращении"""
+
+    def __init__(self, offsets: np.ndarray, data: memoryview, nulls: Optional[np.ndarray] = None):
+        self._offsets = offsets
+        self._data = data
+        self._nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self._nulls is not None and self._nulls[index]:
+            return None
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return (self[i] for i in range(len(self)))
+
+    def tolist(self) -> List[Optional[str]]:
+        return list(self)
+
+
+class _Writer:
+    """Последовательная запись выровненных блоков; возвращает их описания для оглавления"""
+
+    def __init__(self, file):
+        self.file = file
+        self.position = _HEADER.size
+        file.write(b'\x00' * _HEADER.size)
+
+    def _align(self) -> int:
+        padding = -self.position % _ALIGNMENT
+        self.file.write(b'\x00' * padding)
+        self.position += padding
+        return self.position
+
+    def _block(self, data) -> Dict[str, int]:
+        offset = self._align()
+        self.file.write(data)
+        self.position += len(memoryview(data).cast('B'))
+        return {'offset': offset, 'nbytes': self.position - offset}
+
+    def array(self, array: np.ndarray, dtype: str) -> Dict[str, Any]:
+        array = np.ascontiguousarray(array, dtype=dtype)
+        spec = self._block(array.tobytes())
+        spec.update(dtype=dtype, shape=list(array.shape))
+        return spec
+
+    def strings(self, chunks: Iterable[Sequence[Optional[str]]]) -> Dict[str, Any]:
+        """Строковая колонка из порций значений: данные пишутся сразу, в памяти остаются только длины строк"""
+        offset = self._align()
+        lengths, nulls = [], []
+        for values in chunks:
+            encoded = [b'' if value is None else value.encode('utf-8') for value in values]
+            data = b''.join(encoded)
+            self.file.write(data)
+            self.position += len(data)
+            lengths.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+            nulls.append(np.fromiter((value is None for value in values), dtype=bool, count=len(values)))
+        data_spec = {'offset': offset, 'nbytes': self.position - offset}
+
+        lengths = np.concatenate(lengths) if lengths else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        spec = {'offsets': self.array(offsets, '<i8'), 'data': data_spec}
+        nulls = np.concatenate(nulls) if nulls else np.empty(0, dtype=bool)
+        if nulls.any():
+            spec['nulls'] = self.array(nulls, '|b1')
+        return spec
+
+
+def _model_name(model: type) -> str:
+    return f"{model.__module__}.{model.__qualname__}"
+
+
+def _resolve_model(name: str) -> type:
+    # Классы моделей загружаются только из пакета моделей предметной области
+    if not name.startswith(_MODELS_PACKAGE):
+        raise SnapshotError(f"Unsupported model class: {name}")
+    module, _, qualname = name.rpartition('.')
+    return getattr(importlib.import_module(module), qualname)
+
+
+def _source(repository: Any) -> Any:
+    """SQLite-репозиторий с описанием таблицы (в том числе обернутый кэширующим)"""
+    source = getattr(repository, 'repository', repository)
+    if not hasattr(source, 'mapping') or not hasattr(source, 'iter_column'):
+        raise ValueError(f"{type(repository).__name__} is not a table-mapped SQLite repository")
+    return source
+
+
+def _write_table(writer: _Writer, repository: Any, batch: ColumnBatch, chunk_size: int) -> Dict[str, Any]:
+    """Описание и блоки одной таблицы: числовые колонки из ColumnBatch, строковые - порциями из SQL"""
+    source = _source(repository)
+    mapping = source.mapping
+    entry: Dict[str, Any] = {
+        'model': _model_name(mapping.model),
+        'fields': list(mapping.columns),
+        'rows': len(batch),
+        'ids': writer.array(batch.ids, '<i8'),
+        'columns': {name: writer.array(column, '<i8' if column.dtype.kind == 'i' else '<f8')
+                    for name, column in batch.columns.items()},
+        'strings': {},
+        'type_labels': list(batch.type_labels),
+    }
+    for name in mapping.data_columns:
+        if name not in batch.columns:
+            try:
+                entry['strings'][name] = writer.strings(source.iter_column(name, chunk_size))
+            except sqlite3.Error as e:
+                raise SnapshotError(f"Error reading {mapping.table}.{name} for the snapshot: {e}") from e
+    if batch.type_codes is not None:
+        entry['type_codes'] = writer.array(batch.type_codes, '<i2')
+    return entry
+
+
+def write_snapshot(path: str, equipment: Sequence[EquipmentRepository],
+                   substances: Optional[SubstanceRepository] = None, rates: Optional[FailureRateRepository] = None,
+                   chunk_size: int = 10000) -> Dict[str, int]:
+    """Экспорт проекта из репозиториев в файл снимка; возвращает число записей по таблицам.
+
+    Все чтения выполняются в одной транзакции чтения на каждый файл БД, поэтому
+    снимок согласован и при параллельной записи. Объекты моделей не создаются:
+    числовые колонки читаются как ColumnBatch, строковые - порциями chunk_size.
+    Файл пишется во временный и заменяет path атомарно.
+    """
+    counts = {}
+    directory: Dict[str, Any] = {
+        'format': FORMAT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'equipment': {},
+        'substances': None,
+        'failure_rates': {},
+    }
+    managers = {}
+    for repository in (substances, rates, *equipment):
+        manager = getattr(repository, 'connection_manager', None)
+        if manager is not None:
+            managers[id(manager)] = manager
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file, ExitStack() as reads:
+            for manager in managers.values():
+                reads.enter_context(manager.read_transaction())
+            writer = _Writer(file)
+            if substances is not None:
+                batch = substances.load_columns(chunk_size)
+                directory['substances'] = _write_table(writer, substances, batch, chunk_size)
+                counts[SUBSTANCES_TABLE] = len(batch)
+            for repository in equipment:
+                batch = repository.load_columns(chunk_size=chunk_size)
+                directory['equipment'][batch.table] = _write_table(writer, repository, batch, chunk_size)
+                counts[batch.table] = len(batch)
+            for table, table_rates in (rates.get_all() if rates is not None else {}).items():
+                directory['failure_rates'][table] = {
+                    'type_labels': list(table_rates.type_labels),
+                    'type_ids': list(table_rates.type_ids),
+                    'length_column': table_rates.length_column,
+                    'rates': writer.array(table_rates.rates, '<f8'),
+                }
+
+            payload = json.dumps(directory, ensure_ascii=False).encode('utf-8')
+            offset = writer.position
+            file.write(payload)
+            file.seek(0)
+            file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, offset, len(payload)))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return counts
+
+
+class ProjectSnapshot:
+    """Снимок проекта, открытый через mmap.
+
+    Числовые колонки, коды типов и частоты отказов - массивы numpy только для
+    чтения поверх отображенного файла (без копирования); открытие читает
+    только заголовок и оглавление, поэтому не зависит от размера проекта.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            # Пустой файл mmap не отображает, поэтому размер проверяется до отображения
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise SnapshotError(f"{path} is not a project snapshot")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, offset, length = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path} is not a project snapshot")
+            if version > FORMAT_VERSION:
+                raise SnapshotError(f"Snapshot format {version} is newer than supported {FORMAT_VERSION}")
+            if offset + length > len(self._mmap):
+                raise SnapshotError(f"{path} is truncated")
+            self.directory: Dict[str, Any] = json.loads(bytes(self._mmap[offset:offset + length]))
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    @classmethod
+    def open(cls, path: str) -> 'ProjectSnapshot':
+        return cls(path)
+
+    def close(self) -> None:
+        """Закрытие отображения; при живых массивах снимка оно закроется вместе с последним из них"""
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> 'ProjectSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def equipment_tables(self) -> Tuple[str, ...]:
+        return tuple(self.directory['equipment'])
+
+    def _array(self, spec: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+
+    def _table(self, table: str) -> Dict[str, Any]:
+        entry = (self.directory['substances'] if table == SUBSTANCES_TABLE
+                 else self.directory['equipment'].get(table))
+        if entry is None:
+            raise KeyError(f"No {table} in snapshot")
+        return entry
+
+    def _batch(self, table: str, entry: Dict[str, Any]) -> ColumnBatch:
+        return ColumnBatch(
+            table=table,
+            ids=self._array(entry['ids']),
+            columns={name: self._array(spec) for name, spec in entry['columns'].items()},
+            type_codes=self._array(entry['type_codes']) if 'type_codes' in entry else None,
+            type_labels=tuple(entry['type_labels']),
+        )
+
+    def substance_columns(self) -> ColumnBatch:
+        """Столбцовое представление веществ"""
+        return self._batch(SUBSTANCES_TABLE, self._table(SUBSTANCES_TABLE))
+
+    def load_columns(self, table: str, with_substances: bool = False) -> ColumnBatch:
+        """Столбцовое представление таблицы оборудования, как у EquipmentRepository.load_columns.
+
+        Массивы только для чтения; substance присоединяется копией (выборка по sub_id).
+        """
+        batch = self._batch(table, self._table(table))
+        if with_substances:
+            batch.substance = self.substance_columns().take(batch['sub_id'])
+        return batch
+
+    def failure_rates(self) -> Dict[str, FailureRates]:
+        """Справочники частот разгерметизации по таблицам оборудования"""
+        return {
+            table: FailureRates(table, tuple(entry['type_labels']), tuple(entry['type_ids']),
+                                self._array(entry['rates']), entry['length_column'])
+            for table, entry in self.directory['failure_rates'].items()
+        }
+
+    def strings(self, table: str, column: str) -> StringColumn:
+        """Строковая колонка таблицы (названия, типы, составляющие, координаты)"""
+        spec = self._table(table)['strings'][column]
+        data = memoryview(self._mmap)[spec['data']['offset']:spec['data']['offset'] + spec['data']['nbytes']]
+        nulls = self._array(spec['nulls']) if 'nulls' in spec else None
+        return StringColumn(self._array(spec['offsets']), data, nulls)
+
+    def iter_objects(self, table: str, chunk_size: int = 10000) -> Iterator[Any]:
+        """Объекты модели таблицы, собираемые из колонок порциями"""
+        entry = self._table(table)
+        if not entry['model']:
+            return
+        model = _resolve_model(entry['model'])
+        hints = typing.get_type_hints(model)
+        batch = self._batch(table, entry)
+        strings = {name: self.strings(table, name) for name in entry['strings']}
+        names = entry['fields']
+
+        def values(name: str, rows: slice) -> List[Any]:
+            if name in strings:
+                column = strings[name]
+                return [column[i] for i in range(*rows.indices(len(column)))]
+            column = batch[name][rows]
+            if column.dtype.kind == 'f':
+                return [None if value != value else value for value in column.tolist()]
+            optional = hints.get(name) == Optional[int]
+            return [None if optional and value == MISSING_INT else value for value in column.tolist()]
+
+        for start in range(0, len(batch), chunk_size):
+            rows = slice(start, start + chunk_size)
+            columns = [batch.ids[rows].tolist()] + [values(name, rows) for name in names[1:]]
+            for row in zip(*columns):
+                yield model(*row)
+
+    def import_into(self, equipment: Sequence[EquipmentRepository],
+                    substances: Optional[SubstanceRepository] = None, chunk_size: int = 500) -> Dict[str, int]:
+        """Запись снимка в репозитории (upsert по ключам); возвращает число записанных объектов по таблицам.
+
+        Справочники частот в репозитории не пишутся: их создают миграции схемы.
+        """
+        counts = {}
+        targets: List[Tuple[str, Any]] = []
+        if substances is not None and self.directory['substances'] is not None:
+            targets.append((SUBSTANCES_TABLE, substances))
+        for repository in equipment:
+            if repository.table in self.directory['equipment']:
+                targets.append((repository.table, repository))
+
+        for table, repository in targets:
+            counts[table] = 0
+            chunk = []
+            for obj in self.iter_objects(table):
+                chunk.append(obj)
+                if len(chunk) == chunk_size:
+                    counts[table] += sum(result is not None for result in repository.upsert_many(chunk))
+                    chunk = []
+            if chunk:
+                counts[table] += sum(result is not None for result in repository.upsert_many(chunk))
+        return counts
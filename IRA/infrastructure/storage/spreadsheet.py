@@ -0,0 +1,267 @@
+import csv
+import os
+import typing
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from IRA.infrastructure.database.sqlite.mapping import TableMapping
+
+CSV_ENCODING = 'utf-8-sig'  # BOM нужен Excel для распознавания кириллицы
+
+
+@dataclass
+class RejectedRow:
+    """Отклоненная строка файла (номер строки с учетом заголовка)"""
+    line: int
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    """Итоги импорта; errors хранит не больше max_rejected первых отклоненных строк"""
+    table: str
+    rows: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors: List[RejectedRow] = field(default_factory=list)
+
+
+def _mapping(repository: Any) -> TableMapping:
+    """Отображение таблицы репозитория (в том числе обернутого кэширующим)"""
+    for candidate in (repository, getattr(repository, 'repository', None)):
+        mapping = getattr(candidate, 'mapping', None)
+        if isinstance(mapping, TableMapping):
+            return mapping
+    raise ValueError(f"{type(repository).__name__} is not a table-mapped repository")
+
+
+def _number(value: Any) -> Any:
+    if isinstance(value, str):
+        # Десятичная запятая и пробелы-разделители разрядов из русской локали
+        value = value.strip().replace('\xa0', '').replace(' ', '').replace(',', '.')
+    return value
+
+
+def _to_int(value: Any) -> int:
+    number = float(_number(value))
+    if not number.is_integer():
+        raise ValueError(f"{value!r} is not an integer")
+    return int(number)
+
+
+def _to_float(value: Any) -> float:
+    return float(_number(value))
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+_CONVERTERS: Dict[Any, Callable[[Any], Any]] = {int: _to_int, float: _to_float, str: _to_str}
+
+
+def _converter(annotation: Any) -> Tuple[Callable[[Any], Any], bool]:
+    """Преобразователь значения ячейки для типа поля модели и признак Optional"""
+    args = typing.get_args(annotation)
+    if typing.get_origin(annotation) is typing.Union and type(None) in args:
+        return _CONVERTERS[next(arg for arg in args if arg is not type(None))], True
+    return _CONVERTERS[annotation], False
+
+
+def _iter_csv(path: str, delimiter: Optional[str]) -> Iterator[Sequence[Any]]:
+    with open(path, newline='', encoding=CSV_ENCODING) as file:
+        if delimiter is None:
+            sample = file.read(65536)
+            file.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+            except csv.Error:
+                delimiter = ','
+        yield from csv.reader(file, delimiter=delimiter)
+
+
+def _openpyxl():
+    try:
+        import openpyxl
+    except ImportError as e:
+        raise ImportError("XLSX support requires openpyxl: pip install IRA[xlsx]") from e
+    return openpyxl
+
+
+def _iter_xlsx(path: str, sheet: Optional[str]) -> Iterator[Sequence[Any]]:
+    # read_only: строки читаются из архива потоком, без загрузки всей книги
+    workbook = _openpyxl().load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.xlsx'):
+        raise ValueError(f"Unsupported spreadsheet format: {extension or path}")
+    return extension
+
+
+def iter_rows(path: str, sheet: Optional[str] = None, delimiter: Optional[str] = None) -> Iterator[Sequence[Any]]:
+    """Строки CSV или XLSX (по расширению файла) по одной, начиная с заголовка"""
+    if _file_format(path) == '.xlsx':
+        return _iter_xlsx(path, sheet)
+    return _iter_csv(path, delimiter)
+
+
+class SpreadsheetImporter:
+    """Потоковый импорт строк таблицы CSV/XLSX в репозиторий оборудования или веществ.
+
+    Колонки сопоставляются с полями модели по заголовку (без учета регистра)
+    или по словарю columns {заголовок: поле}. Строки преобразуются в объекты
+    модели и проверяются validate(); прошедшие проверку пишутся порциями
+    chunk_size через upsert_many - одна транзакция на порцию, строки с ID
+    обновляют существующие записи. В памяти находится только текущая порция.
+    """
+
+    def __init__(self, repository: Any, columns: Optional[Dict[str, str]] = None, chunk_size: int = 1000,
+                 max_rejected: int = 1000, progress: Optional[Callable[[ImportReport], None]] = None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.repository = repository
+        self.mapping = _mapping(repository)
+        self.columns = {header.strip().lower(): name for header, name in (columns or {}).items()}
+        self.chunk_size = chunk_size
+        self.max_rejected = max_rejected
+        self.progress = progress
+
+    def _layout(self, header: Sequence[Any]) -> List[Tuple[int, str, Callable[[Any], Any], bool]]:
+        """Позиции колонок файла для полей модели: (индекс, поле, преобразователь, допускает None)"""
+        model = self.mapping.model
+        hints = typing.get_type_hints(model)
+        names = {f.name for f in fields(model)}
+        positions = {}
+        for index, title in enumerate(header):
+            title = _to_str(title).lower() if title is not None else ''
+            name = self.columns.get(title, title)
+            if name in names and name not in positions:
+                positions[name] = index
+
+        missing = [name for name in self.mapping.data_columns if name not in positions]
+        if missing:
+            raise ValueError(f"Columns missing for {self.mapping.label}: {', '.join(missing)}")
+        layout = []
+        for name in self.mapping.columns:
+            if name in positions:
+                layout.append((positions[name], name, *_converter(hints[name])))
+        return layout
+
+    def _reject(self, report: ImportReport, line: int, reason: str) -> None:
+        report.rejected += 1
+        if len(report.errors) < self.max_rejected:
+            report.errors.append(RejectedRow(line, reason))
+
+    def _convert(self, layout, row: Sequence[Any]) -> Any:
+        values = {self.mapping.key: None}
+        for index, name, convert, optional in layout:
+            value = row[index] if index < len(row) else None
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if not optional and convert is not _to_str:
+                    raise ValueError(f"{name} is empty")
+                values[name] = None if optional else ''
+                continue
+            try:
+                values[name] = convert(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name}: invalid value {value!r}") from None
+        return self.mapping.model(**values)
+
+    def _write(self, report: ImportReport, chunk: List[Tuple[int, Any]]) -> None:
+        results = self.repository.upsert_many([obj for _, obj in chunk])
+        for (line, _), result in zip(chunk, results):
+            if result is None:
+                self._reject(report, line, "not written to the database")
+            else:
+                report.imported += 1
+        chunk.clear()
+        if self.progress is not None:
+            self.progress(report)
+
+    def import_rows(self, rows: Iterable[Sequence[Any]]) -> ImportReport:
+        """Импорт строк, первая из которых - заголовок"""
+        rows = iter(rows)
+        report = ImportReport(self.mapping.table)
+        header = next(rows, None)
+        if header is None:
+            return report
+        layout = self._layout(header)
+
+        chunk: List[Tuple[int, Any]] = []
+        for line, row in enumerate(rows, start=2):
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in row):
+                continue
+            report.rows += 1
+            try:
+                obj = self._convert(layout, row)
+            except ValueError as e:
+                self._reject(report, line, str(e))
+                continue
+            if not obj.validate():
+                self._reject(report, line, f"validation failed for {self.mapping.label}")
+                continue
+            chunk.append((line, obj))
+            if len(chunk) == self.chunk_size:
+                self._write(report, chunk)
+        if chunk:
+            self._write(report, chunk)
+        return report
+
+    def import_file(self, path: str, sheet: Optional[str] = None, delimiter: Optional[str] = None) -> ImportReport:
+        """Импорт файла CSV или XLSX (лист sheet, по умолчанию активный)"""
+        return self.import_rows(iter_rows(path, sheet, delimiter))
+
+
+def export_spreadsheet(path: str, repository: Any, chunk_size: int = 1000, delimiter: str = ',',
+                       columns: Optional[Dict[str, str]] = None,
+                       progress: Optional[Callable[[int], None]] = None) -> int:
+    """Потоковый экспорт всех записей репозитория в CSV или XLSX; возвращает число строк.
+
+    columns - заголовки колонок {поле: заголовок}; записи читаются порциями по ключу (iter_all).
+    Файл пишется во временный и заменяет path атомарно.
+    """
+    file_format = _file_format(path)
+    mapping = _mapping(repository)
+    header = [(columns or {}).get(name, name) for name in mapping.columns]
+    count = 0
+    tmp_path = f"{path}.tmp"
+
+    def rows() -> Iterator[Tuple[Any, ...]]:
+        nonlocal count
+        for obj in repository.iter_all(chunk_size):
+            yield mapping.to_row(obj)
+            count += 1
+            if progress is not None and count % chunk_size == 0:
+                progress(count)
+
+    try:
+        if file_format == '.xlsx':
+            # write_only: строки сразу сбрасываются во временные файлы openpyxl
+            workbook = _openpyxl().Workbook(write_only=True)
+            worksheet = workbook.create_sheet(mapping.table)
+            worksheet.append(header)
+            for row in rows():
+                worksheet.append(row)
+            workbook.save(tmp_path)
+        else:
+            with open(tmp_path, 'w', newline='', encoding=CSV_ENCODING) as file:
+                writer = csv.writer(file, delimiter=delimiter)
+                writer.writerow(header)
+                writer.writerows(rows())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress is not None and count % chunk_size:
+        progress(count)
+    return count
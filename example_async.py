@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from IRA.infrastructure.database.sqlite.async_repository import AsyncTankRepository
+from IRA.infrastructure.database.sqlite.equipment_repository import SQLiteTankRepository
+
+REQUESTS = 100
+
+
+def run_sync(repo: SQLiteTankRepository) -> float:
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        repo.search(component_enterprise=f"парк {i % 5}")
+        repo.within_radius(55.76, 37.63, 1000)
+    return time.perf_counter() - start
+
+
+async def run_async(repo: AsyncTankRepository) -> float:
+    async def request(i: int):
+        await repo.search(component_enterprise=f"парк {i % 5}")
+        await repo.within_radius(55.76, 37.63, 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(REQUESTS)))
+    return time.perf_counter() - start
+
+
+async def main():
+    # 1. Синхронный репозиторий и асинхронный фасад над ним
+    repo = SQLiteTankRepository("db_eg.db")
+    async_repo = AsyncTankRepository(repo, readers=4)
+
+    # 2. Обычные вызовы через await
+    tank = await async_repo.get(1)
+    print(f"Загружен резервуар: {tank.tank_name if tank else None}")
+    async for tank in async_repo.iter_all(chunk_size=2):
+        print(f"- {tank.tank_name}")
+
+    # 3. Сравнение пропускной способности при одновременных запросах
+    sync_time = run_sync(repo)
+    async_time = await run_async(async_repo)
+    print(f"\nSync:  {REQUESTS / sync_time:.0f} запросов/с")
+    print(f"Async: {REQUESTS / async_time:.0f} запросов/с")
+
+    # 4. Отмена долгого запроса прерывает его в SQLite
+    task = asyncio.create_task(async_repo.read(
+        lambda: repo.connection_manager.get_connection().execute(
+            "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c").fetchone()))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        print("\nДолгий запрос отменен")
+
+    async_repo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
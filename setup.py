@@ -4,4 +4,7 @@ setup(
     name="IRA",
     version="0.1",
     packages=find_packages(),
+    python_requires=">=3.10",
+    install_requires=["numpy"],
+    extras_require={"xlsx": ["openpyxl"]},
 )
\ No newline at end of file